@@ -2,11 +2,13 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
 # Register your models here.
+from tasks.changelist import ScalableAdminMixin
+
 from .forms import CustomUserCreationForm, CustomUserChangeForm
-from .models import CustomUser
+from .models import CustomUser, OutboxEmail
 
 
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(ScalableAdminMixin, UserAdmin):
     add_form = CustomUserCreationForm
     form = CustomUserChangeForm
     model = CustomUser
@@ -15,8 +17,22 @@ class CustomUserAdmin(UserAdmin):
         "email",
         "is_staff",
     )
+    # Usernames are the emails, unique and indexed: searched by prefix and
+    # the only sortable column, which the keyset pages follow. Each filter
+    # has an index ending in username (see CustomUser.Meta).
+    list_filter = ("is_staff", "is_active")
+    search_fields = ("^username",)
+    sortable_by = ("username",)
     fieldsets = UserAdmin.fieldsets + ((None, {"fields": ("name",)}),)
     add_fieldsets = UserAdmin.add_fieldsets + ((None, {"fields": ("name",)}),)
 
 
 admin.site.register(CustomUser, CustomUserAdmin)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "recipients", "state", "attempts", "created_at")
+    list_filter = ("state",)
+    ordering = ("-id",)
+    readonly_fields = ("message", "attempts", "last_error", "created_at")
@@ -0,0 +1,188 @@
+import email
+import logging
+from base64 import b64decode, b64encode
+from datetime import timedelta
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_message(message):
+    """The JSON stored for an EmailMessage (or EmailMultiAlternatives)"""
+    attachments = []
+    for attachment in message.attachments:
+        if isinstance(attachment, MIMEBase):
+            attachments.append({"mime": attachment.as_string()})
+            continue
+        filename, content, mimetype = attachment
+        if isinstance(content, bytes):
+            content, encoded = b64encode(content).decode("ascii"), True
+        else:
+            encoded = False
+        attachments.append(
+            {
+                "filename": filename,
+                "content": content,
+                "mimetype": mimetype,
+                "base64": encoded,
+            }
+        )
+    return {
+        "subject": message.subject,
+        "body": message.body,
+        "from_email": message.from_email,
+        "to": list(message.to),
+        "cc": list(message.cc),
+        "bcc": list(message.bcc),
+        "reply_to": list(message.reply_to),
+        "headers": dict(message.extra_headers),
+        "content_subtype": message.content_subtype,
+        "alternatives": [list(item) for item in getattr(message, "alternatives", [])],
+        "attachments": attachments,
+    }
+
+
+def mime_attachment(text):
+    """The MIMEBase that EmailMessage.attach() takes, from its serialized text"""
+    parsed = email.message_from_string(text)
+    part = MIMEBase(parsed.get_content_maintype(), parsed.get_content_subtype())
+    for name in part.keys():
+        del part[name]
+    for name, value in parsed.items():
+        part[name] = value
+    part.set_payload(parsed.get_payload())
+    return part
+
+
+def deserialize_message(data, connection=None):
+    message = EmailMultiAlternatives(
+        subject=data["subject"],
+        body=data["body"],
+        from_email=data["from_email"],
+        to=data["to"],
+        cc=data["cc"],
+        bcc=data["bcc"],
+        reply_to=data["reply_to"],
+        headers=data["headers"],
+        alternatives=[tuple(item) for item in data["alternatives"]],
+        connection=connection,
+    )
+    message.content_subtype = data["content_subtype"]
+    for attachment in data["attachments"]:
+        if "mime" in attachment:
+            message.attach(mime_attachment(attachment["mime"]))
+            continue
+        content = attachment["content"]
+        if attachment["base64"]:
+            content = b64decode(content)
+        message.attach(attachment["filename"], content, attachment["mimetype"])
+    return message
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Queue messages in OutboxEmail instead of sending them.
+
+    The rows are written in the caller's transaction, so a request that
+    rolls back sends nothing. send_queued_email delivers them.
+    """
+
+    def send_messages(self, email_messages):
+        rows = [
+            OutboxEmail(
+                message=serialize_message(message),
+                subject=message.subject[:255],
+                recipients=", ".join(message.recipients()),
+            )
+            for message in email_messages
+            if message.recipients()
+        ]
+        OutboxEmail.objects.using(DEFAULT_DB_ALIAS).bulk_create(rows)
+        return len(rows)
+
+
+def get_retry_delay(attempts):
+    """Seconds before attempt ``attempts + 1``, doubling up to a ceiling"""
+    delay = getattr(settings, "EMAIL_OUTBOX_RETRY_DELAY", 60) * 2 ** (attempts - 1)
+    return min(delay, getattr(settings, "EMAIL_OUTBOX_RETRY_MAX_DELAY", 3600))
+
+
+def claim_messages(batch_size):
+    """Take the next due messages for EMAIL_OUTBOX_LEASE seconds.
+
+    Other workers skip them until the lease runs out, which is also how the
+    messages of a worker that died are retried.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, "EMAIL_OUTBOX_LEASE", 300))
+    outbox = OutboxEmail.objects.using(DEFAULT_DB_ALIAS)
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        ids = list(
+            outbox.select_for_update(skip_locked=True)
+            .filter(state=OutboxEmail.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        outbox.filter(id__in=ids).update(
+            attempts=F("attempts") + 1, next_attempt_at=now + lease
+        )
+    return list(outbox.filter(id__in=ids).order_by("id"))
+
+
+def send_queued_messages(batch_size=100):
+    """Deliver one batch of due messages over a single connection.
+
+    Returns the (sent, retried, failed) counts.
+    """
+    messages = claim_messages(batch_size)
+    if not messages:
+        return 0, 0, 0
+
+    outbox = OutboxEmail.objects.using(DEFAULT_DB_ALIAS)
+    max_attempts = getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+    sent, retried, failed = [], 0, 0
+    connection = get_connection(
+        getattr(
+            settings,
+            "EMAIL_OUTBOX_BACKEND",
+            "django.core.mail.backends.smtp.EmailBackend",
+        )
+    )
+    try:
+        for outbox_email in messages:
+            try:
+                connection.open()
+                connection.send_messages(
+                    [deserialize_message(outbox_email.message, connection)]
+                )
+            except Exception as exc:
+                logger.warning(
+                    "Could not send queued email %s", outbox_email.pk, exc_info=True
+                )
+                # The server may have dropped us, the next message reconnects.
+                connection.close()
+                changes = {"last_error": f"{type(exc).__name__}: {exc}"}
+                if outbox_email.attempts >= max_attempts:
+                    changes["state"] = OutboxEmail.FAILED
+                    failed += 1
+                else:
+                    delay = get_retry_delay(outbox_email.attempts)
+                    changes["next_attempt_at"] = timezone.now() + timedelta(
+                        seconds=delay
+                    )
+                    retried += 1
+                outbox.filter(pk=outbox_email.pk).update(**changes)
+            else:
+                sent.append(outbox_email.pk)
+    finally:
+        connection.close()
+        outbox.filter(pk__in=sent).delete()
+    return len(sent), retried, failed
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts.mail import send_queued_messages
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends the messages queued by OutboxEmailBackend through "
+        "EMAIL_OUTBOX_BACKEND, a batch per connection. Failures are retried "
+        "with exponential backoff up to EMAIL_OUTBOX_MAX_ATTEMPTS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the outbox instead of stopping once it is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between polls of an empty outbox with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        totals = [0, 0, 0]
+        while True:
+            counts = send_queued_messages(options["batch_size"])
+            totals = [total + count for total, count in zip(totals, counts)]
+            if not any(counts):
+                if not options["loop"]:
+                    break
+                # As between requests, drop connections past CONN_MAX_AGE.
+                close_old_connections()
+                time.sleep(options["interval"])
+        sent, retried, failed = totals
+        self.stdout.write(f"Sent {sent} messages, {retried} to retry, {failed} failed.")
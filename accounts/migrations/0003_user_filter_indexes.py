@@ -0,0 +1,22 @@
+# Generated by Django 4.1.6 on 2026-10-18 16:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0002_outbox_email"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(fields=["is_staff", "username"], name="user_staff_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(
+                fields=["is_active", "username"], name="user_active_idx"
+            ),
+        ),
+    ]
@@ -1,7 +1,50 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 # Create your models here.
 class CustomUser(AbstractUser):
     name = models.CharField(null=True, blank=True, max_length=100)
+
+    class Meta(AbstractUser.Meta):
+        # The admin's list filters, with the username keyset order.
+        indexes = [
+            models.Index(fields=["is_staff", "username"], name="user_staff_idx"),
+            models.Index(fields=["is_active", "username"], name="user_active_idx"),
+        ]
+
+
+class OutboxEmail(models.Model):
+    """A message queued by accounts.mail.OutboxEmailBackend.
+
+    The send_queued_email command delivers it through EMAIL_OUTBOX_BACKEND
+    and deletes it; a message still failing after EMAIL_OUTBOX_MAX_ATTEMPTS
+    is kept as failed, with the last error.
+    """
+
+    PENDING = "pending"
+    FAILED = "failed"
+    STATES = [(PENDING, "Pending"), (FAILED, "Failed")]
+
+    # EmailMessage attributes, see accounts.mail.serialize_message.
+    message = models.JSONField()
+    subject = models.CharField(max_length=255, blank=True)
+    recipients = models.TextField(blank=True)
+    state = models.CharField(max_length=16, choices=STATES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # A worker that claims the message pushes this back by its lease.
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["state", "next_attempt_at", "id"],
+                name="outbox_email_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipients}"
@@ -0,0 +1,129 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.admin import CustomUserAdmin
+from tasks.admin import CustomTaskModelAdmin
+from tasks.models import TaskModel
+
+MyUser = get_user_model()
+
+
+# The admin templates need no collected static files.
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+class ScalableAdminTest(TestCase):
+    """Task and user changelists join, estimate counts and page by keyset"""
+
+    def setUp(self) -> None:
+        self.admin = MyUser.objects.create_superuser(
+            username="admin@gmail.com", email="admin@gmail.com", password="admin"
+        )
+        self.client.force_login(self.admin)
+        self.users = [
+            MyUser.objects.create(username=f"user{number}@gmail.com")
+            for number in range(3)
+        ]
+        self.url = reverse("admin:tasks_taskmodel_changelist")
+
+    def add_tasks(self, count):
+        for number in range(count):
+            user = self.users[number % len(self.users)]
+            TaskModel.objects.create(user=user, title=f"task {number}")
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, [query["sql"] for query in queries.captured_queries]
+
+    def walk(self, url, params=None):
+        """The rows of every page, following the next page links"""
+        pages = []
+        response, _ = self.get(url, params)
+        while True:
+            changelist = response.context["cl"]
+            pages.append([obj.pk for obj in changelist.result_list])
+            if changelist.next_url is None:
+                return pages
+            response, _ = self.get(url + changelist.next_url)
+
+    def test_users_are_joined(self):
+        self.add_tasks(3)
+        _, few = self.get(self.url)
+        self.add_tasks(12)
+        response, many = self.get(self.url)
+        self.assertEqual(len(few), len(many))
+        self.assertContains(response, f'<a href="?user={self.users[0].pk}">')
+
+    def test_estimated_count(self):
+        self.add_tasks(3)
+        with mock.patch("tasks.changelist.estimate_row_count", return_value=10**6):
+            response, queries = self.get(self.url)
+            self.assertContains(response, "1000000 task models")
+            self.assertFalse(any("COUNT(" in sql for sql in queries))
+
+            # A filtered list is counted.
+            response, queries = self.get(self.url, {"user": self.users[0].pk})
+            self.assertContains(response, "1 task model")
+            self.assertTrue(any("COUNT(" in sql for sql in queries))
+
+    @mock.patch.object(CustomTaskModelAdmin, "list_per_page", 4)
+    def test_keyset_pages(self):
+        self.add_tasks(10)
+        ids = list(TaskModel.objects.order_by("-id").values_list("id", flat=True))
+        pages = self.walk(self.url)
+        self.assertEqual(pages, [ids[:4], ids[4:8], ids[8:]])
+
+        response, _ = self.get(self.url)
+        _, queries = self.get(self.url + response.context["cl"].next_url)
+        self.assertFalse(any("OFFSET" in sql for sql in queries))
+
+    @mock.patch.object(CustomTaskModelAdmin, "list_per_page", 2)
+    def test_keyset_pages_keep_filters_and_search(self):
+        self.add_tasks(9)
+        user = self.users[1]
+        ids = list(
+            TaskModel.objects.filter(user=user)
+            .order_by("-id")
+            .values_list("id", flat=True)
+        )
+        self.assertEqual(self.walk(self.url, {"user": user.pk}), [ids[:2], ids[2:]])
+
+        TaskModel.objects.create(user=user, title="other title")
+        pages = self.walk(self.url, {"q": '"task 1"'})
+        self.assertEqual(
+            pages,
+            [
+                list(
+                    TaskModel.objects.filter(title="task 1").values_list(
+                        "id", flat=True
+                    )
+                )
+            ],
+        )
+
+    @override_settings(ADMIN_MAX_OFFSET_PAGE=2)
+    @mock.patch.object(CustomTaskModelAdmin, "list_per_page", 2)
+    def test_deep_and_invalid_pages(self):
+        self.add_tasks(10)
+        self.assertEqual(self.client.get(self.url, {"p": 2}).status_code, 200)
+        for params in ({"p": 3}, {"after": "garbage"}):
+            response = self.client.get(self.url, params)
+            self.assertRedirects(response, self.url + "?e=1")
+
+    @mock.patch.object(CustomUserAdmin, "list_per_page", 2)
+    def test_user_keyset_pages(self):
+        url = reverse("admin:accounts_customuser_changelist")
+        usernames = sorted(
+            MyUser.objects.values_list("pk", "username"), key=lambda u: u[1]
+        )
+        self.assertEqual(
+            self.walk(url),
+            [[pk for pk, _ in usernames[:2]], [pk for pk, _ in usernames[2:]]],
+        )
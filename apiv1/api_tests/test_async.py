@@ -0,0 +1,131 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskModel
+
+from apiv1.authentication import clear_token_cache
+from apiv1.cache import get_cache
+
+MyUser = get_user_model()
+
+
+class AsyncTaskViewTest(APITestCase):
+    """The async endpoints answer exactly like TaskModelViewSet"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        clear_token_cache()
+        self.test_user = MyUser.objects.create(
+            username="async@gmail.com", email="async@gmail.com", password="async"
+        )
+        self.auth = f"Token {Token.objects.create(user=self.test_user).key}"
+        self.client = APIClient()
+        self.async_client = AsyncClient()
+        self.task = TaskModel.objects.create(
+            user=self.test_user, title="first", description="first"
+        )
+        TaskModel.objects.create(
+            user=self.test_user, title="second", description="second"
+        )
+
+    def request(self, method, url, data=None, auth=None, **headers):
+        # AsyncClient only sends headers given as lowercase request extras.
+        headers["authorization"] = auth or self.auth
+        if method == "get":
+            return self.async_client.get(url, data, **headers)
+        return getattr(self.async_client, method)(
+            url, data or {}, content_type="application/json", **headers
+        )
+
+    async def assert_same(self, method, name, kwargs=None, data=None, auth=None):
+        response = await self.request(
+            method, reverse(f"async-tasks-{name}", kwargs=kwargs), data, auth
+        )
+        expected = await sync_to_async(getattr(self.client, method))(
+            reverse(f"tasks-{name}", kwargs=kwargs),
+            data,
+            format="json",
+            HTTP_AUTHORIZATION=auth or self.auth,
+        )
+        self.assertEqual(response.status_code, expected.status_code)
+        # Page links differ only by the endpoint path.
+        content = response.content.replace(b"/async/tasks/", b"/tasks/")
+        self.assertEqual(content, expected.content)
+
+    async def test_list_and_retrieve(self):
+        await self.assert_same("get", "list")
+        await self.assert_same("get", "list", data={"page_size": 1})
+        await self.assert_same("get", "list", data={"search": "second"})
+        await self.assert_same("get", "detail", {"pk": self.task.pk})
+        await self.assert_same("get", "detail", {"pk": 999})
+
+    async def test_sparse_fields(self):
+        for data in ({"fields": "id,title"}, {"exclude": "description,user"}):
+            await self.assert_same("get", "list", data=data)
+            await self.assert_same("get", "list", data={**data, "page_size": 1})
+            await self.assert_same("get", "detail", {"pk": self.task.pk}, data)
+        await self.assert_same("get", "list", data={"fields": "title,nope"})
+        response = await self.request(
+            "get", reverse("async-tasks-list"), {"fields": "title"}
+        )
+        self.assertEqual(response.json()["results"][0], {"title": "first"})
+
+    async def test_conditional_get(self):
+        url = reverse("async-tasks-detail", kwargs={"pk": self.task.pk})
+        response = await self.request("get", url)
+        self.assertIn("Last-Modified", response)
+        response = await self.request("get", url, **{"if-none-match": response["ETag"]})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_create_update_delete(self):
+        url = reverse("async-tasks-list")
+        response = await self.request("post", url, {"title": "new", "description": "x"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["user"], self.test_user.pk)
+        await self.assert_same("post", "list", data={"title": ""})
+
+        detail = reverse("async-tasks-detail", kwargs={"pk": response.json()["id"]})
+        response = await self.request("patch", detail, {"title": "renamed"})
+        self.assertEqual(response.json()["title"], "renamed")
+        response = await self.request("put", detail, {"title": "only title"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = await self.request("delete", detail)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await TaskModel.objects.filter(title="renamed").aexists())
+
+    async def test_authentication_and_ownership(self):
+        await self.assert_same("get", "list", auth="Basic")
+        await self.assert_same("get", "list", auth="Token nope")
+
+        other_user = await MyUser.objects.acreate(
+            username="other@gmail.com", email="other@gmail.com"
+        )
+        other_task = await TaskModel.objects.acreate(
+            user=other_user, title="other", description="other"
+        )
+        await self.assert_same("delete", "detail", {"pk": other_task.pk})
+        self.assertTrue(await TaskModel.objects.filter(pk=other_task.pk).aexists())
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "tasks_api_cache",
+        }
+    }
+)
+class AsyncDatabaseCacheTest(AsyncTaskViewTest):
+    """The same answers with a cache backend that queries the database"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command("createcachetable", verbosity=0)
@@ -0,0 +1,120 @@
+import base64
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from apiv1.authentication import basic_auth_stats, clear_token_cache
+from apiv1.cache import get_cache
+
+MyUser = get_user_model()
+
+
+class CachedTokenAuthenticationTest(APITestCase):
+    """Token resolution is cached and dropped when the token goes away"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        clear_token_cache()
+        self.test_user = MyUser.objects.create_user(
+            username="token@gmail.com", email="token@gmail.com", password="tokenpass"
+        )
+        self.token = Token.objects.create(user=self.test_user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        self.url = reverse("tasks-list")
+
+    def test_steady_state_has_no_auth_query(self):
+        """A repeated request with the same token runs no SQL at all"""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_shared_cache_is_used_after_local_eviction(self):
+        """A fresh process still skips the token query"""
+        self.client.get(self.url)
+        clear_token_cache()
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_logout_revokes_immediately(self):
+        self.client.get(self.url)
+        response = self.client.post(reverse("rest_logout"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_deletion_revokes_immediately(self):
+        self.client.get(self.url)
+        self.token.delete()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_revokes_immediately(self):
+        self.client.get(self.url)
+        self.test_user.is_active = False
+        self.test_user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CachedBasicAuthenticationTest(APITestCase):
+    """Basic credentials are hashed once and then served from the cache"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.test_user = MyUser.objects.create_user(
+            username="basic@gmail.com", email="basic@gmail.com", password="basicpass"
+        )
+        self.client = APIClient()
+        self.url = reverse("tasks-list")
+
+    def basic(self, password="basicpass"):
+        credentials = f"{self.test_user.username}:{password}".encode()
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Basic " + base64.b64encode(credentials).decode()
+        )
+
+    def test_password_is_hashed_once(self):
+        self.basic()
+        hashes = basic_auth_stats["hashes"]
+        for _ in range(3):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.assertEqual(basic_auth_stats["hashes"], hashes + 1)
+
+    def test_wrong_password_is_not_cached(self):
+        self.basic()
+        self.client.get(self.url)
+        self.basic("wrongpass")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_drops_cached_credentials(self):
+        self.basic()
+        self.client.get(self.url)
+        self.test_user.set_password("otherpass")
+        self.test_user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(BASIC_AUTH_RATE_LIMIT=3, BASIC_AUTH_RATE_WINDOW=60)
+    def test_hashing_is_limited_per_account(self):
+        self.basic("wrongpass")
+        with mock.patch("time.time", return_value=6000.0):
+            codes = [self.client.get(self.url).status_code for _ in range(4)]
+        self.assertEqual(codes[:3], [status.HTTP_401_UNAUTHORIZED] * 3)
+        self.assertEqual(codes[3], status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # The next window starts over, whatever the cache does with expiry.
+        with mock.patch("time.time", return_value=6060.0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,110 @@
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskModel
+
+from apiv1.cache import get_cache
+from apiv1.checks import check_shared_caches
+
+MyUser = get_user_model()
+
+
+class TaskResponseCacheTest(APITestCase):
+    """Per-user cache of task list and detail responses"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.test_user = MyUser.objects.create(
+            username="cache@gmail.com", email="cache@gmail.com", password="cache"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.test_user)
+        self.task = TaskModel.objects.create(
+            user=self.test_user, title="title", description="description"
+        )
+        self.list_url = reverse("tasks-list")
+        self.detail_url = reverse("tasks-detail", args=[self.task.id])
+
+    def test_repeat_reads_do_no_sql(self):
+        """A second read of unchanged data is served from the cache"""
+        for url in (self.list_url, self.detail_url):
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(second.status_code, status.HTTP_200_OK)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_cached_not_modified(self):
+        """A matching ETag is answered from the cache without SQL"""
+        etag = self.client.get(self.list_url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_save_and_delete_invalidate(self):
+        """Model saves and deletes drop the user's cached responses"""
+        self.client.get(self.list_url)
+        self.task.title = "edited"
+        self.task.save()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.data["results"][0]["title"], "edited")
+
+        self.task.delete()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.data["results"], [])
+
+    def test_bulk_operations_invalidate(self):
+        """Bulk writes drop the user's cached responses"""
+        self.client.get(self.list_url)
+        data = [{"title": "bulk", "description": "bulk"}]
+        self.client.post(reverse("tasks-bulk"), data, format="json")
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_users_do_not_share_entries(self):
+        """Another user never sees a cached response of the first"""
+        self.client.get(self.list_url)
+        other_user = MyUser.objects.create(
+            username="other@gmail.com", email="other@gmail.com", password="other"
+        )
+        self.client.force_authenticate(other_user)
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.data["results"], [])
+
+    def test_stats(self):
+        """Admins can read the hit and miss counters"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # A fresh metrics store, which holds the counters.
+        metrics_dir = override_settings(METRICS_DIR=directory.name)
+        metrics_dir.enable()
+        self.addCleanup(metrics_dir.disable)
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+        self.test_user.is_staff = True
+        self.test_user.save()
+
+        response = self.client.get(reverse("cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"hits": 1, "misses": 1, "hit_ratio": 0.5})
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    """Process-local caches for cross-worker state are reported"""
+
+    def test_locmem_is_reported(self):
+        local = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        shared = {"BACKEND": "django.core.cache.backends.redis.RedisCache"}
+        with override_settings(CACHES={"default": shared, "local": local}):
+            self.assertEqual(check_shared_caches(None), [])
+            with override_settings(TASKS_CACHE_ALIAS="local"):
+                (warning,) = check_shared_caches(None)
+        self.assertEqual((warning.id, warning.obj), ("apiv1.W001", "local"))
@@ -0,0 +1,143 @@
+import io
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskChange, TaskModel
+
+from apiv1.cache import get_cache
+from apiv1.changes import encode_cursor
+
+MyUser = get_user_model()
+
+
+@override_settings(TASKS_CHANGES_SAFETY_WINDOW=0)
+class TaskChangesTest(APITestCase):
+    """Delta sync through the task change log"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.test_user = MyUser.objects.create(
+            username="sync@gmail.com", email="sync@gmail.com", password="sync"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.test_user)
+        self.url = reverse("tasks-changes")
+        self.first = TaskModel.objects.create(
+            user=self.test_user, title="first", description="first"
+        )
+        self.second = TaskModel.objects.create(
+            user=self.test_user, title="second", description="second"
+        )
+
+    def sync(self, cursor=None, **params):
+        if cursor is not None:
+            params["since"] = cursor
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_full_sync_without_cursor(self):
+        data = self.sync()
+        self.assertEqual(
+            [task["id"] for task in data["changes"]], [self.first.id, self.second.id]
+        )
+        self.assertEqual(data["deleted"], [])
+        self.assertFalse(data["has_more"])
+
+    def test_only_changes_since_cursor(self):
+        cursor = self.sync()["cursor"]
+        self.assertEqual(self.sync(cursor)["changes"], [])
+
+        self.second.title = "second, edited"
+        self.second.save()
+        first_id = self.first.id
+        self.first.delete()
+        data = self.sync(cursor)
+        self.assertEqual(
+            [task["title"] for task in data["changes"]], ["second, edited"]
+        )
+        self.assertEqual(data["deleted"], [first_id])
+
+        self.assertEqual(self.sync(data["cursor"])["deleted"], [])
+
+    def test_bulk_writes_are_logged(self):
+        cursor = self.sync()["cursor"]
+        self.client.post(
+            reverse("tasks-bulk"),
+            [{"title": "new", "description": "new"}],
+            format="json",
+        )
+        self.client.delete(reverse("tasks-bulk"), [self.first.id], format="json")
+        data = self.sync(cursor)
+        self.assertEqual([task["title"] for task in data["changes"]], ["new"])
+        self.assertEqual(data["deleted"], [self.first.id])
+
+    def test_paged_with_has_more(self):
+        data = self.sync(page_size=1)
+        self.assertEqual([task["id"] for task in data["changes"]], [self.first.id])
+        self.assertTrue(data["has_more"])
+        data = self.sync(data["cursor"], page_size=1)
+        self.assertEqual([task["id"] for task in data["changes"]], [self.second.id])
+
+    @override_settings(TASKS_CHANGES_SAFETY_WINDOW=60)
+    def test_late_commits_are_not_skipped(self):
+        """Rows may commit below rows already read, the cursor waits for them"""
+        TaskChange.objects.update(changed_at=timezone.now() - timedelta(minutes=5))
+        late = TaskModel.objects.create(
+            user=self.test_user, title="late", description="late"
+        )
+        third = TaskModel.objects.create(
+            user=self.test_user, title="third", description="third"
+        )
+        # As if the transaction that wrote ``late`` had not committed yet.
+        late_change = TaskChange.objects.get(task_id=late.id)
+        TaskChange.objects.filter(pk=late_change.pk).delete()
+
+        data = self.sync()
+        self.assertEqual(
+            [task["id"] for task in data["changes"]],
+            [self.first.id, self.second.id, third.id],
+        )
+        self.assertFalse(data["has_more"])
+
+        late_change.save(force_insert=True)
+        data = self.sync(data["cursor"])
+        self.assertEqual([task["id"] for task in data["changes"]], [late.id, third.id])
+
+    def test_scoped_to_user(self):
+        other_user = MyUser.objects.create(
+            username="other@gmail.com", email="other@gmail.com", password="other"
+        )
+        TaskModel.objects.create(user=other_user, title="other", description="other")
+        self.assertEqual(len(self.sync()["changes"]), 2)
+
+    def test_invalid_and_expired_cursors(self):
+        response = self.client.get(self.url, {"since": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        expired = encode_cursor(0, timezone.now() - timedelta(days=365), "default")
+        response = self.client.get(self.url, {"since": expired})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_compaction(self):
+        cursor = self.sync()["cursor"]
+        self.first.save()
+        second_id = self.second.id
+        self.second.delete()
+        call_command("compact_task_changes", batch_size=1, stdout=io.StringIO())
+        self.assertEqual(
+            list(TaskChange.objects.values_list("task_id", "deleted")),
+            [(self.first.id, False), (second_id, True)],
+        )
+        self.assertEqual(self.sync(cursor)["deleted"], [second_id])
+
+        call_command("compact_task_changes", retention=0, stdout=io.StringIO())
+        self.assertFalse(TaskChange.objects.filter(deleted=True).exists())
+        self.assertEqual(len(self.sync()["changes"]), 1)
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskModel, TaskUserStats
+
+from apiv1.cache import get_cache
+
+MyUser = get_user_model()
+
+
+class TaskConditionalGetTest(APITestCase):
+    """ETag and Last-Modified validators on task list and detail"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.test_user = MyUser.objects.create(
+            username="etag@gmail.com", email="etag@gmail.com", password="etag"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.test_user)
+        self.task = TaskModel.objects.create(
+            user=self.test_user, title="title", description="description"
+        )
+
+    def test_list_not_modified(self):
+        """Sending back the ETag gets a 304 from a single query"""
+        url = reverse("tasks-list")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        get_cache().clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_list_etag_changes(self):
+        """Creating, editing or deleting a task changes the list ETag"""
+        url = reverse("tasks-list")
+        etags = [self.client.get(url)["ETag"]]
+
+        other = TaskModel.objects.create(
+            user=self.test_user, title="other", description="other"
+        )
+        etags.append(self.client.get(url)["ETag"])
+        self.task.title = "edited"
+        self.task.save()
+        etags.append(self.client.get(url)["ETag"])
+        other.delete()
+        etags.append(self.client.get(url)["ETag"])
+
+        self.assertEqual(len(set(etags)), 4)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[0])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_validators_read_the_stats_row(self):
+        """Lists are validated by the user's stats row, not an aggregate"""
+        url = reverse("tasks-list")
+        etag = self.client.get(url)["ETag"]
+
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        (query,) = queries
+        self.assertIn(TaskUserStats._meta.db_table, query["sql"])
+
+        data = [{"id": self.task.id, "title": "bulk"}]
+        self.client.patch(reverse("tasks-bulk"), data, format="json")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["title"], "bulk")
+
+    def test_detail_if_modified_since(self):
+        """The detail Last-Modified is honoured by If-Modified-Since"""
+        url = reverse("tasks-detail", args=[self.task.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_of_other_user_is_not_found(self):
+        """Validators do not leak other users' tasks"""
+        other_user = MyUser.objects.create(
+            username="other@gmail.com", email="other@gmail.com", password="other"
+        )
+        task = TaskModel.objects.create(user=other_user, title="t", description="d")
+
+        response = self.client.get(reverse("tasks-detail", args=[task.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("ETag", response)
@@ -0,0 +1,157 @@
+import io
+import os
+import tempfile
+from datetime import timedelta
+from email.mime.application import MIMEApplication
+from email.mime.base import MIMEBase
+from smtplib import SMTPServerDisconnected
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from accounts.models import OutboxEmail
+
+MyUser = get_user_model()
+
+LOCMEM = "django.core.mail.backends.locmem.EmailBackend"
+
+
+def send_queued(*args):
+    out = io.StringIO()
+    call_command("send_queued_email", *args, stdout=out)
+    return out.getvalue()
+
+
+@override_settings(
+    EMAIL_BACKEND="accounts.mail.OutboxEmailBackend",
+    EMAIL_OUTBOX_BACKEND=LOCMEM,
+    EMAIL_OUTBOX_RETRY_DELAY=60,
+    EMAIL_OUTBOX_RETRY_MAX_DELAY=3600,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+)
+class EmailOutboxTest(APITestCase):
+    """Mail is queued by the request and sent by send_queued_email"""
+
+    def test_password_reset_is_queued(self):
+        MyUser.objects.create_user(
+            username="reset@gmail.com", email="reset@gmail.com", password="resetpass"
+        )
+        response = APIClient().post(
+            reverse("rest_password_reset"), {"email": "reset@gmail.com"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutboxEmail.objects.get().recipients, "reset@gmail.com")
+
+        self.assertEqual(send_queued(), "Sent 1 messages, 0 to retry, 0 failed.\n")
+        self.assertEqual(mail.outbox[0].to, ["reset@gmail.com"])
+        self.assertIn("password-reset/confirm/", mail.outbox[0].body)
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_message_round_trip(self):
+        message = mail.EmailMultiAlternatives(
+            "Subject",
+            "Body",
+            "from@gmail.com",
+            ["to@gmail.com"],
+            cc=["cc@gmail.com"],
+            bcc=["bcc@gmail.com"],
+            reply_to=["reply@gmail.com"],
+            headers={"X-Tag": "outbox"},
+        )
+        message.attach_alternative("<p>Body</p>", "text/html")
+        message.attach("notes.txt", "some notes", "text/plain")
+        message.attach("data.bin", b"\x00\xff", "application/octet-stream")
+        message.send()
+        send_queued()
+
+        sent = mail.outbox[0]
+        for name in ("subject", "body", "from_email", "to", "cc", "bcc", "reply_to"):
+            self.assertEqual(getattr(sent, name), getattr(message, name), name)
+        self.assertEqual(sent.extra_headers, {"X-Tag": "outbox"})
+        self.assertEqual(sent.alternatives, [("<p>Body</p>", "text/html")])
+        self.assertEqual(sent.attachments, message.attachments)
+
+    def test_mime_attachment_round_trip(self):
+        part = MIMEApplication(b"%PDF-1.4 \x00\xff", "pdf")
+        part.add_header("Content-Disposition", "attachment", filename="report.pdf")
+        part.add_header("Content-ID", "<report>")
+        message = mail.EmailMessage("Subject", "Body", None, ["to@gmail.com"])
+        message.attach(part)
+        message.send()
+        self.assertEqual(send_queued(), "Sent 1 messages, 0 to retry, 0 failed.\n")
+
+        (sent,) = mail.outbox[0].attachments
+        self.assertIsInstance(sent, MIMEBase)
+        self.assertEqual(sent.get_content_type(), "application/pdf")
+        self.assertEqual(sent.get_filename(), "report.pdf")
+        self.assertEqual(sent["Content-ID"], "<report>")
+        self.assertEqual(sent.get_payload(decode=True), b"%PDF-1.4 \x00\xff")
+        self.assertIn(b"report.pdf", mail.outbox[0].message().as_bytes())
+
+    def test_rolled_back_mail_is_not_sent(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                mail.send_mail("Subject", "Body", None, ["to@gmail.com"])
+                raise ValueError()
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_retries_with_backoff_then_fails(self):
+        mail.send_mail("Subject", "Body", None, ["to@gmail.com"])
+        with mock.patch(
+            f"{LOCMEM}.send_messages", side_effect=SMTPServerDisconnected("gone")
+        ), self.assertLogs("accounts.mail", "WARNING"):
+            for attempt, delay in ((1, 60), (2, 120)):
+                before = timezone.now()
+                self.assertEqual(
+                    send_queued(), "Sent 0 messages, 1 to retry, 0 failed.\n"
+                )
+                queued = OutboxEmail.objects.get()
+                self.assertEqual(queued.attempts, attempt)
+                self.assertEqual(queued.last_error, "SMTPServerDisconnected: gone")
+                self.assertGreaterEqual(
+                    queued.next_attempt_at, before + timedelta(seconds=delay)
+                )
+                # Not due yet.
+                self.assertEqual(
+                    send_queued(), "Sent 0 messages, 0 to retry, 0 failed.\n"
+                )
+                OutboxEmail.objects.update(next_attempt_at=timezone.now())
+
+            self.assertEqual(send_queued(), "Sent 0 messages, 0 to retry, 1 failed.\n")
+        self.assertEqual(OutboxEmail.objects.get().state, OutboxEmail.FAILED)
+        self.assertEqual(send_queued(), "Sent 0 messages, 0 to retry, 0 failed.\n")
+        self.assertEqual(mail.outbox, [])
+
+    def test_expired_lease_is_taken_again(self):
+        mail.send_mail("Subject", "Body", None, ["to@gmail.com"])
+        # As left by a worker that died while sending.
+        OutboxEmail.objects.update(
+            attempts=1, next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(send_queued(), "Sent 1 messages, 0 to retry, 0 failed.\n")
+
+    def test_batch_shares_one_connection(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for number in range(3):
+            mail.send_mail(f"Subject {number}", "Body", None, ["to@gmail.com"])
+
+        with override_settings(
+            EMAIL_OUTBOX_BACKEND="django.core.mail.backends.filebased.EmailBackend",
+            EMAIL_FILE_PATH=directory.name,
+        ):
+            output = send_queued("--batch-size", "3")
+        self.assertEqual(output, "Sent 3 messages, 0 to retry, 0 failed.\n")
+        # The file backend writes a file per connection.
+        (name,) = os.listdir(directory.name)
+        with open(os.path.join(directory.name, name)) as file:
+            self.assertEqual(file.read().count("Subject: Subject"), 3)
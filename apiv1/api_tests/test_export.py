@@ -0,0 +1,90 @@
+import csv
+import gzip
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskModel
+
+from apiv1.export import accepts_gzip
+from apiv1.serializers import TaskModelSerializer
+
+MyUser = get_user_model()
+
+
+@override_settings(TASKS_EXPORT_CHUNK_SIZE=2)
+class TaskExportTest(APITestCase):
+    """Streaming export of the user's tasks"""
+
+    def setUp(self) -> None:
+        self.test_user = MyUser.objects.create(
+            username="export@gmail.com", email="export@gmail.com", password="export"
+        )
+        other_user = MyUser.objects.create(
+            username="other@gmail.com", email="other@gmail.com", password="other"
+        )
+        TaskModel.objects.create(user=other_user, title="hidden", description="x")
+        for i in range(5):
+            TaskModel.objects.create(
+                user=self.test_user, title=f"task {i}, ñ", description=f"line\n{i}"
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.test_user)
+        self.url = reverse("tasks-export")
+        self.expected = TaskModelSerializer(
+            TaskModel.objects.filter(user=self.test_user), many=True
+        ).data
+
+    def test_ndjson(self):
+        response = self.client.get(self.url, {"format": "ndjson"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response["Content-Type"].startswith("application/x-ndjson"))
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.expected)
+
+    def test_csv(self):
+        response = self.client.get(self.url, {"format": "csv"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(
+            [row["title"] for row in rows], [item["title"] for item in self.expected]
+        )
+        self.assertEqual(rows[0]["description"], "line\n0")
+
+    def test_gzip(self):
+        response = self.client.get(
+            self.url, {"format": "ndjson"}, HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        content = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(len(content.decode().splitlines()), 5)
+
+    def test_gzip_refused(self):
+        for header in ("gzip;q=0", "br, gzip; q=0.0", "*;q=0", "identity"):
+            response = self.client.get(
+                self.url, {"format": "ndjson"}, HTTP_ACCEPT_ENCODING=header
+            )
+            self.assertNotIn("Content-Encoding", response, header)
+            content = b"".join(response.streaming_content)
+            self.assertEqual(len(content.decode().splitlines()), 5, header)
+
+    def test_accepts_gzip(self):
+        for header in ("gzip;q=0.5", "br, GZIP", "*", "gzip;q=1, *;q=0"):
+            self.assertTrue(accepts_gzip(header), header)
+        self.assertFalse(accepts_gzip(""))
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(self.url, {"format": "ndjson"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
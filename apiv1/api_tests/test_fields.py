@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskModel
+
+from apiv1.cache import get_cache
+
+MyUser = get_user_model()
+
+DESCRIPTION_COLUMN = '"tasks_taskmodel"."description"'
+
+
+class SparseFieldsTest(APITestCase):
+    """?fields= and ?exclude= trim the payload and the selected columns"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.test_user = MyUser.objects.create(
+            username="fields@gmail.com", email="fields@gmail.com", password="fields"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.test_user)
+        self.tasks = [
+            TaskModel.objects.create(
+                user=self.test_user, title=f"title {number}", description="x" * 1000
+            )
+            for number in range(3)
+        ]
+        self.list_url = reverse("tasks-list")
+        self.detail_url = reverse("tasks-detail", kwargs={"pk": self.tasks[0].pk})
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = "\n".join(query["sql"] for query in queries.captured_queries)
+        return response, sql
+
+    def test_list_fields(self):
+        response, sql = self.get(self.list_url, {"fields": "id,title", "page_size": 2})
+        self.assertEqual(
+            response.data["results"],
+            [{"id": task.id, "title": task.title} for task in self.tasks[:2]],
+        )
+        self.assertNotIn(DESCRIPTION_COLUMN, sql)
+
+        # The cursor still pages through the columns that were not asked for.
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            response.data["results"], [{"id": self.tasks[2].id, "title": "title 2"}]
+        )
+
+    def test_list_exclude(self):
+        response, sql = self.get(self.list_url, {"exclude": "description"})
+        self.assertEqual(
+            set(response.data["results"][0]),
+            {"id", "title", "user", "created_at", "updated_at"},
+        )
+        self.assertNotIn(DESCRIPTION_COLUMN, sql)
+
+    def test_retrieve_fields(self):
+        response, sql = self.get(self.detail_url, {"fields": "title"})
+        self.assertEqual(response.data, {"title": "title 0"})
+        self.assertNotIn(DESCRIPTION_COLUMN, sql)
+
+    def test_search_and_changes_fields(self):
+        response, _ = self.get(self.list_url, {"search": "title", "fields": "id"})
+        self.assertEqual(
+            sorted(response.data["results"], key=lambda item: item["id"]),
+            [{"id": task.id} for task in self.tasks],
+        )
+        response, sql = self.get(
+            reverse("tasks-changes"), {"exclude": "description,user"}
+        )
+        self.assertNotIn("description", response.data["changes"][0])
+        self.assertNotIn(DESCRIPTION_COLUMN, sql)
+
+    def test_responses_are_cached_per_field_set(self):
+        self.client.get(self.detail_url, {"fields": "id"})
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.data["description"], "x" * 1000)
+
+    def test_unknown_fields(self):
+        response = self.client.get(
+            self.list_url, {"fields": "title,secret", "exclude": "password"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data,
+            {
+                "fields": ['"secret" is not a valid field.'],
+                "exclude": ['"password" is not a valid field.'],
+            },
+        )
+
+    def test_writes_return_every_field(self):
+        response = self.client.patch(
+            f"{self.detail_url}?fields=id", {"title": "patched"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "patched")
+        self.assertIn("description", response.data)
@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskModel
+
+MyUser = get_user_model()
+
+
+@override_settings(TASKS_IMPORT_CHUNK_SIZE=2)
+class TaskImportTest(APITestCase):
+    """Chunked import of NDJSON and CSV uploads"""
+
+    def setUp(self) -> None:
+        self.test_user = MyUser.objects.create(
+            username="import@gmail.com", email="import@gmail.com", password="import"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.test_user)
+        self.url = reverse("tasks-import-file")
+
+    def upload(self, name, content, **data):
+        if isinstance(content, str):
+            content = content.encode()
+        upload = SimpleUploadedFile(name, content)
+        return self.client.post(self.url, {"file": upload, **data}, format="multipart")
+
+    def test_ndjson_with_bad_rows(self):
+        """Bad rows are reported and the good ones are still imported"""
+        lines = [
+            json.dumps({"title": "one", "description": "first"}),
+            "{not json",
+            json.dumps({"title": "two"}),
+            "",
+            json.dumps({"title": "three", "description": "third"}),
+            json.dumps({"title": "four", "description": "fourth"}),
+        ]
+        response = self.upload("tasks.ndjson", "\n".join(lines))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual(response.data["failed"], 2)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [2, 3])
+        self.assertEqual(
+            response.data["errors"][1]["errors"],
+            {"description": ["This field is required."]},
+        )
+        self.assertEqual(
+            list(
+                TaskModel.objects.filter(user=self.test_user).values_list(
+                    "title", flat=True
+                )
+            ),
+            ["one", "three", "four"],
+        )
+
+    def test_csv(self):
+        content = "title,description\nfirst,one\n,missing title\nsecond,two\n"
+        response = self.upload("tasks.csv", content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["errors"][0]["row"], 3)
+
+    def test_invalid_bytes(self):
+        """A line that is not UTF-8 fails its own row only"""
+        content = b"\n".join(
+            [
+                json.dumps({"title": "one", "description": "first"}).encode(),
+                b'{"title": "\xff\xfe", "description": "bad"}',
+                json.dumps({"title": "two", "description": "second"}).encode(),
+            ]
+        )
+        response = self.upload("tasks.ndjson", content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 1))
+        self.assertEqual(response.data["errors"][0]["row"], 2)
+
+        content = b"title,description\nfirst,one\n\xff\xfe,bad\nsecond,two\n"
+        response = self.upload("tasks.csv", content)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 1))
+        self.assertEqual(response.data["errors"][0]["row"], 3)
+
+    def test_malformed_csv(self):
+        """Rows the csv module rejects are reported like invalid ones"""
+        huge = "x" * (csv.field_size_limit() + 1)
+        content = f"title,description\nfirst,one\nbig,{huge}\nsecond,two\n"
+        response = self.upload("tasks.csv", content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 1))
+        self.assertEqual(response.data["errors"][0]["row"], 3)
+
+    def test_explicit_format(self):
+        response = self.upload(
+            "export.txt", "title,description\na,b\n", file_format="csv"
+        )
+        self.assertEqual(response.data["created"], 1)
+
+        response = self.upload("export.txt", "", file_format="xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_file_required(self):
+        response = self.client.post(self.url, {}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as source:
+            source.write("title,description\nfirst,one\nsecond,two\n")
+            source.flush()
+            out = io.StringIO()
+            call_command(
+                "import_tasks", self.test_user.username, source.name, stdout=out
+            )
+
+        self.assertEqual(json.loads(out.getvalue())["created"], 2)
+        self.assertEqual(TaskModel.objects.filter(user=self.test_user).count(), 2)
@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from apiv1.cache import get_cache
+from apiv1.metrics import MmapedValues, inc, observe, read_entries, render
+
+MyUser = get_user_model()
+
+LIST_REQUESTS = (
+    'tasks_http_requests_total{route="tasks-list",method="GET",status="200"}'
+)
+LIST_LATENCY = 'tasks_http_request_duration_seconds_{}{{route="tasks-list"}}'
+
+
+def parse(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            samples[key] = float(value)
+    return samples
+
+
+def record_in_child(amount):
+    inc("test_forked_total", (("worker", "child"),), amount)
+
+
+class MetricsEndpointTest(APITestCase):
+    """Requests are counted and timed per route, readable by admins only"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.test_user = MyUser.objects.create(
+            username="metrics@gmail.com", email="metrics@gmail.com", password="m"
+        )
+        self.admin = MyUser.objects.create(
+            username="admin@gmail.com", email="admin@gmail.com", is_staff=True
+        )
+        self.client = APIClient()
+        self.url = reverse("metrics")
+
+    def scrape(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        return parse(response.content.decode())
+
+    def test_admins_only(self):
+        self.client.force_authenticate(self.test_user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_requests_are_counted_and_timed(self):
+        before = self.scrape()
+        self.client.force_authenticate(self.test_user)
+        self.client.get(reverse("tasks-list"))
+        after = self.scrape()
+
+        self.assertEqual(after[LIST_REQUESTS] - before.get(LIST_REQUESTS, 0), 1)
+        count = LIST_LATENCY.format("count")
+        self.assertEqual(after[count] - before.get(count, 0), 1)
+        self.assertEqual(
+            after[count], after[LIST_LATENCY.format("bucket")[:-1] + ',le="+Inf"}']
+        )
+        self.assertGreater(after['tasks_db_queries_total{route="tasks-list"}'], 0)
+        self.assertIn('tasks_response_cache_lookups_total{result="miss"}', after.keys())
+
+
+class MetricsStoreTest(APITestCase):
+    """Each thread and worker writes its own file, a scrape sums them"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings = override_settings(METRICS_DIR=self.directory.name)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def test_store_grows_and_reopens(self):
+        path = os.path.join(self.directory.name, "store.db")
+        store = MmapedValues(path)
+        for number in range(5000):
+            store.add(f'test_series{{n="{number}"}}', number)
+        store.add('test_series{n="7"}', 0.5)
+        reopened = {key: value for key, value, _ in read_entries(MmapedValues(path))}
+        self.assertEqual(len(reopened), 5000)
+        self.assertEqual(reopened['test_series{n="7"}'], 7.5)
+
+    def test_threads_and_processes_are_summed(self):
+        inc("test_forked_total", (("worker", "parent"),), 1)
+        thread = threading.Thread(
+            target=inc, args=("test_forked_total", (("worker", "parent"),), 2)
+        )
+        thread.start()
+        thread.join()
+        child = multiprocessing.get_context("fork").Process(
+            target=record_in_child, args=(4,)
+        )
+        child.start()
+        child.join()
+        self.assertEqual(child.exitcode, 0)
+        self.assertEqual(len(os.listdir(self.directory.name)), 3)
+
+        samples = parse(render())
+        self.assertEqual(samples['test_forked_total{worker="parent"}'], 3)
+        self.assertEqual(samples['test_forked_total{worker="child"}'], 4)
+
+    def test_histogram_buckets_are_cumulative(self):
+        with override_settings(METRICS_LATENCY_BUCKETS=(0.1, 1)):
+            observe("test_latency_seconds", (), 0.5)
+            observe("test_latency_seconds", (), 0.05)
+        text = render()
+        samples = parse(text)
+        self.assertEqual(samples['test_latency_seconds_bucket{le="0.1"}'], 1)
+        self.assertEqual(samples['test_latency_seconds_bucket{le="1.0"}'], 2)
+        self.assertEqual(samples['test_latency_seconds_bucket{le="+Inf"}'], 2)
+        self.assertEqual(samples["test_latency_seconds_count"], 2)
+        self.assertAlmostEqual(samples["test_latency_seconds_sum"], 0.55)
+        self.assertLess(
+            text.index('le="0.1"'), text.index('le="1.0"'), "buckets sort by bound"
+        )
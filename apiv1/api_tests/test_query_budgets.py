@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskModel
+
+from apiv1.authentication import clear_token_cache
+from apiv1.cache import get_cache
+from apiv1.query_budgets import (
+    QUERY_BUDGETS,
+    QueryBudgetExceeded,
+    count_queries,
+    get_budget,
+)
+
+MyUser = get_user_model()
+
+BUDGET_MIDDLEWARE = ["apiv1.middleware.QueryBudgetMiddleware", *settings.MIDDLEWARE]
+
+
+class QueryBudgetTest(APITestCase):
+    """Every budgeted endpoint stays within QUERY_BUDGETS"""
+
+    def setUp(self) -> None:
+        self.test_user = MyUser.objects.create_user(
+            username="budget@gmail.com", email="budget@gmail.com", password="budgetpass"
+        )
+        self.token = Token.objects.create(user=self.test_user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        self.task = TaskModel.objects.create(
+            user=self.test_user, title="budget title", description="budget words"
+        )
+        self.detail = reverse("tasks-detail", kwargs={"pk": self.task.pk})
+
+    @contextmanager
+    def assertWithinBudget(self, url_name, method):
+        # Budgets hold with nothing cached, the token lookup included.
+        get_cache().clear()
+        clear_token_cache()
+        with count_queries() as counter:
+            yield
+        budget = get_budget(url_name, method)
+        self.assertLessEqual(
+            len(counter),
+            budget,
+            f"{method} {url_name} over budget:\n" + "\n".join(counter.queries),
+        )
+
+    def test_task_list(self):
+        with self.assertWithinBudget("tasks-list", "GET"):
+            response = self.client.get(reverse("tasks-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_task_create(self):
+        data = {"title": "new title", "description": "new description"}
+        with self.assertWithinBudget("tasks-list", "POST"):
+            response = self.client.post(reverse("tasks-list"), data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(TaskModel.objects.filter(title="new title").count(), 1)
+
+    def test_task_detail(self):
+        with self.assertWithinBudget("tasks-detail", "GET"):
+            response = self.client.get(self.detail)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_task_update(self):
+        data = {"title": "other title", "description": "other words"}
+        with self.assertWithinBudget("tasks-detail", "PUT"):
+            response = self.client.put(self.detail, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertWithinBudget("tasks-detail", "PATCH"):
+            response = self.client.patch(self.detail, {"title": "patched title"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_task_delete(self):
+        with self.assertWithinBudget("tasks-detail", "DELETE"):
+            response = self.client.delete(self.detail)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_task_stats(self):
+        with self.assertWithinBudget("tasks-stats", "GET"):
+            response = self.client.get(reverse("tasks-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], 1)
+
+    def test_signup(self):
+        data = {"email": "new@gmail.com", "password": "newpassword"}
+        with self.assertWithinBudget("signup", "POST"):
+            response = APIClient().post(reverse("signup"), data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_login(self):
+        self.token.delete()
+        data = {"email": "budget@gmail.com", "password": "budgetpass"}
+        for _ in range(2):
+            with self.assertWithinBudget("login", "POST"):
+                response = APIClient().post(reverse("login"), data)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.test_user.refresh_from_db()
+        self.assertIsNotNone(self.test_user.last_login)
+
+    @override_settings(MIDDLEWARE=BUDGET_MIDDLEWARE)
+    def test_middleware_logs_overruns(self):
+        with mock.patch.dict(QUERY_BUDGETS, {"tasks-list": {"GET": 0}}):
+            with self.assertLogs("apiv1.query_budgets", "WARNING") as logs:
+                response = self.client.get(reverse("tasks-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("GET tasks-list ran", logs.output[0])
+
+    @override_settings(MIDDLEWARE=BUDGET_MIDDLEWARE, QUERY_BUDGET_STRICT=True)
+    def test_middleware_fails_overruns_when_strict(self):
+        with mock.patch.dict(QUERY_BUDGETS, {"tasks-list": {"GET": 0}}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse("tasks-list"))
@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.db import DatabaseCache
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskModel
+
+from apiv1.cache import get_cache
+from apiv1.routers import PIN_CACHE_PREFIX, ReplicaRouter, current_request
+
+MyUser = get_user_model()
+
+
+class FakeReplicaRouter(ReplicaRouter):
+    """Router over two replica aliases that are never connected to"""
+
+    def __init__(self):
+        super().__init__()
+        self.down = set()
+
+    def get_replicas(self):
+        return ["replica_1", "replica_2"]
+
+    def is_available(self, alias):
+        return alias not in self.down
+
+
+class ReplicaRouterTest(APITestCase):
+    """Reads go to replicas, except for writes and recent writers"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.router = FakeReplicaRouter()
+        self.factory = RequestFactory()
+        self.test_user = MyUser.objects.create(
+            username="router@gmail.com", email="router@gmail.com", password="router"
+        )
+
+    def route(self, request, model=TaskModel):
+        token = current_request.set(request)
+        try:
+            return self.router.db_for_read(model)
+        finally:
+            current_request.reset(token)
+
+    def test_outside_a_request_uses_primary(self):
+        self.assertEqual(self.router.db_for_read(TaskModel), "default")
+        self.assertEqual(self.router.db_for_write(TaskModel), "default")
+
+    def test_safe_reads_round_robin(self):
+        request = self.factory.get("/")
+        aliases = [self.route(request) for _ in range(4)]
+        self.assertEqual(set(aliases), {"replica_1", "replica_2"})
+        self.assertNotEqual(aliases[0], aliases[1])
+
+    def test_unavailable_replicas_are_skipped(self):
+        request = self.factory.get("/")
+        self.router.down = {"replica_1"}
+        self.assertEqual({self.route(request) for _ in range(4)}, {"replica_2"})
+        self.router.down = {"replica_1", "replica_2"}
+        self.assertEqual(self.route(request), "default")
+
+    def test_unsafe_requests_use_primary(self):
+        self.assertEqual(self.route(self.factory.post("/")), "default")
+
+    def test_cache_table_uses_primary(self):
+        entry = DatabaseCache("tasks_api_cache", {}).cache_model_class
+        self.assertEqual(self.route(self.factory.get("/"), entry), "default")
+
+    def test_pinned_requests_use_primary(self):
+        request = self.factory.get("/")
+        request.COOKIES["db_pinned"] = "1"
+        self.assertEqual(self.route(request), "default")
+
+        request = self.factory.get("/")
+        request.user = self.test_user
+        get_cache().set(PIN_CACHE_PREFIX + str(self.test_user.pk), True)
+        self.assertEqual(self.route(request), "default")
+
+    def test_writes_pin_the_author(self):
+        client = APIClient()
+        client.force_authenticate(self.test_user)
+        response = client.get(reverse("tasks-list"))
+        self.assertNotIn("db_pinned", response.cookies)
+
+        with override_settings(DATABASE_REPLICA_PIN_SECONDS=7):
+            response = client.post(
+                reverse("tasks-list"), {"title": "new", "description": "new"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.cookies["db_pinned"]["max-age"], 7)
+        self.assertTrue(get_cache().get(PIN_CACHE_PREFIX + str(self.test_user.pk)))
+
+    def test_task_writes_pin_the_owner(self):
+        """Also when written outside a request, until the commit and after"""
+        key = PIN_CACHE_PREFIX + str(self.test_user.pk)
+        with override_settings(DATABASE_REPLICAS=["replica_1"]):
+            with self.captureOnCommitCallbacks() as callbacks:
+                TaskModel.objects.create(
+                    user=self.test_user, title="title", description="description"
+                )
+            self.assertTrue(get_cache().get(key))
+            get_cache().delete(key)
+            for callback in callbacks:
+                callback()
+        self.assertTrue(get_cache().get(key))
@@ -0,0 +1,79 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from apiv1 import schema
+
+
+class SchemaCacheTest(APITestCase):
+    """The schema is generated once per code version and served with an ETag"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings = override_settings(
+            SCHEMA_CACHE_DIR=self.directory.name, SCHEMA_CODE_VERSION="v1"
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.client = APIClient()
+        self.url = reverse("schema")
+
+    def count_generations(self):
+        return mock.patch.object(schema, "render_schema", wraps=schema.render_schema)
+
+    def test_generated_once_and_stored(self):
+        with self.count_generations() as render:
+            for _ in range(2):
+                response = self.client.get(self.url, {"format": "json"})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(render.call_count, 1)
+        self.assertIn("/api/v1/tasks/", json.loads(response.content)["paths"])
+        self.assertEqual(response["Cache-Control"], "public, max-age=86400")
+        self.assertEqual(
+            sorted(os.listdir(self.directory.name)),
+            ["openapi-v1.json", "openapi-v1.yaml"],
+        )
+
+        response = self.client.get(self.url)
+        self.assertTrue(response["Content-Type"].startswith("application/vnd.oai"))
+        self.assertTrue(response.content.startswith(b"openapi: 3"))
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_built_schema_is_read_from_disk(self):
+        call_command("generate_schema", stdout=io.StringIO())
+        with open(os.path.join(self.directory.name, "openapi-v1.json"), "wb") as file:
+            file.write(b'{"built": true}')
+        with self.count_generations() as render:
+            response = self.client.get(self.url, {"format": "json"})
+        self.assertEqual(render.call_count, 0)
+        self.assertEqual(response.content, b'{"built": true}')
+
+    def test_new_code_version_regenerates(self):
+        etag = self.client.get(self.url)["ETag"]
+        with override_settings(SCHEMA_CODE_VERSION="v2"):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            sorted(os.listdir(self.directory.name)),
+            ["openapi-v2.json", "openapi-v2.yaml"],
+        )
+
+    def test_source_digest(self):
+        with override_settings(SCHEMA_CODE_VERSION=None):
+            self.assertEqual(schema.get_code_version(), schema.source_digest())
+        self.assertEqual(len(schema.source_digest()), 16)
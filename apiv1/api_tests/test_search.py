@@ -0,0 +1,91 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskModel, TaskSearchToken
+
+from apiv1.cache import get_cache
+
+MyUser = get_user_model()
+
+
+class TaskSearchTest(APITestCase):
+    """Ranked full-text search over the user's tasks"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.test_user = MyUser.objects.create(
+            username="search@gmail.com", email="search@gmail.com", password="search"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.test_user)
+        self.groceries = TaskModel.objects.create(
+            user=self.test_user, title="Buy groceries", description="milk and bread"
+        )
+        self.report = TaskModel.objects.create(
+            user=self.test_user,
+            title="Write report",
+            description="Include the grocery budget and the café receipts",
+        )
+
+    def search(self, term):
+        response = self.client.get(reverse("tasks-list"), {"search": term})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_title_ranks_above_description(self):
+        self.assertEqual(self.search("grocer"), [self.groceries.id, self.report.id])
+
+    def test_accents_and_case_are_ignored(self):
+        self.assertEqual(self.search("CAFE"), [self.report.id])
+
+    def test_scoped_to_user(self):
+        other_user = MyUser.objects.create(
+            username="other@gmail.com", email="other@gmail.com", password="other"
+        )
+        TaskModel.objects.create(user=other_user, title="milk", description="milk")
+        self.assertEqual(self.search("milk"), [self.groceries.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.groceries.title = "Buy vegetables"
+        self.groceries.description = "carrots"
+        self.groceries.save()
+        self.assertEqual(self.search("carrots"), [self.groceries.id])
+        self.assertEqual(self.search("milk"), [])
+
+        self.groceries.delete()
+        self.assertEqual(self.search("carrots"), [])
+        self.assertFalse(TaskSearchToken.objects.filter(task_id=self.groceries.id))
+
+    def test_unchanged_text_is_not_reindexed(self):
+        task = TaskModel.objects.get(pk=self.groceries.pk)
+        table = TaskSearchToken._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            task.save()
+            response = self.client.patch(
+                reverse("tasks-detail", args=[task.pk]),
+                {"title": "Buy groceries"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries if table in query["sql"]])
+
+        task.description = "milk and eggs"
+        task.save()
+        self.assertEqual(self.search("eggs"), [task.id])
+
+    def test_bulk_created_tasks_are_indexed(self):
+        data = [{"title": "Plan holidays", "description": "beach"}]
+        self.client.post(reverse("tasks-bulk"), data, format="json")
+        self.assertEqual(len(self.search("beach")), 1)
+
+    def test_rebuild_command(self):
+        TaskSearchToken.objects.all().delete()
+        call_command("rebuild_search_index", batch_size=1, stdout=io.StringIO())
+        self.assertEqual(self.search("bread"), [self.groceries.id])
@@ -0,0 +1,235 @@
+import io
+from collections import Counter
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskModel, TaskShardMove, TaskUserStats
+from tasks.sharding import get_route, hash_shard
+
+from apiv1.cache import get_cache
+from apiv1.management.commands.rebalance_task_shards import Command
+from apiv1.changes import encode_cursor
+
+MyUser = get_user_model()
+
+
+def shard_won_by(user_id):
+    """A shard name that takes ``user_id`` over from default when added"""
+    for number in range(1, 100):
+        alias = f"shard_{number}"
+        if hash_shard(user_id, ["default", alias]) == alias:
+            return alias
+
+
+class HashShardTest(APITestCase):
+    """Users are spread evenly and only move to a shard that is added"""
+
+    def test_stable_and_balanced(self):
+        shards = ["default", "shard_1", "shard_2"]
+        placed = [hash_shard(user_id, shards) for user_id in range(3000)]
+        self.assertEqual(
+            placed, [hash_shard(user_id, shards) for user_id in range(3000)]
+        )
+        counts = Counter(placed)
+        self.assertEqual(set(counts), set(shards))
+        self.assertTrue(all(800 < count < 1200 for count in counts.values()))
+
+    def test_adding_a_shard_only_moves_users_to_it(self):
+        before, after = ["default", "shard_1"], ["default", "shard_1", "shard_2"]
+        for user_id in range(1000):
+            new = hash_shard(user_id, after)
+            self.assertIn(new, {hash_shard(user_id, before), "shard_2"})
+
+
+class ShardMoveTest(APITestCase):
+    """Writes wait while a user moves, cursors of the old shard expire"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.test_user = MyUser.objects.create(
+            username="shard@gmail.com", email="shard@gmail.com", password="shard"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.test_user)
+        self.task = TaskModel.objects.create(
+            user=self.test_user, title="task", description="task"
+        )
+        self.target = shard_won_by(self.test_user.pk)
+        self.layout = override_settings(
+            TASK_SHARDS=["default", self.target], TASK_SHARDS_PREVIOUS=["default"]
+        )
+        self.layout.enable()
+        self.addCleanup(self.layout.disable)
+
+    def test_tasks_stay_on_the_source_until_moved(self):
+        self.assertEqual(get_route(self.test_user.pk), ("default", False))
+        detail = reverse("tasks-detail", kwargs={"pk": self.task.pk})
+        response = self.client.patch(detail, {"title": "renamed"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(TaskModel.objects.filter(title="renamed").exists())
+
+    def test_writes_are_refused_while_moving(self):
+        TaskShardMove.objects.create(
+            user_id=self.test_user.pk, source="default", target=self.target
+        )
+        get_cache().clear()
+        detail = reverse("tasks-detail", kwargs={"pk": self.task.pk})
+        response = self.client.patch(detail, {"title": "renamed"})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        response = self.client.get(detail)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "task")
+
+    def test_cursor_of_another_shard_expires(self):
+        cursor = encode_cursor(0, timezone.now(), self.target)
+        response = self.client.get(reverse("tasks-changes"), {"since": cursor})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+
+@skipUnless(
+    "shard_1" in settings.DATABASES, "needs a shard_1 database, see README Sharding"
+)
+class RebalanceTest(APITestCase):
+    """rebalance_task_shards copies a user's tasks and drops the source rows"""
+
+    databases = {"default", "shard_1"} & set(settings.DATABASES)
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.test_user, self.tasks = self.create_moving_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.test_user)
+
+    def create_moving_user(self):
+        """A user with 5 tasks on default, whom adding shard_1 moves there"""
+        while True:
+            number = MyUser.objects.count() + 1
+            user = MyUser.objects.create(
+                username=f"move{number}@gmail.com", email=f"move{number}@gmail.com"
+            )
+            if hash_shard(user.pk, ["default", "shard_1"]) == "shard_1":
+                break
+        with override_settings(TASK_SHARDS=["default"], TASK_SHARDS_PREVIOUS=[]):
+            TaskModel.objects.bulk_create(
+                TaskModel(user=user, title=f"task {n}", description="moving")
+                for n in range(5)
+            )
+        return user, list(TaskModel.objects.using("default").filter(user=user))
+
+    def rebalance(self, *args):
+        call_command(
+            "rebalance_task_shards",
+            "--wait",
+            "0",
+            "--batch-size",
+            "2",
+            *args,
+            stdout=io.StringIO(),
+        )
+
+    def assertMoved(self, user, tasks):
+        move = TaskShardMove.objects.get(user_id=user.pk)
+        self.assertEqual(move.state, TaskShardMove.DONE)
+        self.assertFalse(TaskModel.objects.using("default").filter(user=user))
+        moved = TaskModel.objects.using("shard_1").filter(user=user)
+        self.assertEqual(
+            list(moved.values_list("id", "created_at", "updated_at")),
+            [(task.id, task.created_at, task.updated_at) for task in tasks],
+        )
+
+    @override_settings(
+        TASK_SHARDS=["default", "shard_1"], TASK_SHARDS_PREVIOUS=["default"]
+    )
+    def test_move(self):
+        self.rebalance()
+        self.assertEqual(get_route(self.test_user.pk), ("shard_1", False))
+        self.assertFalse(TaskModel.objects.using("default").filter(user=self.test_user))
+        moved = TaskModel.objects.using("shard_1").filter(user=self.test_user)
+        self.assertEqual(
+            list(moved.values_list("id", "created_at", "updated_at")),
+            [(task.id, task.created_at, task.updated_at) for task in self.tasks],
+        )
+
+        response = self.client.get(reverse("tasks-changes"))
+        self.assertEqual(
+            [task["id"] for task in response.data["changes"]],
+            [task.id for task in self.tasks],
+        )
+        response = self.client.get(reverse("tasks-list"), {"search": "moving"})
+        self.assertEqual(len(response.data["results"]), 5)
+        response = self.client.post(
+            reverse("tasks-list"), {"title": "new", "description": "new"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(moved.filter(pk=response.data["id"]).exists())
+        response = self.client.get(reverse("tasks-stats"))
+        self.assertEqual(response.data["total"], 6)
+        self.assertFalse(
+            TaskUserStats.objects.using("default").filter(user=self.test_user)
+        )
+
+    @override_settings(
+        TASK_SHARDS=["default", "shard_1"], TASK_SHARDS_PREVIOUS=["default"]
+    )
+    def test_one_wait_before_and_after_a_batch(self):
+        other_user, other_tasks = self.create_moving_user()
+        with mock.patch(f"{Command.__module__}.time") as clock:
+            self.rebalance("--wait", "7")
+        self.assertEqual(clock.sleep.call_args_list, [mock.call(7.0)] * 2)
+        self.assertMoved(self.test_user, self.tasks)
+        self.assertMoved(other_user, other_tasks)
+
+        TaskShardMove.objects.all().delete()
+        with mock.patch(f"{Command.__module__}.time") as clock:
+            self.rebalance("--users-per-batch", "1")
+        self.assertEqual(clock.sleep.call_count, 4)
+
+    @override_settings(
+        TASK_SHARDS=["default", "shard_1"], TASK_SHARDS_PREVIOUS=["default"]
+    )
+    def test_resumes_a_copy(self):
+        write, calls = Command.write, []
+
+        def stop_on_second_batch(command, tasks, move):
+            calls.append(move)
+            if len(calls) == 2:
+                raise RuntimeError("stopped")
+            write(command, tasks, move)
+
+        with mock.patch.object(Command, "write", stop_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                self.rebalance()
+        move = TaskShardMove.objects.get(user_id=self.test_user.pk)
+        self.assertEqual(move.state, TaskShardMove.COPYING)
+        self.assertEqual(move.copied_up_to, self.tasks[1].id)
+        self.assertEqual(get_route(self.test_user.pk), ("default", True))
+
+        self.rebalance()
+        self.assertMoved(self.test_user, self.tasks)
+
+    @override_settings(
+        TASK_SHARDS=["default", "shard_1"], TASK_SHARDS_PREVIOUS=["default"]
+    )
+    def test_resumes_the_cleanup(self):
+        """The source rows of a run stopped after the copy are still deleted"""
+        with mock.patch.object(
+            Command, "delete_source", side_effect=RuntimeError("stopped")
+        ):
+            with self.assertRaises(RuntimeError):
+                self.rebalance()
+        move = TaskShardMove.objects.get(user_id=self.test_user.pk)
+        self.assertEqual(move.state, TaskShardMove.CLEANING)
+        get_cache().clear()
+        self.assertEqual(get_route(self.test_user.pk), ("shard_1", False))
+        self.assertEqual(TaskModel.objects.filter(user=self.test_user).count(), 5)
+
+        self.rebalance()
+        self.assertMoved(self.test_user, self.tasks)
@@ -0,0 +1,165 @@
+import io
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from apiv1.cache import get_cache
+from apiv1.models import DeniedToken
+
+MyUser = get_user_model()
+
+
+@override_settings(USE_JWT=True)
+class SignedTokenTest(APITestCase):
+    """Stateless access/refresh tokens issued on login and signup"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.user_data = {"email": "jwt@gmail.com", "password": "jwtpassword"}
+        MyUser.objects.create_user(
+            username=self.user_data["email"],
+            email=self.user_data["email"],
+            password=self.user_data["password"],
+        )
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(
+            reverse("rest_login"), self.user_data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_login_keeps_legacy_token(self):
+        """Old clients still find their token key"""
+        data = self.login()
+        self.assertIn("token", data)
+        self.assertIn("access", data)
+        self.assertIn("refresh", data)
+
+    def test_signup_returns_signed_tokens(self):
+        data = {"email": "new@gmail.com", "password": "newpassword"}
+        response = self.client.post(reverse("signup"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(response.data), {"token", "access", "refresh"}, response.data
+        )
+
+    def test_access_token_needs_no_query(self):
+        """The bearer token is verified from its signature alone"""
+        access = self.login()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access)
+        url = reverse("tasks-list")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        # Only the task list itself, not the denylist of a fresh token.
+        self.assertFalse(
+            [query for query in queries if DeniedToken._meta.db_table in query["sql"]]
+        )
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_profile_update_keeps_the_user_row(self):
+        """Saving request.user writes the real user, not the claims"""
+        MyUser.objects.filter(email=self.user_data["email"]).update(name="Jay")
+        access = self.login()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access)
+        response = self.client.patch(
+            reverse("rest_user_details"), {"first_name": "X"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        user = MyUser.objects.get(email=self.user_data["email"])
+        self.assertEqual((user.first_name, user.name), ("X", "Jay"))
+        self.assertTrue(user.check_password(self.user_data["password"]))
+
+    async def test_async_create(self):
+        access = (await sync_to_async(self.login)())["access"]
+        response = await AsyncClient().post(
+            reverse("async-tasks-list"),
+            {"title": "title", "description": "description"},
+            content_type="application/json",
+            authorization="Bearer " + access,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_tampered_access_token(self):
+        access = self.login()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access[:-2] + "xx")
+        response = self.client.get(reverse("tasks-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotates(self):
+        """A refresh token can be used only once"""
+        refresh = self.login()["refresh"]
+        url = reverse("token_refresh")
+
+        response = self.client.post(url, {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data["refresh"], refresh)
+
+        response = self.client.post(url, {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoke(self):
+        """Revoking denies the refresh token and the access token in use"""
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + tokens["access"])
+
+        response = self.client.post(
+            reverse("token_revoke"), {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse("tasks-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_outlives_the_cache(self):
+        """An evicted or never shared refresh token entry is found in the table"""
+        tokens = self.login()
+        self.client.post(
+            reverse("token_revoke"), {"refresh": tokens["refresh"]}, format="json"
+        )
+
+        get_cache().clear()
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Access tokens only check the cache, their lifetime bounds the rest.
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + tokens["access"])
+        response = self.client.get(reverse("tasks-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_purge_denied_tokens(self):
+        refresh = self.login()["refresh"]
+        self.client.post(reverse("token_refresh"), {"refresh": refresh}, format="json")
+        DeniedToken.objects.create(
+            jti="expired", expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        out = io.StringIO()
+        call_command("purge_denied_tokens", "--batch-size", "1", stdout=out)
+        self.assertEqual(out.getvalue(), "Removed 1 expired denylist rows.\n")
+        self.assertEqual(DeniedToken.objects.count(), 1)
+
+    @override_settings(USE_JWT=False)
+    def test_disabled(self):
+        """Without USE_JWT the legacy response shape is unchanged"""
+        self.assertEqual(set(self.login()), {"token"})
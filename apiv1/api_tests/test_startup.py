@@ -0,0 +1,93 @@
+import io
+import os
+import runpy
+import tempfile
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from apiv1.startup import parse_import_times, run_profile
+
+IMPORT_TIMES = """\
+import time: self [us] | cumulative | imported package
+import time:       200 |        300 |   rest_framework.compat
+import time:      1000 |       1500 | rest_framework
+import time:       400 |        400 | rest_framework.fields
+import time:       250 |        250 | yaml
+"""
+
+
+class StartupTest(SimpleTestCase):
+    """A warmed up worker answers its first request within budget"""
+
+    def setUp(self) -> None:
+        # The profiled interpreters read their settings from the environment.
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        environ = mock.patch.dict(os.environ, {"SCHEMA_CACHE_DIR": directory.name})
+        environ.start()
+        self.addCleanup(environ.stop)
+
+    def app_imports(self, setup):
+        return [
+            module
+            for module in setup["imports"]
+            if module.split(".")[0] in ("apiv1", "tasks", "accounts", "rest_framework")
+        ]
+
+    def test_warm_up_takes_the_setup_off_the_first_request(self):
+        """What a cold worker sets up on its first request, warm_up() did"""
+        cold = run_profile(warm=False, path=reverse("tasks-list"))
+        warm = run_profile(warm=True, path=reverse("tasks-list"))
+        self.assertIn("warm_up.urls", dict(warm["phases"]))
+        self.assertIn("ready", warm["apps"]["apiv1"])
+
+        cold_setup = cold["first_request_setup"]
+        warm_setup = warm["first_request_setup"]
+        self.assertIn("apiv1.urls", self.app_imports(cold_setup))
+        self.assertEqual(self.app_imports(warm_setup), [])
+        self.assertLess(len(warm_setup["imports"]), len(cold_setup["imports"]))
+        for counter in ("url_resolvers", "relation_trees", "connections"):
+            self.assertLessEqual(warm_setup[counter], cold_setup[counter], counter)
+            self.assertEqual(warm_setup[counter], 0, counter)
+
+    @skipUnless(
+        os.environ.get("STARTUP_BUDGET_TEST"), "wall-clock, set STARTUP_BUDGET_TEST=1"
+    )
+    def test_first_request_within_budget(self):
+        # Milliseconds depend on the machine, the test above does not.
+        profile = run_profile(warm=True, path=reverse("tasks-list"))
+        self.assertLessEqual(
+            dict(profile["phases"])["first request"],
+            settings.STARTUP_FIRST_REQUEST_BUDGET_MS,
+        )
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command("startup_profile", "--limit", "3", stdout=stdout)
+        output = stdout.getvalue()
+        for heading in ("Phases (ms)", "Apps (ms)", "Imports (cumulative ms)"):
+            self.assertIn(heading, output)
+        self.assertIn("first request", output)
+
+    def test_parse_import_times(self):
+        self.assertEqual(
+            parse_import_times(IMPORT_TIMES), {"rest_framework": 1.9, "yaml": 0.25}
+        )
+
+    def test_gunicorn_hooks(self):
+        hooks = runpy.run_path(os.path.join(settings.BASE_DIR, "gunicorn.conf.py"))
+        self.assertTrue(hooks["preload_app"])
+        with tempfile.TemporaryDirectory() as directory:
+            open(os.path.join(directory, "1-1.db"), "wb").close()
+            with mock.patch.dict(os.environ, {"METRICS_DIR": directory}):
+                hooks["on_starting"](mock.Mock())
+            self.assertEqual(os.listdir(directory), [])
+
+        server = mock.Mock()
+        with mock.patch("apiv1.schema.get_schema_document"):
+            hooks["when_ready"](server)
+        self.assertEqual(server.log.info.call_count, 4)
@@ -0,0 +1,157 @@
+import io
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskModel, TaskUserStats
+
+from apiv1.cache import get_cache
+
+MyUser = get_user_model()
+
+
+class TaskStatsTest(APITestCase):
+    """Per-user stats follow every kind of task write"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.test_user = MyUser.objects.create(
+            username="stats@gmail.com", email="stats@gmail.com", password="stats"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.test_user)
+        self.url = reverse("tasks-stats")
+
+    def get_stats(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def assertCounts(self, total, created_today, updated_today):
+        data = self.get_stats()
+        self.assertEqual(
+            (data["total"], data["created_today"], data["updated_today"]),
+            (total, created_today, updated_today),
+        )
+
+    def age(self, task, days=1):
+        """Move a task's timestamps ``days`` back, as if written then"""
+        earlier = timezone.now() - timedelta(days=days)
+        TaskModel.objects.filter(pk=task.pk).update(
+            created_at=earlier, updated_at=earlier
+        )
+
+    def test_no_tasks(self):
+        self.assertEqual(
+            self.get_stats(),
+            {
+                "total": 0,
+                "created_today": 0,
+                "updated_today": 0,
+                "last_activity": None,
+            },
+        )
+        self.assertFalse(TaskUserStats.objects.exists())
+
+    def test_create_update_delete(self):
+        data = {"title": "title", "description": "description"}
+        first = self.client.post(reverse("tasks-list"), data).data["id"]
+        second = self.client.post(reverse("tasks-list"), data).data["id"]
+        self.assertCounts(2, 2, 2)
+        self.assertIsNotNone(self.get_stats()["last_activity"])
+
+        self.age(TaskModel.objects.get(pk=first))
+        call_command("reconcile_task_stats", stdout=io.StringIO())
+        self.assertCounts(2, 1, 1)
+
+        self.client.patch(
+            reverse("tasks-detail", kwargs={"pk": first}), {"title": "again"}
+        )
+        self.assertCounts(2, 1, 2)
+        self.client.patch(
+            reverse("tasks-detail", kwargs={"pk": first}), {"title": "once more"}
+        )
+        self.assertCounts(2, 1, 2)
+
+        self.client.delete(reverse("tasks-detail", kwargs={"pk": second}))
+        self.assertCounts(1, 0, 1)
+        self.client.delete(reverse("tasks-detail", kwargs={"pk": first}))
+        self.assertCounts(0, 0, 0)
+
+    def test_bulk_endpoints(self):
+        url = reverse("tasks-bulk")
+        data = [{"title": f"title {i}", "description": "d"} for i in range(3)]
+        response = self.client.post(url, data, format="json")
+        ids = [task["id"] for task in response.data["results"]]
+        self.assertCounts(3, 3, 3)
+
+        for pk in ids[:2]:
+            self.age(TaskModel.objects.get(pk=pk))
+        call_command("reconcile_task_stats", stdout=io.StringIO())
+        self.assertCounts(3, 1, 1)
+        self.client.patch(url, [{"id": ids[0], "title": "new"}], format="json")
+        self.assertCounts(3, 1, 2)
+
+        self.client.delete(url, ids[1:], format="json")
+        self.assertCounts(1, 0, 1)
+
+    def test_daily_counters_start_over(self):
+        TaskModel.objects.create(user=self.test_user, title="t", description="d")
+        stats = TaskUserStats.objects.get(user=self.test_user)
+        stats.day -= timedelta(days=1)
+        stats.save()
+        self.assertCounts(1, 0, 0)
+
+        TaskModel.objects.create(user=self.test_user, title="t", description="d")
+        self.assertCounts(2, 1, 1)
+        stats.refresh_from_db()
+        self.assertEqual(stats.day, timezone.localdate())
+
+    def test_other_users_are_not_counted(self):
+        other = MyUser.objects.create(username="other@gmail.com", email="o@gmail.com")
+        TaskModel.objects.create(user=other, title="t", description="d")
+        self.assertCounts(0, 0, 0)
+
+
+class ReconcileTaskStatsTest(APITestCase):
+    """reconcile_task_stats repairs drifted and missing rows only"""
+
+    def setUp(self) -> None:
+        self.users = [
+            MyUser.objects.create(username=f"r{n}@gmail.com", email=f"r{n}@gmail.com")
+            for n in range(5)
+        ]
+        for user in self.users[:4]:
+            TaskModel.objects.create(user=user, title="t", description="d")
+
+    def reconcile(self, *args):
+        out = io.StringIO()
+        call_command("reconcile_task_stats", "--batch-size", "2", *args, stdout=out)
+        return out.getvalue()
+
+    def test_repairs_drift(self):
+        self.assertEqual(self.reconcile(), "Checked 5 users, repaired 0.\n")
+
+        TaskUserStats.objects.filter(user=self.users[0]).update(total=7)
+        TaskUserStats.objects.filter(user=self.users[1]).delete()
+        # Written without signals.
+        TaskModel.objects.bulk_create(
+            [TaskModel(user=self.users[2], title="t", description="d")]
+        )
+        self.assertEqual(self.reconcile(), "Checked 5 users, repaired 3.\n")
+
+        for user, total in zip(self.users, (1, 1, 2, 1)):
+            stats = TaskUserStats.objects.get(user=user)
+            self.assertEqual((stats.total, stats.created_today), (total, total))
+        self.assertFalse(TaskUserStats.objects.filter(user=self.users[4]).exists())
+
+    def test_only_given_users(self):
+        TaskUserStats.objects.update(total=7)
+        output = self.reconcile("--user", str(self.users[0].pk))
+        self.assertEqual(output, "Checked 1 users, repaired 1.\n")
+        self.assertEqual(TaskUserStats.objects.filter(total=7).count(), 3)
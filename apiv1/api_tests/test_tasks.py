@@ -1,13 +1,17 @@
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.forms.models import model_to_dict
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
 
 from tasks.models import TaskModel
 
-from apiv1.serializers import TaskModelSerializer
+from apiv1.serializers import TaskModelSerializer, ValuesSerializer
+from apiv1.cache import get_cache
 
 MyUser = get_user_model()
 
@@ -16,6 +20,7 @@ class TaskModelTest(APITestCase):
     """Task model with user and credentials 'Token'"""
 
     def setUp(self) -> None:
+        get_cache().clear()
         self.test_user_data = {
             "username": "jonh@gmail.com",
             "email": "jonh@gmail.com",
@@ -102,19 +107,37 @@ class TaskModelTest(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)
+        results = response.data["results"]
+        self.assertEqual(len(results), 3)
         # first task added
-        self.assertEqual(response.data[0]["title"], task1.title)
-        self.assertEqual(response.data[0]["description"], task1.description)
-        self.assertEqual(response.data[0]["user"], task1.user.id)
+        self.assertEqual(results[0]["title"], task1.title)
+        self.assertEqual(results[0]["description"], task1.description)
+        self.assertEqual(results[0]["user"], task1.user.id)
         # Second task added
-        self.assertEqual(response.data[1]["title"], task2.title)
-        self.assertEqual(response.data[1]["description"], task2.description)
-        self.assertEqual(response.data[1]["user"], task2.user.id)
+        self.assertEqual(results[1]["title"], task2.title)
+        self.assertEqual(results[1]["description"], task2.description)
+        self.assertEqual(results[1]["user"], task2.user.id)
         # Third task added
-        self.assertEqual(response.data[2]["title"], task3.title)
-        self.assertEqual(response.data[2]["description"], task3.description)
-        self.assertEqual(response.data[2]["user"], task3.user.id)
+        self.assertEqual(results[2]["title"], task3.title)
+        self.assertEqual(results[2]["description"], task3.description)
+        self.assertEqual(results[2]["user"], task3.user.id)
+
+    def test_api_get_tasks_matches_serializer(self):
+        """The .values() list path renders exactly like TaskModelSerializer"""
+        for title in ("first", "ñandú 🐦", 'quote " and \\ slash'):
+            TaskModel.objects.create(
+                user=self.test_user, title=title, description=f"{title}\nbody"
+            )
+        queryset = TaskModel.objects.filter(user=self.test_user)
+        values_serializer = ValuesSerializer(TaskModelSerializer)
+
+        renderer = JSONRenderer()
+        expected = renderer.render(TaskModelSerializer(queryset, many=True).data)
+        fast = values_serializer.many(queryset.values(*values_serializer.columns))
+        self.assertEqual(renderer.render(fast), expected)
+
+        response = self.client.get(reverse("tasks-list"))
+        self.assertEqual(renderer.render(response.data["results"]), expected)
 
     def test_api_get_task_individual(self):
         """Get an individual task from the user"""
@@ -196,3 +219,184 @@ class TaskModelTest(APITestCase):
 
         response = self.client.delete(url, format="json")
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class TaskPaginationTest(APITestCase):
+    """Keyset pagination of the user's tasks"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.test_user = MyUser.objects.create(
+            username="pager@gmail.com", email="pager@gmail.com", password="pager"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.test_user)
+        self.tasks = [
+            TaskModel.objects.create(
+                user=self.test_user, title=f"task {i}", description="description"
+            )
+            for i in range(7)
+        ]
+
+    def collect_ids(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+        return ids
+
+    def test_walk_forward_through_pages(self):
+        """Following next links returns every task once, in creation order"""
+        url = reverse("tasks-list") + "?page_size=3"
+        self.assertEqual(self.collect_ids(url), [task.id for task in self.tasks])
+
+    def test_walk_backward_through_pages(self):
+        """previous links go back to the earlier pages"""
+        url = reverse("tasks-list") + "?page_size=3"
+        first = self.client.get(url).data
+        self.assertIsNone(first["previous"])
+        second = self.client.get(first["next"]).data
+        back = self.client.get(second["previous"]).data
+
+        self.assertEqual(back["results"], first["results"])
+        self.assertIsNotNone(back["next"])
+        self.assertIsNone(back["previous"])
+
+    def test_same_created_at_is_ordered_by_id(self):
+        """Rows sharing a timestamp are split across pages by id"""
+        TaskModel.objects.filter(user=self.test_user).update(
+            created_at=self.tasks[0].created_at
+        )
+        url = reverse("tasks-list") + "?page_size=2"
+        self.assertEqual(self.collect_ids(url), [task.id for task in self.tasks])
+
+    def test_no_count_or_offset(self):
+        """A deep page is one range query without COUNT(*) or OFFSET"""
+        url = reverse("tasks-list") + "?page_size=2"
+        second_page = self.client.get(url).data["next"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(second_page)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The conditional GET validators read the user's stats row apart.
+        page_queries = [
+            q["sql"].upper()
+            for q in queries
+            if "LIMIT" in q["sql"] and TaskModel._meta.db_table in q["sql"]
+        ]
+        self.assertEqual(len(page_queries), 1)
+        self.assertNotIn("COUNT(", page_queries[0])
+        self.assertNotIn("OFFSET", page_queries[0])
+
+    def test_invalid_cursor(self):
+        """A tampered cursor is rejected"""
+        url = reverse("tasks-list") + "?cursor=bm90LWEtY3Vyc29y"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskBulkTest(APITestCase):
+    """Bulk create, update and delete of tasks"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.test_user = MyUser.objects.create(
+            username="bulk@gmail.com", email="bulk@gmail.com", password="bulk"
+        )
+        self.other_user = MyUser.objects.create(
+            username="other@gmail.com", email="other@gmail.com", password="other"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.test_user)
+        self.url = reverse("tasks-bulk")
+
+    def test_bulk_create(self):
+        """Every item is created for the requesting user"""
+        data = [{"title": f"title {i}", "description": "description"} for i in range(5)]
+        response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(TaskModel.objects.filter(user=self.test_user).count(), 5)
+        results = response.data["results"]
+        self.assertEqual(
+            [item["title"] for item in results], [d["title"] for d in data]
+        )
+        for item in results:
+            self.assertIsNotNone(item["id"])
+            self.assertEqual(item["user"], self.test_user.id)
+
+    def test_bulk_create_is_all_or_nothing(self):
+        """One invalid item rejects the batch with per-item errors"""
+        data = [{"title": "ok", "description": "ok"}, {"title": "missing description"}]
+        response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(response.data[1], {"description": ["This field is required."]})
+        self.assertEqual(TaskModel.objects.count(), 0)
+
+    def test_bulk_update(self):
+        """Partial updates are applied to the user's tasks"""
+        task1 = TaskModel.objects.create(
+            user=self.test_user, title="a", description="a"
+        )
+        task2 = TaskModel.objects.create(
+            user=self.test_user, title="b", description="b"
+        )
+        data = [{"id": task1.id, "title": "A"}, {"id": task2.id, "description": "B"}]
+
+        response = self.client.patch(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        task1.refresh_from_db()
+        task2.refresh_from_db()
+        self.assertEqual((task1.title, task1.description), ("A", "a"))
+        self.assertEqual((task2.title, task2.description), ("b", "B"))
+        self.assertGreater(task1.updated_at, task1.created_at)
+
+    def test_bulk_update_other_users_task(self):
+        """Tasks of another user are reported as not found and nothing changes"""
+        mine = TaskModel.objects.create(user=self.test_user, title="a", description="a")
+        theirs = TaskModel.objects.create(
+            user=self.other_user, title="b", description="b"
+        )
+        data = [{"id": mine.id, "title": "A"}, {"id": theirs.id, "title": "B"}]
+
+        response = self.client.patch(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[1], {"id": ["Not found."]})
+        mine.refresh_from_db()
+        theirs.refresh_from_db()
+        self.assertEqual((mine.title, theirs.title), ("a", "b"))
+
+    def test_bulk_update_boolean_id(self):
+        """JSON booleans are not taken for ids 1 and 0"""
+        task = TaskModel.objects.create(user=self.test_user, title="a", description="a")
+        data = [{"id": task.id, "title": "A"}, {"id": True, "title": "B"}]
+
+        response = self.client.patch(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[1], {"id": ["A valid integer is required."]})
+        task.refresh_from_db()
+        self.assertEqual(task.title, "a")
+
+    def test_bulk_delete(self):
+        """Only the user's own tasks are deleted"""
+        mine = TaskModel.objects.create(user=self.test_user, title="a", description="a")
+        theirs = TaskModel.objects.create(
+            user=self.other_user, title="b", description="b"
+        )
+
+        response = self.client.delete(self.url, [mine.id, theirs.id], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [{"id": mine.id, "deleted": True}, {"id": theirs.id, "deleted": False}],
+        )
+        self.assertFalse(TaskModel.objects.filter(id=mine.id).exists())
+        self.assertTrue(TaskModel.objects.filter(id=theirs.id).exists())
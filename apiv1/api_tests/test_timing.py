@@ -0,0 +1,90 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from tasks.models import TaskModel
+
+from apiv1.authentication import clear_token_cache
+from apiv1.cache import get_cache
+
+MyUser = get_user_model()
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=1, REQUEST_TIMING_SLOW_MS=60000)
+class RequestTimingTest(APITestCase):
+    """Sampled requests report their SQL, auth and serializer time"""
+
+    def setUp(self) -> None:
+        get_cache().clear()
+        clear_token_cache()
+        self.test_user = MyUser.objects.create(
+            username="timing@gmail.com", email="timing@gmail.com", password="timing"
+        )
+        self.auth = f"Token {Token.objects.create(user=self.test_user).key}"
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.auth)
+        TaskModel.objects.create(
+            user=self.test_user, title="timed task", description="timed"
+        )
+        self.url = reverse("tasks-list")
+
+    def get_metrics(self, response):
+        return {
+            metric.split(";")[0]: metric
+            for metric in response["Server-Timing"].split(", ")
+        }
+
+    def test_server_timing_header(self):
+        with self.assertLogs("apiv1.timing", "INFO") as logs:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = self.get_metrics(response)
+        self.assertEqual(set(metrics), {"auth", "db", "serialize", "total"})
+        # Token lookup, list validators and the page.
+        self.assertIn('desc="3 queries"', metrics["db"])
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["path"], self.url)
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["db_queries"], 3)
+        self.assertNotIn("slowest_queries", record)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_reported(self):
+        with self.assertNoLogs("apiv1.timing"):
+            response = self.client.get(self.url)
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(REQUEST_TIMING_SLOW_MS=0, REQUEST_TIMING_SLOW_QUERIES=2)
+    def test_slow_requests_log_their_slowest_queries(self):
+        with self.assertLogs("apiv1.timing", "WARNING") as logs:
+            self.client.get(self.url)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["db_queries"], 3)
+        slowest = record["slowest_queries"]
+        self.assertEqual(len(slowest), 2)
+        self.assertGreaterEqual(slowest[0]["ms"], slowest[1]["ms"])
+        self.assertIn("SELECT", slowest[0]["sql"])
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0, REQUEST_TIMING_SLOW_MS=0)
+    def test_unsampled_slow_requests_are_still_logged(self):
+        with self.assertLogs("apiv1.timing", "WARNING") as logs:
+            response = self.client.get(self.url)
+        self.assertNotIn("Server-Timing", response)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertNotIn("db_queries", record)
+
+    async def test_async_views_are_measured(self):
+        with self.assertLogs("apiv1.timing", "INFO"):
+            response = await AsyncClient().get(
+                reverse("async-tasks-list"), authorization=self.auth
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = self.get_metrics(response)
+        self.assertIn('desc="3 queries"', metrics["db"])
+        self.assertIn("auth", metrics)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class Apiv1Config(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apiv1"
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,303 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from tasks.models import TaskModel
+
+from .cache import get_cache, record_lookup, response_cache_key
+from .conditional import (
+    EMPTY_LIST_STATE,
+    get_validator_headers,
+    list_validator_queryset,
+    make_validators,
+    validator_aggregates,
+)
+from .mixins import SparseFieldsMixin
+from .pagination import TaskCursorPagination
+from .permissions import IsAuthor
+from .routers import SAFE_METHODS, check_shard_writable
+from .search import search_task_ids
+from .serializers import TaskModelSerializer
+from .timing import timed
+
+
+class AsyncTaskAPIView(View):
+    """Base of the native async task endpoints.
+
+    Does for JSON clients what APIView and the TaskModelViewSet mixins do:
+    the same authentication classes, IsAuthor, response cache, conditional
+    GETs, pagination, sparse fieldsets (SparseFieldsMixin goes first in the
+    subclasses) and error payloads, but as coroutines, so an ASGI server
+    runs them on the event loop instead of through the sync adapter.
+    """
+
+    renderer = JSONRenderer()
+    permission_classes = (IsAuthor,)
+    serializer_class = TaskModelSerializer
+    search_param = "search"
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # As for APIView: none of the authentication classes uses cookies.
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        # SparseFieldsMixin reads query_params, as on a DRF request.
+        self.request = Request(request)
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user, self.successful_authenticator = await self.authenticate(
+                request
+            )
+            await self.check_permissions(request)
+            if request.method not in SAFE_METHODS:
+                await sync_to_async(check_shard_writable)(request.user.pk)
+            method = request.method.lower()
+            handler = getattr(self, method, None)
+            if method not in self.http_method_names or handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(request, exc)
+
+        response["Allow"] = ", ".join(self._allowed_methods())
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    def get_authenticators(self):
+        return [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+
+    def get_permissions(self):
+        return [permission() for permission in self.permission_classes]
+
+    def get_queryset(self, request):
+        return TaskModel.objects.for_user(request.user.pk)
+
+    def filter_queryset(self, queryset):
+        return queryset
+
+    def get_serializer_class(self):
+        return self.serializer_class
+
+    def get_serializer(self, *args, **kwargs):
+        return self.get_serializer_class()(*args, **kwargs)
+
+    async def authenticate(self, request):
+        """Return the (user, authenticator) pair, trying each class in order"""
+        with timed("auth"):
+            for authenticator in self.get_authenticators():
+                if hasattr(authenticator, "aauthenticate"):
+                    result = await authenticator.aauthenticate(request)
+                else:
+                    result = await sync_to_async(authenticator.authenticate)(request)
+                if result is not None:
+                    return result[0], authenticator
+        return AnonymousUser(), None
+
+    async def check_permissions(self, request):
+        for permission in self.get_permissions():
+            if not await permission.ahas_permission(request, self):
+                self.permission_denied(request, permission)
+
+    async def check_object_permissions(self, request, obj):
+        for permission in self.get_permissions():
+            if not await permission.ahas_object_permission(request, self, obj):
+                self.permission_denied(request, permission)
+
+    def permission_denied(self, request, permission):
+        if self.successful_authenticator is None:
+            raise exceptions.NotAuthenticated()
+        raise exceptions.PermissionDenied(
+            getattr(permission, "message", None), getattr(permission, "code", None)
+        )
+
+    async def aget_object(self, request, pk):
+        try:
+            task = await self.filter_queryset(self.get_queryset(request)).aget(pk=pk)
+        except TaskModel.DoesNotExist:
+            raise Http404
+        await self.check_object_permissions(request, task)
+        return task
+
+    def parse(self, request):
+        parsers = [parser() for parser in api_settings.DEFAULT_PARSER_CLASSES]
+        return Request(request, parsers=parsers).data
+
+    def render(self, data, status_code=status.HTTP_200_OK, headers=None):
+        content = b"" if data is None else self.renderer.render(data)
+        response = HttpResponse(
+            content, status=status_code, content_type=self.renderer.media_type
+        )
+        if not content:
+            del response["Content-Type"]
+        for header, value in (headers or {}).items():
+            response[header] = value
+        return response
+
+    def handle_exception(self, request, exc):
+        if isinstance(
+            exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+        ):
+            authenticators = self.get_authenticators()
+            header = authenticators[0].authenticate_header(request)
+            if header:
+                exc.auth_header = header
+            else:
+                exc.status_code = status.HTTP_403_FORBIDDEN
+
+        response = exception_handler(exc, {"view": self, "request": request})
+        if response is None:
+            raise exc
+        headers = {
+            header: response[header]
+            for header in ("WWW-Authenticate", "Retry-After")
+            if header in response
+        }
+        return self.render(response.data, response.status_code, headers)
+
+    def get_not_modified_response(self, request, etag, last_modified):
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None and response.status_code == 304:
+            for header, value in get_validator_headers(etag, last_modified).items():
+                response[header] = value
+        return response
+
+    async def cached_get(self, request, validator_queryset, detail, build):
+        """Serve a GET from the response cache, a 304 or ``await build()``"""
+        # The shared cache may be the database, which the loop cannot query.
+        cache = get_cache()
+        key = await sync_to_async(response_cache_key)(request, self.renderer.media_type)
+        entry = await cache.aget(key)
+        await sync_to_async(record_lookup)(entry is not None)
+        if entry is not None:
+            headers = entry["headers"]
+            response = self.get_not_modified_response(
+                request,
+                headers.get("ETag"),
+                parse_http_date_safe(headers.get("Last-Modified", "")),
+            )
+            return response or self.render(entry["data"], headers=headers)
+
+        if detail:
+            state = await validator_queryset.order_by().aaggregate(
+                **validator_aggregates()
+            )
+        else:
+            state = await validator_queryset.afirst() or EMPTY_LIST_STATE
+        etag, last_modified = make_validators(
+            request, state, self.renderer.media_type, detail
+        )
+        response = self.get_not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        data = await build()
+        headers = get_validator_headers(etag, last_modified)
+        await cache.aset(
+            key,
+            {"data": data, "headers": headers},
+            getattr(settings, "TASKS_CACHE_TIMEOUT", 300),
+        )
+        return self.render(data, headers=headers)
+
+
+class AsyncTaskListView(SparseFieldsMixin, AsyncTaskAPIView):
+    """Async list and create, answering like TaskModelViewSet"""
+
+    http_method_names = ["get", "post", "head"]
+
+    async def get(self, request, *args, **kwargs):
+        return await self.cached_get(
+            request,
+            list_validator_queryset(request.user.pk),
+            False,
+            lambda: self.alist(request),
+        )
+
+    async def alist(self, request):
+        queryset = self.filter_queryset(self.get_queryset(request))
+        values_serializer = self.get_values_serializer()
+        paginator = TaskCursorPagination()
+
+        term = request.GET.get(self.search_param, "").strip()
+        if term:
+            limit = paginator.get_page_size(self.request)
+            ids = await sync_to_async(search_task_ids)(
+                request.user, queryset, term, limit
+            )
+            columns = tuple(dict.fromkeys(values_serializer.columns + ("id",)))
+            rows = {
+                row["id"]: row
+                async for row in queryset.filter(id__in=ids).values(*columns)
+            }
+            results = values_serializer.many(rows[pk] for pk in ids if pk in rows)
+            return {"next": None, "previous": None, "results": results}
+
+        # The paginator reads its cursor position from the rows.
+        columns = tuple(dict.fromkeys(values_serializer.columns + paginator.ordering))
+        rows = queryset.values(*columns)
+        page = await paginator.apaginate_queryset(rows, self.request, view=self)
+        if page is None:
+            return values_serializer.many([row async for row in rows])
+        return paginator.get_paginated_response(values_serializer.many(page)).data
+
+    async def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=self.parse(request))
+        serializer.is_valid(raise_exception=True)
+        serializer.instance = await TaskModel.objects.acreate(
+            user_id=request.user.pk, **serializer.validated_data
+        )
+        return self.render(serializer.data, status.HTTP_201_CREATED)
+
+
+class AsyncTaskDetailView(SparseFieldsMixin, AsyncTaskAPIView):
+    """Async retrieve, update and destroy, answering like TaskModelViewSet"""
+
+    http_method_names = ["get", "put", "patch", "delete", "head"]
+    required_columns = ("user",)
+
+    async def get(self, request, pk, *args, **kwargs):
+        async def retrieve():
+            task = await self.aget_object(request, pk)
+            return self.get_serializer(task).data
+
+        return await self.cached_get(
+            request, self.get_queryset(request).filter(pk=pk), True, retrieve
+        )
+
+    async def put(self, request, pk, *args, **kwargs):
+        return await self.update(request, pk, partial=False)
+
+    async def patch(self, request, pk, *args, **kwargs):
+        return await self.update(request, pk, partial=True)
+
+    async def update(self, request, pk, partial):
+        task = await self.aget_object(request, pk)
+        serializer = self.serializer_class(
+            task, data=self.parse(request), partial=partial
+        )
+        serializer.is_valid(raise_exception=True)
+        # Model.asave() only arrives with Django 4.2; save() must still run so
+        # the post_save receivers (cache, change log, search index) fire.
+        await sync_to_async(serializer.save)()
+        return self.render(serializer.data)
+
+    async def delete(self, request, pk, *args, **kwargs):
+        task = await self.aget_object(request, pk)
+        await self.get_queryset(request).filter(pk=task.pk).adelete()
+        return self.render(None, status.HTTP_204_NO_CONTENT)
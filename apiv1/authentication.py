@@ -0,0 +1,353 @@
+import copy
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    BasicAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+
+from .metrics import inc
+from .timing import timed
+from .tokens import ACCESS, InvalidToken, decode_token
+
+TOKEN_CACHE_PREFIX = "auth:token:"
+BASIC_CACHE_PREFIX = "auth:basic:"
+AUTH_LOOKUPS = "tasks_auth_cache_lookups_total"
+BASIC_ATTEMPTS_PREFIX = "auth:basic-attempts:"
+USER_GENERATION_PREFIX = "auth:user-generation:"
+
+
+class LocalLRUCache:
+    """Small thread-safe in-process LRU with a per-entry TTL"""
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_tokens = LocalLRUCache(
+    maxsize=getattr(settings, "AUTH_TOKEN_LOCAL_CACHE_SIZE", 1024),
+    timeout=getattr(settings, "AUTH_TOKEN_LOCAL_CACHE_TIMEOUT", 5),
+)
+
+token_cache_stats = {"hits": 0, "misses": 0}
+basic_auth_stats = {"hits": 0, "hashes": 0, "hash_seconds": 0.0, "throttled": 0}
+
+
+def get_auth_cache():
+    return caches[getattr(settings, "AUTH_TOKEN_CACHE_ALIAS", "default")]
+
+
+def token_digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    """Forget the cached resolution of a token key"""
+    digest = token_digest(key)
+    local_tokens.delete(digest)
+    get_auth_cache().delete(TOKEN_CACHE_PREFIX + digest)
+
+
+def clear_token_cache():
+    local_tokens.clear()
+
+
+def get_user_generation(user_id):
+    return get_auth_cache().get(USER_GENERATION_PREFIX + str(user_id), 0)
+
+
+def bump_user_generation(user_id):
+    """Invalidate every cached Basic credential of a user"""
+    cache = get_auth_cache()
+    key = USER_GENERATION_PREFIX + str(user_id)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def auth_stats():
+    return {"token": dict(token_cache_stats), "basic": dict(basic_auth_stats)}
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication with the token -> user lookup cached.
+
+    An in-process LRU sits in front of the shared Django cache (Redis, or
+    the database cache table), so steady state requests run no auth query.
+    Entries are dropped from the shared cache by the signal handlers in
+    apiv1.signals on logout, token deletion and user changes; the LRU of the
+    other processes keeps them for up to AUTH_TOKEN_LOCAL_CACHE_TIMEOUT.
+    """
+
+    @timed("auth")
+    def authenticate(self, request):
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        digest = token_digest(key)
+        entry = self.get_cached(digest)
+        if entry is None:
+            entry = super().authenticate_credentials(key)
+            self.set_cached(digest, entry)
+        return self.check_entry(entry)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views; a cache miss uses the async ORM"""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        # Same checks and messages as TokenAuthentication.authenticate().
+        if len(auth) == 1:
+            msg = _("Invalid token header. No credentials provided.")
+            raise exceptions.AuthenticationFailed(msg)
+        elif len(auth) > 2:
+            msg = _("Invalid token header. Token string should not contain spaces.")
+            raise exceptions.AuthenticationFailed(msg)
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            msg = _(
+                "Invalid token header. "
+                "Token string should not contain invalid characters."
+            )
+            raise exceptions.AuthenticationFailed(msg)
+
+        digest = token_digest(key)
+        # The shared cache may be the database, which the loop cannot query.
+        entry = await sync_to_async(self.get_cached)(digest)
+        if entry is None:
+            model = self.get_model()
+            try:
+                token = await model.objects.select_related("user").aget(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            entry = token.user, token
+            await sync_to_async(self.set_cached)(digest, entry)
+        return self.check_entry(entry)
+
+    def get_cached(self, digest):
+        entry = local_tokens.get(digest)
+        if entry is None:
+            entry = get_auth_cache().get(TOKEN_CACHE_PREFIX + digest)
+            if entry is None:
+                token_cache_stats["misses"] += 1
+                inc(AUTH_LOOKUPS, (("cache", "token"), ("result", "miss")))
+                return None
+            local_tokens.set(digest, entry)
+        token_cache_stats["hits"] += 1
+        inc(AUTH_LOOKUPS, (("cache", "token"), ("result", "hit")))
+        return entry
+
+    def set_cached(self, digest, entry):
+        get_auth_cache().set(
+            TOKEN_CACHE_PREFIX + digest,
+            entry,
+            getattr(settings, "AUTH_TOKEN_CACHE_TIMEOUT", 300),
+        )
+        local_tokens.set(digest, entry)
+
+    def check_entry(self, entry):
+        user, token = entry
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        # Views may mutate request.user; keep the cached instance pristine.
+        return copy.copy(user), token
+
+
+class ClaimsUser(SimpleLazyObject):
+    """request.user of a signed access token.
+
+    The id, username, email and staff flag are answered from the claims
+    without a query. Anything else, a save included, loads the real user
+    first, so a view writing request.user never writes the claims over it.
+    """
+
+    claimed = {
+        "pk": "user_id",
+        "id": "user_id",
+        "username": "username",
+        "email": "email",
+        "is_staff": "is_staff",
+    }
+
+    def __init__(self, claims):
+        def load():
+            try:
+                return get_user_model()._default_manager.get(pk=claims["user_id"])
+            except get_user_model().DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        super().__init__(load)
+        self.__dict__["_claims"] = claims
+
+    def __getattr__(self, name):
+        if self._wrapped is empty:
+            if name in self.claimed:
+                return self._claims[self.claimed[name]]
+            if name in ("is_authenticated", "is_active"):
+                return True
+            if name == "is_anonymous":
+                return False
+        return super().__getattr__(name)
+
+    def __copy__(self):
+        if self._wrapped is empty:
+            return type(self)(self._claims)
+        return copy.copy(self._wrapped)
+
+    def __deepcopy__(self, memo):
+        if self._wrapped is empty:
+            return type(self)(copy.deepcopy(self._claims, memo))
+        return copy.deepcopy(self._wrapped, memo)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """Stateless "Bearer <access token>" authentication, enabled by USE_JWT.
+
+    The signature and expiry are checked locally, revocations in the shared
+    cache (see tokens.is_denied) and request.user answers from the token
+    claims (see ClaimsUser), so no query is made. A deactivated user keeps
+    access until their short-lived access token expires.
+    """
+
+    keyword = "Bearer"
+
+    @timed("auth")
+    def authenticate(self, request):
+        if not getattr(settings, "USE_JWT", False):
+            return None
+
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_("Invalid token header."))
+
+        try:
+            claims = decode_token(auth[1].decode(), ACCESS)
+        except (InvalidToken, UnicodeError):
+            raise exceptions.AuthenticationFailed(_("Token is invalid or expired."))
+
+        return ClaimsUser(claims), claims
+
+    async def aauthenticate(self, request):
+        # The denylist lookup is a blocking call to the shared cache.
+        return await sync_to_async(self.authenticate)(request)
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """BasicAuthentication that hashes a password once per credential TTL.
+
+    A verified username/password pair is remembered under an HMAC of the
+    pair keyed with SECRET_KEY, never the plaintext, so repeat calls skip the
+    PBKDF2 check. Entries die with the user's generation, which is bumped on
+    every user save (password change, deactivation). Hashing is limited per
+    account to BASIC_AUTH_RATE_LIMIT attempts every BASIC_AUTH_RATE_WINDOW
+    seconds. Generations and attempt counts are kept in the shared cache, so
+    every worker drops an old password and counts towards the same limit.
+    """
+
+    @timed("auth")
+    def authenticate(self, request):
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, userid, password, request=None):
+        fingerprint = hmac.new(
+            settings.SECRET_KEY.encode(),
+            f"{userid}\0{password}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        cache = get_auth_cache()
+        entry = cache.get(BASIC_CACHE_PREFIX + fingerprint)
+        if entry is not None:
+            user, generation = entry
+            if generation == get_user_generation(user.pk) and user.is_active:
+                basic_auth_stats["hits"] += 1
+                inc(AUTH_LOOKUPS, (("cache", "basic"), ("result", "hit")))
+                return user, None
+
+        self.check_rate(userid)
+        # CPU seconds of this thread: the hash, not the wait for the user row.
+        start = time.thread_time()
+        try:
+            user, auth = super().authenticate_credentials(userid, password, request)
+        finally:
+            basic_auth_stats["hashes"] += 1
+            inc(AUTH_LOOKUPS, (("cache", "basic"), ("result", "miss")))
+            basic_auth_stats["hash_seconds"] += time.thread_time() - start
+
+        cache.set(
+            BASIC_CACHE_PREFIX + fingerprint,
+            (user, get_user_generation(user.pk)),
+            getattr(settings, "BASIC_AUTH_CACHE_TIMEOUT", 60),
+        )
+        return user, auth
+
+    def check_rate(self, userid):
+        cache = get_auth_cache()
+        window = getattr(settings, "BASIC_AUTH_RATE_WINDOW", 60)
+        # The window is part of the key: BaseCache.incr() (database and file
+        # caches) sets the default timeout again, so expiry can't end it.
+        key = "{}{}:{}".format(
+            BASIC_ATTEMPTS_PREFIX,
+            hashlib.sha256(userid.encode()).hexdigest(),
+            int(time.time() // window),
+        )
+        if cache.add(key, 1, window):
+            return
+        try:
+            attempts = cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, window)
+            return
+        if attempts > getattr(settings, "BASIC_AUTH_RATE_LIMIT", 10):
+            basic_auth_stats["throttled"] += 1
+            raise exceptions.Throttled(wait=window)
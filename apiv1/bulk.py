@@ -0,0 +1,38 @@
+from django.db import connections
+from django.db.models import Max
+
+from tasks.models import TaskModel
+from tasks.sharding import assign_task_ids
+from tasks.signals import tasks_bulk_changed
+
+
+def bulk_insert(queryset, tasks, batch_size=None):
+    """bulk_create ``tasks`` and return them with primary keys set.
+
+    ``queryset`` is the owner's task queryset; it picks the database and is
+    used to read the rows back where the backend cannot return them.
+    """
+    manager = TaskModel.objects.using(queryset.db)
+    # Sharded tasks get their ids before the INSERT.
+    assign_task_ids(tasks)
+    if connections[queryset.db].features.can_return_rows_from_bulk_insert or all(
+        task.pk is not None for task in tasks
+    ):
+        return manager.bulk_create(tasks, batch_size=batch_size)
+
+    # MySQL does not hand back primary keys from a multi-row INSERT, so the
+    # new rows are read back by id; callers run this inside a transaction.
+    last_id = queryset.aggregate(last=Max("id"))["last"] or 0
+    manager.bulk_create(tasks, batch_size=batch_size)
+    return list(queryset.filter(id__gt=last_id).order_by("id")[: len(tasks)])
+
+
+def send_bulk_changed(user_id, using, created=(), updated=(), deleted=()):
+    tasks_bulk_changed.send(
+        sender=TaskModel,
+        user_id=user_id,
+        using=using,
+        created=list(created),
+        updated=list(updated),
+        deleted=list(deleted),
+    )
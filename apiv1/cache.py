@@ -0,0 +1,120 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .metrics import collect, inc, series_key
+
+LOOKUPS = "tasks_response_cache_lookups_total"
+
+
+def get_cache():
+    return caches[getattr(settings, "TASKS_CACHE_ALIAS", "default")]
+
+
+def _version_key(user_id):
+    return f"tasks:version:{user_id}"
+
+
+def get_user_version(user_id):
+    """Current cache generation of a user's task responses.
+
+    Kept in the shared cache, so a bump is seen by every worker at once; a
+    process-local TASKS_CACHE_ALIAS is reported by apiv1.checks.
+    """
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seeded from the clock so an evicted counter never restarts at a
+        # generation whose responses may still be cached.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_user_tasks(user_id):
+    """Drop every cached task response of a user by bumping their generation"""
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.add(_version_key(user_id), time.time_ns(), None)
+
+
+def record_lookup(hit):
+    inc(LOOKUPS, (("result", "hit" if hit else "miss"),))
+
+
+def response_cache_key(request, media_type):
+    """Cache key of the response to ``request`` for the authenticated user"""
+    user_id = request.user.pk
+    digest = hashlib.sha1(
+        f"{request.get_full_path()}|{media_type}".encode()
+    ).hexdigest()
+    return f"tasks:response:{user_id}:{get_user_version(user_id)}:{digest}"
+
+
+def cache_stats():
+    """Lookups counted in the metrics stores, of every worker with METRICS_DIR"""
+    totals = collect()
+    hits = int(totals.get(series_key(LOOKUPS, (("result", "hit"),)), 0))
+    misses = int(totals.get(series_key(LOOKUPS, (("result", "miss"),)), 0))
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
+
+
+class CachedResponseMixin:
+    """Per-user cache of list and retrieve responses.
+
+    Entries are keyed by the user's generation counter, the full path and the
+    negotiated media type, so a hit needs no SQL at all. Must come before
+    ConditionalGetMixin so cached validators answer conditional requests too.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_key(self, request):
+        return response_cache_key(request, request.accepted_media_type)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        entry = cache.get(key)
+        record_lookup(entry is not None)
+        if entry is not None:
+            headers = entry["headers"]
+            response = self.get_not_modified_response(
+                request,
+                headers.get("ETag"),
+                parse_http_date_safe(headers.get("Last-Modified", "")),
+            )
+            if response is not None:
+                return response
+            return Response(entry["data"], status=status.HTTP_200_OK, headers=headers)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            headers = {
+                header: response[header]
+                for header in ("ETag", "Last-Modified")
+                if header in response
+            }
+            cache.set(
+                key,
+                {"data": response.data, "headers": headers},
+                getattr(settings, "TASKS_CACHE_TIMEOUT", 300),
+            )
+        return response
@@ -0,0 +1,137 @@
+from base64 import b64decode, b64encode
+from datetime import timedelta
+from urllib import parse
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from tasks.models import TaskChange
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "The sync cursor expired, fetch the full task list again."
+    default_code = "cursor_expired"
+
+
+def get_retention():
+    return timedelta(seconds=getattr(settings, "TASKS_CHANGES_RETENTION", 30 * 86400))
+
+
+def get_safety_window():
+    return timedelta(seconds=getattr(settings, "TASKS_CHANGES_SAFETY_WINDOW", 30))
+
+
+def record_changes(user_id, task_ids, using, deleted=False):
+    """Append change log rows for ``task_ids`` of a user"""
+    TaskChange.objects.using(using).bulk_create(
+        TaskChange(user_id=user_id, task_id=pk, deleted=deleted) for pk in task_ids
+    )
+
+
+def encode_cursor(sequence, synced_at, shard):
+    tokens = {"s": str(sequence), "t": synced_at.isoformat(), "d": shard}
+    return b64encode(parse.urlencode(tokens).encode("ascii")).decode("ascii")
+
+
+def decode_cursor(encoded, shard):
+    """Return the (sequence, synced_at) pair of a cursor sent by a client.
+
+    ``synced_at`` is when the client was last fully caught up. Past the
+    retention, tombstones it has not seen may have been compacted, so the
+    client has to start over; likewise after their tasks moved to another
+    shard, whose log has its own sequence.
+    """
+    try:
+        querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+        tokens = parse.parse_qs(querystring, keep_blank_values=True)
+        sequence = int(tokens["s"][0])
+        synced_at = parse_datetime(tokens["t"][0])
+        cursor_shard = tokens.get("d", [DEFAULT_DB_ALIAS])[0]
+        if synced_at is None or timezone.is_naive(synced_at) or sequence < 0:
+            raise ValueError()
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise ValidationError({"since": ["Invalid cursor."]})
+
+    if cursor_shard != shard or synced_at < timezone.now() - get_retention():
+        raise CursorExpired()
+    return sequence, synced_at
+
+
+def read_changes(user, since, limit, using):
+    """Collapse the next ``limit`` log rows of a user after ``since``.
+
+    Returns the ids changed and deleted (the last entry of a task wins), the
+    sequence number to continue from and whether more rows are waiting.
+    """
+    # Sequence numbers are handed out at insert time but rows become visible
+    # at commit, so a row of a transaction still open may appear later below
+    # rows already read. The sequence stays behind rows younger than
+    # TASKS_CHANGES_SAFETY_WINDOW, which are sent again by the next call, so
+    # such a row is never skipped as long as transactions are shorter.
+    rows = list(
+        TaskChange.objects.using(using)
+        .filter(user_id=user.pk, id__gt=since)
+        .order_by("id")
+        .values_list("id", "task_id", "deleted", "changed_at")[: limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest = {}
+    for _, task_id, deleted, _ in rows:
+        latest.pop(task_id, None)
+        latest[task_id] = deleted
+    changed = [pk for pk, deleted in latest.items() if not deleted]
+    deleted = [pk for pk, deleted in latest.items() if deleted]
+
+    settled = timezone.now() - get_safety_window()
+    sequence = since
+    for pk, _, _, changed_at in rows:
+        if changed_at > settled:
+            # Everything after is as young: nothing more to page through now.
+            has_more = False
+            break
+        sequence = pk
+    return changed, deleted, sequence, has_more
+
+
+def compact_changes(using, batch_size, retention=None):
+    """Drop superseded log rows and expired tombstones, walking the log by id.
+
+    Returns the number of rows deleted.
+    """
+    if retention is None:
+        retention = get_retention()
+    cutoff = timezone.now() - retention
+    log = TaskChange.objects.using(using)
+    last_id, removed = 0, 0
+    while True:
+        batch = list(
+            log.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "task_id", "deleted", "changed_at")[:batch_size]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        latest = dict(
+            log.filter(task_id__in={row[1] for row in batch})
+            .values("task_id")
+            .annotate(last=Max("id"))
+            .values_list("task_id", "last")
+        )
+        stale = [
+            pk
+            for pk, task_id, deleted, changed_at in batch
+            if pk < latest[task_id] or (deleted and changed_at < cutoff)
+        ]
+        if stale:
+            removed += log.filter(id__in=stale).delete()[0]
+    return removed
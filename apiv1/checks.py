@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_BACKENDS = ("django.core.cache.backends.locmem.LocMemCache",)
+
+# Aliases of the cache holding state every worker must agree on: response
+# generations, token lookups and the denylist, shard routes and replica pins.
+SHARED_CACHE_SETTINGS = (
+    "TASKS_CACHE_ALIAS",
+    "AUTH_TOKEN_CACHE_ALIAS",
+    "TASK_SHARD_CACHE_ALIAS",
+)
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    aliases = {"default"}
+    aliases.update(getattr(settings, name, "default") for name in SHARED_CACHE_SETTINGS)
+    warnings = []
+    for alias in sorted(aliases):
+        backend = settings.CACHES.get(alias, {}).get("BACKEND")
+        if backend in PROCESS_LOCAL_BACKENDS:
+            warnings.append(
+                Warning(
+                    f"The {alias!r} cache is local to each process.",
+                    hint=(
+                        "Other workers would serve stale task responses and "
+                        "accept revoked tokens. Set REDIS_URL unless a single "
+                        "process serves the API."
+                    ),
+                    obj=alias,
+                    id="apiv1.W001",
+                )
+            )
+    return warnings
@@ -0,0 +1,122 @@
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, F, Max, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from tasks.models import TaskUserStats
+
+# The validator state of a user without a stats row: nothing written yet.
+EMPTY_LIST_STATE = {"count": 0, "updated": None}
+
+
+def validator_aggregates():
+    """Validator state of a single task"""
+    return {"updated": Max("updated_at"), "count": Count("id"), "ids": Sum("id")}
+
+
+def list_validator_queryset(user_id):
+    """Validator state of a user's task lists: their stats row.
+
+    Every task write updates its total and last_activity in the write's
+    transaction (see apiv1.stats), so a list costs a primary key lookup
+    instead of an aggregate over all of the user's tasks.
+    """
+    return (
+        TaskUserStats.objects.db_manager(hints={"user_id": user_id})
+        .filter(user_id=user_id)
+        .values(count=F("total"), updated=F("last_activity"))
+    )
+
+
+def make_validators(request, state, media_type, detail):
+    """Return the (etag, last_modified) pair from a validator state"""
+    updated = state["updated"]
+    fingerprint = "|".join(
+        [
+            str(request.user.pk),
+            *(f"{name}={state[name]}" for name in sorted(state)),
+            request.get_full_path(),
+            media_type or "",
+        ]
+    )
+    etag = quote_etag(hashlib.sha1(fingerprint.encode()).hexdigest())
+
+    # A deletion leaves max(updated_at) untouched, so only single objects
+    # get a Last-Modified; lists rely on the ETag, which covers deletes.
+    last_modified = None
+    if updated is not None and detail:
+        last_modified = timegm(updated.utctimetuple())
+    return etag, last_modified
+
+
+def get_validator_headers(etag, last_modified):
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+class ConditionalGetMixin:
+    """Conditional GETs for list and retrieve.
+
+    The validators of a task come from an aggregate over its row (updated_at,
+    count and id), those of a list from the user's stats row, so a 304
+    costs that single query and never touches the serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def get_validator_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        return queryset
+
+    def get_validators(self, request):
+        """Return the (etag, last_modified) pair for the current request"""
+        if self.detail:
+            state = (
+                self.get_validator_queryset()
+                .order_by()
+                .aggregate(**validator_aggregates())
+            )
+        else:
+            state = list_validator_queryset(request.user.pk).first() or EMPTY_LIST_STATE
+        return make_validators(request, state, request.accepted_media_type, self.detail)
+
+    def get_validator_headers(self, etag, last_modified):
+        return get_validator_headers(etag, last_modified)
+
+    def get_not_modified_response(self, request, etag, last_modified):
+        """Return a 304 (or 412) when the client's copy is current, else None"""
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None and response.status_code == 304:
+            headers = self.get_validator_headers(etag, last_modified)
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return response
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = self.get_not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            headers = self.get_validator_headers(etag, last_modified)
+            for header, value in headers.items():
+                response[header] = value
+        return response
@@ -0,0 +1,113 @@
+import csv
+import json
+import zlib
+
+from django.db.models import Q
+from rest_framework.renderers import BaseRenderer
+
+from .serializers import ValuesSerializer
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only error bodies are rendered; exports stream their own content.
+        if data is None:
+            return b""
+        return json.dumps(data, ensure_ascii=False).encode() + b"\n"
+
+
+class CSVRenderer(NDJSONRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def iter_keyset(queryset, columns, chunk_size):
+    """Yield ``.values()`` rows in (created_at, id) order, one bounded query per chunk.
+
+    Each chunk restarts after the last row seen instead of holding a cursor
+    open, so memory stays flat even where the driver buffers whole results.
+    """
+    columns = tuple(dict.fromkeys(columns + ("created_at", "id")))
+    queryset = queryset.order_by("created_at", "id").values(*columns)
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            chunk = chunk.filter(
+                Q(created_at__gt=last["created_at"])
+                | Q(created_at=last["created_at"], id__gt=last["id"])
+            )
+        rows = list(chunk[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
+
+
+def export_lines(queryset, serializer_class, export_format, chunk_size):
+    """Yield the encoded export, one bytes chunk per database chunk"""
+    values_serializer = ValuesSerializer(serializer_class)
+    rows = iter_keyset(queryset, values_serializer.columns, chunk_size)
+    items = values_serializer.iter(rows)
+
+    if export_format == "csv":
+        writer = csv.writer(_Echo())
+        buffer = [writer.writerow(list(values_serializer.fields))]
+
+        def encode(item):
+            return writer.writerow(
+                ["" if value is None else value for value in item.values()]
+            )
+
+    else:
+        buffer = []
+
+        def encode(item):
+            return json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    for item in items:
+        buffer.append(encode(item))
+        if len(buffer) >= chunk_size:
+            yield "".join(buffer).encode()
+            buffer = []
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip, honouring ``q=0``"""
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, *params = [part.strip() for part in coding.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+    for name in ("gzip", "x-gzip", "*"):
+        if name in qualities:
+            return qualities[name] > 0
+    return False
+
+
+def gzip_stream(chunks):
+    """Compress a byte stream on the fly, flushing after every chunk"""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
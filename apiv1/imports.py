@@ -0,0 +1,120 @@
+import csv
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from tasks.models import TaskModel
+
+from .bulk import bulk_insert, send_bulk_changed
+from .serializers import TaskModelSerializer
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+
+def guess_format(filename):
+    return "csv" if filename and filename.lower().endswith(".csv") else "ndjson"
+
+
+def iter_lines(stream):
+    """Yield (line number, text, decode error) for each line of a binary upload.
+
+    Lines are decoded one by one, so an invalid byte only fails its own row.
+    """
+    for number, line in enumerate(stream, start=1):
+        try:
+            # utf-8-sig drops the byte order mark some editors write first.
+            text = line.decode("utf-8-sig" if number == 1 else "utf-8")
+        except UnicodeDecodeError as exc:
+            yield number, None, {"non_field_errors": [f"Invalid UTF-8: {exc}"]}
+        else:
+            yield number, text, None
+
+
+def iter_csv_records(stream):
+    """iter_records() for CSV; rows are numbered by the line they end on"""
+    decode_errors = []
+    last_line = 0
+
+    def lines():
+        nonlocal last_line
+        for number, text, error in iter_lines(stream):
+            if error is not None:
+                decode_errors.append((number, None, error))
+                continue
+            last_line = number
+            yield text
+
+    reader = csv.DictReader(lines())
+    while True:
+        try:
+            record, error = next(reader), None
+        except StopIteration:
+            break
+        except csv.Error as exc:
+            record, error = None, {"non_field_errors": [f"Invalid CSV: {exc}"]}
+        yield from decode_errors
+        decode_errors.clear()
+        yield last_line, record, error
+    yield from decode_errors
+
+
+def iter_records(stream, import_format):
+    """Yield (row number, record, parse error) from a binary upload, line by line"""
+    if import_format == "csv":
+        yield from iter_csv_records(stream)
+        return
+
+    for number, line, error in iter_lines(stream):
+        if error is not None:
+            yield number, None, error
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield number, None, {"non_field_errors": [f"Invalid JSON: {exc}"]}
+        else:
+            yield number, record, None
+
+
+def import_tasks(user, stream, import_format, chunk_size=1000, max_errors=100):
+    """Validate and insert tasks from an NDJSON or CSV stream, chunk by chunk.
+
+    Each chunk is inserted with bulk_create in its own transaction, so a bad
+    row is reported instead of aborting the import and memory use depends on
+    ``chunk_size``, not on the size of the upload.
+    """
+    queryset = TaskModel.objects.for_user(user.pk)
+    validator = TaskModelSerializer()
+    summary = {"created": 0, "failed": 0, "errors": []}
+
+    def report(number, errors):
+        summary["failed"] += 1
+        if len(summary["errors"]) < max_errors:
+            summary["errors"].append({"row": number, "errors": errors})
+
+    def flush(tasks):
+        with transaction.atomic(using=queryset.db):
+            created = bulk_insert(queryset, tasks)
+            send_bulk_changed(user.pk, queryset.db, created=[t.id for t in created])
+        summary["created"] += len(created)
+
+    chunk = []
+    for number, record, error in iter_records(stream, import_format):
+        if error is None:
+            try:
+                chunk.append(
+                    TaskModel(user_id=user.pk, **validator.run_validation(record))
+                )
+            except serializers.ValidationError as exc:
+                error = exc.detail
+        if error is not None:
+            report(number, error)
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+    return summary
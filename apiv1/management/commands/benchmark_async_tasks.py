@@ -0,0 +1,124 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from tasks.models import TaskModel
+
+BENCH_USERNAME = "bench-async@example.com"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures concurrent-client throughput of the task list and detail "
+        "endpoints: TaskModelViewSet through the WSGI handler on a thread per "
+        "client, and the async views through the ASGI handler on one event "
+        "loop. Both run in-process without a network server, against a "
+        "development database. Every request misses the response cache "
+        "unless --cached is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=20, help="Per client.")
+        parser.add_argument("--tasks", type=int, default=200)
+        parser.add_argument("--cached", action="store_true")
+
+    def handle(self, *args, **options):
+        self.cached = options["cached"]
+        auth, task_id = self.seed(options["tasks"])
+        clients, requests = options["clients"], options["requests"]
+
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        with override_settings(ALLOWED_HOSTS=hosts):
+            for label, prefix, run in (
+                ("wsgi", "", self.run_sync),
+                ("asgi", "async-", self.run_async),
+            ):
+                start = time.perf_counter()
+                timings, errors = run(prefix, auth, task_id, clients, requests)
+                self.report(label, timings, errors, time.perf_counter() - start)
+
+    def seed(self, count):
+        user, _ = get_user_model().objects.get_or_create(
+            username=BENCH_USERNAME, defaults={"email": BENCH_USERNAME}
+        )
+        token, _ = Token.objects.get_or_create(user=user)
+        tasks = TaskModel.objects.for_user(user.pk)
+        missing = count - tasks.count()
+        if missing > 0:
+            tasks.bulk_create(
+                TaskModel(user=user, title=f"task {n}", description="benchmark task")
+                for n in range(missing)
+            )
+        return f"Token {token.key}", tasks.values_list("id", flat=True).first()
+
+    def get_requests(self, prefix, task_id, client_number, requests):
+        """Alternate list and detail calls; a unique parameter skips the cache"""
+        urls = (
+            reverse(f"{prefix}tasks-list"),
+            reverse(f"{prefix}tasks-detail", kwargs={"pk": task_id}),
+        )
+        for n in range(requests):
+            params = {} if self.cached else {"bench": f"{client_number}-{n}"}
+            yield urls[n % 2], params
+
+    def run_sync(self, prefix, auth, task_id, clients, requests):
+        def worker(client_number):
+            client = Client(HTTP_AUTHORIZATION=auth)
+            timings, errors = [], 0
+            try:
+                for url, params in self.get_requests(
+                    prefix, task_id, client_number, requests
+                ):
+                    start = time.perf_counter()
+                    response = client.get(url, params)
+                    timings.append(time.perf_counter() - start)
+                    errors += response.status_code != 200
+            finally:
+                connections.close_all()
+            return timings, errors
+
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            results = list(executor.map(worker, range(clients)))
+        return self.merge(results)
+
+    def run_async(self, prefix, auth, task_id, clients, requests):
+        async def worker(client_number):
+            client = AsyncClient()
+            timings, errors = [], 0
+            for url, params in self.get_requests(
+                prefix, task_id, client_number, requests
+            ):
+                start = time.perf_counter()
+                response = await client.get(url, params, authorization=auth)
+                timings.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+            return timings, errors
+
+        async def main():
+            return await asyncio.gather(*(worker(n) for n in range(clients)))
+
+        return self.merge(asyncio.run(main()))
+
+    def merge(self, results):
+        timings = sorted(t for client_timings, _ in results for t in client_timings)
+        return timings, sum(errors for _, errors in results)
+
+    def report(self, label, timings, errors, seconds):
+        def percentile(p):
+            return timings[min(int(len(timings) * p), len(timings) - 1)] * 1000
+
+        self.stdout.write(
+            f"{label}: {len(timings)} requests in {seconds:.2f} s, "
+            f"{len(timings) / seconds:8.1f} req/s, "
+            f"p50 {percentile(0.5):.1f} ms, p99 {percentile(0.99):.1f} ms, "
+            f"{errors} errors"
+        )
@@ -0,0 +1,109 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.models import TaskModel
+
+BENCH_USER_PREFIX = "bench-user-"
+COMPOSITE_INDEXES = ("task_user_created_idx", "task_user_updated_idx")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds tasks and reports query plans and latencies of the per-user "
+        "task listings. Use --compare on a development database to measure "
+        "them without the composite indexes first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Drop the composite indexes, measure, recreate them, measure.",
+        )
+
+    def handle(self, *args, **options):
+        self.database = options["database"]
+        self.repeat = options["repeat"]
+        users = self.seed(options["rows"], options["users"], options["batch_size"])
+        user = users[len(users) // 2]
+
+        if options["compare"]:
+            # Only these two indexes: other tables and data stay as they are.
+            indexes = [
+                index
+                for index in TaskModel._meta.indexes
+                if index.name in COMPOSITE_INDEXES
+            ]
+            with connections[self.database].schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(TaskModel, index)
+            try:
+                self.report("without composite indexes", user)
+            finally:
+                with connections[self.database].schema_editor() as editor:
+                    for index in indexes:
+                        editor.add_index(TaskModel, index)
+        self.report("with composite indexes", user)
+
+    def seed(self, rows, user_count, batch_size):
+        MyUser = get_user_model()
+        users = []
+        for i in range(user_count):
+            username = f"{BENCH_USER_PREFIX}{i}@example.com"
+            user, _ = MyUser.objects.using(self.database).get_or_create(
+                username=username, defaults={"email": username}
+            )
+            users.append(user)
+
+        existing = (
+            TaskModel.objects.using(self.database)
+            .filter(user__username__startswith=BENCH_USER_PREFIX)
+            .count()
+        )
+        missing = rows - existing
+        self.stdout.write(f"{existing} benchmark tasks present, seeding {missing}")
+        while missing > 0:
+            size = min(batch_size, missing)
+            TaskModel.objects.using(self.database).bulk_create(
+                TaskModel(
+                    user=users[(existing + n) % user_count],
+                    title=f"task {existing + n}",
+                    description="benchmark task description " * 4,
+                )
+                for n in range(size)
+            )
+            existing += size
+            missing -= size
+        return users
+
+    def report(self, label, user):
+        tasks = TaskModel.objects.using(self.database).filter(user=user)
+        queries = {
+            "list by created_at": tasks.order_by("created_at", "id")[:100],
+            "list by updated_at": tasks.order_by("-updated_at", "-id")[:100],
+        }
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"== {label}"))
+        for name, queryset in queries.items():
+            self.stdout.write(f"-- {name}")
+            self.stdout.write(queryset.explain())
+
+            timings = []
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            self.stdout.write(
+                f"   median {timings[len(timings) // 2] * 1000:.2f} ms, "
+                f"max {timings[-1] * 1000:.2f} ms over {self.repeat} runs"
+            )
+        connections[self.database].close()
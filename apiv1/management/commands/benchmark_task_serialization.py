@@ -0,0 +1,68 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from apiv1.serializers import TaskModelSerializer, ValuesSerializer
+from tasks.models import TaskModel
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares TaskModelSerializer with the .values() fast path on listings "
+        "of several sizes. Rows are created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create(
+                    username="bench-serialization@example.com"
+                )
+                created = 0
+                for size in sorted(options["sizes"]):
+                    TaskModel.objects.bulk_create(
+                        TaskModel(
+                            user=user,
+                            title=f"task {n} ñ",
+                            description="benchmark description " * 8,
+                        )
+                        for n in range(created, size)
+                    )
+                    created = size
+                    self.compare(TaskModel.objects.filter(user=user)[:size], size)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def compare(self, queryset, size):
+        renderer = JSONRenderer()
+
+        start = time.perf_counter()
+        slow = renderer.render(TaskModelSerializer(queryset, many=True).data)
+        slow_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        values_serializer = ValuesSerializer(TaskModelSerializer)
+        rows = queryset.values(*values_serializer.columns)
+        fast = renderer.render(values_serializer.many(rows))
+        fast_seconds = time.perf_counter() - start
+
+        if fast != slow:
+            raise CommandError(f"Outputs differ for {size} rows")
+        self.stdout.write(
+            f"{size:>8} rows: serializer {slow_seconds * 1000:9.1f} ms, "
+            f"values {fast_seconds * 1000:9.1f} ms, "
+            f"speedup x{slow_seconds / fast_seconds:.1f} (identical output)"
+        )
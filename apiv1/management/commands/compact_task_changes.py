@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apiv1.changes import compact_changes
+from tasks.sharding import get_all_shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Removes superseded task change log rows and tombstones older than "
+        "TASKS_CHANGES_RETENTION, in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--database", help="Defaults to every database holding tasks."
+        )
+        parser.add_argument(
+            "--retention",
+            type=int,
+            help="Seconds to keep tombstones, defaults to TASKS_CHANGES_RETENTION.",
+        )
+
+    def handle(self, *args, **options):
+        retention = options["retention"]
+        if retention is not None:
+            retention = timedelta(seconds=retention)
+        databases = [options["database"]] if options["database"] else get_all_shards()
+        removed = sum(
+            compact_changes(using, options["batch_size"], retention)
+            for using in databases
+        )
+        self.stdout.write(f"Removed {removed} change log rows.")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apiv1.schema import get_code_version, get_schema_dir, render_schema, write_schema
+
+
+class Command(BaseCommand):
+    help = "Writes the OpenAPI schema of this code version to SCHEMA_CACHE_DIR."
+
+    def handle(self, *args, **options):
+        directory = get_schema_dir()
+        if not directory:
+            raise CommandError("SCHEMA_CACHE_DIR is not set.")
+        for path in write_schema(directory, get_code_version(), render_schema()):
+            self.stdout.write(f"Wrote {path}")
@@ -0,0 +1,35 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apiv1.imports import IMPORT_FORMATS, guess_format, import_tasks
+
+
+class Command(BaseCommand):
+    help = "Imports tasks for a user from an NDJSON or CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=IMPORT_FORMATS)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--max-errors", type=int, default=100)
+
+    def handle(self, *args, **options):
+        myUserModel = get_user_model()
+        try:
+            user = myUserModel.objects.get(username=options["username"])
+        except myUserModel.DoesNotExist:
+            raise CommandError(f'User {options["username"]} does not exist.')
+
+        import_format = options["format"] or guess_format(options["path"])
+        with open(options["path"], "rb") as stream:
+            summary = import_tasks(
+                user,
+                stream,
+                import_format,
+                chunk_size=options["chunk_size"],
+                max_errors=options["max_errors"],
+            )
+        self.stdout.write(json.dumps(summary, indent=2))
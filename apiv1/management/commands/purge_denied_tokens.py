@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apiv1.tokens import purge_denied_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the denylist rows of signed tokens that have expired, in "
+        "batches. Run it periodically, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        removed = purge_denied_tokens(options["batch_size"])
+        self.stdout.write(f"Removed {removed} expired denylist rows.")
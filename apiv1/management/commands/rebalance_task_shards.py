@@ -0,0 +1,166 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from apiv1.cache import invalidate_user_tasks
+from apiv1.changes import record_changes
+from apiv1.search import index_tasks
+from apiv1.stats import reconcile_stats
+from tasks.models import TaskChange, TaskModel, TaskShardMove, TaskUserStats
+from tasks.sharding import forget_route, get_previous_shards, get_shards, hash_shard
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the tasks of every user whose shard differs between "
+        "TASK_SHARDS_PREVIOUS and TASK_SHARDS, a batch of users at a time. A "
+        "user's writes are refused while their tasks are copied. Progress is "
+        "kept in TaskShardMove, so an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--users-per-batch",
+            type=int,
+            default=100,
+            help="Users moved together, waiting once before and after the copy.",
+        )
+        parser.add_argument(
+            "--user", type=int, nargs="+", help="Only move these user ids."
+        )
+        parser.add_argument(
+            "--wait",
+            type=float,
+            help=(
+                "Seconds to wait for other processes to drop a cached route, "
+                "defaults to TASK_SHARD_ROUTE_CACHE_TIMEOUT."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        shards, previous = get_shards(), get_previous_shards()
+        if not previous:
+            self.stdout.write("TASK_SHARDS_PREVIOUS is not set, nothing to move.")
+            return
+        self.batch_size = options["batch_size"]
+        users_per_batch = options["users_per_batch"]
+        self.wait = options["wait"]
+        if self.wait is None:
+            self.wait = getattr(settings, "TASK_SHARD_ROUTE_CACHE_TIMEOUT", 60)
+
+        users = get_user_model().objects.using(DEFAULT_DB_ALIAS).order_by("pk")
+        if options["user"]:
+            users = users.filter(pk__in=options["user"])
+        moved, batch = 0, []
+        for user_id in users.values_list("pk", flat=True).iterator():
+            source, target = hash_shard(user_id, previous), hash_shard(user_id, shards)
+            if source == target:
+                continue
+            move = self.start(user_id, source, target)
+            if move.state != TaskShardMove.DONE:
+                batch.append(move)
+            if len(batch) >= users_per_batch:
+                self.move(batch)
+                moved, batch = moved + len(batch), []
+        if batch:
+            self.move(batch)
+            moved += len(batch)
+        self.stdout.write(f"Moved {moved} users.")
+
+    def start(self, user_id, source, target):
+        """The user's move record, created (which locks their writes) if needed"""
+        move, created = TaskShardMove.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+            user_id=user_id, defaults={"source": source, "target": target}
+        )
+        if created or (move.source, move.target) == (source, target):
+            return move
+        if move.state != TaskShardMove.DONE:
+            raise CommandError(
+                f"User {user_id} is still moving from {move.source} to "
+                f"{move.target}, finish that layout change first."
+            )
+        # Left over from an earlier layout change.
+        move.source, move.target = source, target
+        move.state, move.copied_up_to = TaskShardMove.COPYING, 0
+        move.started_at, move.finished_at = timezone.now(), None
+        move.save(using=DEFAULT_DB_ALIAS)
+        return move
+
+    def move(self, moves):
+        """Copy a batch of users, switch them to the target, then clean up"""
+        copying = [move for move in moves if move.state == TaskShardMove.COPYING]
+        if copying:
+            # Processes that cached the old route may still write until it expires.
+            for move in copying:
+                forget_route(move.user_id)
+            time.sleep(self.wait)
+        for move in copying:
+            self.copy(move)
+            # bulk_create sends no signal, the copied tasks are counted at once.
+            reconcile_stats([move.user_id], move.target)
+            # Served by the target from now on; the source rows are deleted
+            # below, or by the next run if this one stops first.
+            move.state = TaskShardMove.CLEANING
+            move.save(using=DEFAULT_DB_ALIAS, update_fields=["state"])
+            forget_route(move.user_id)
+            invalidate_user_tasks(move.user_id)
+
+        # Likewise for reads, before the source rows go away.
+        time.sleep(self.wait)
+        for move in moves:
+            self.delete_source(move)
+            move.state, move.finished_at = TaskShardMove.DONE, timezone.now()
+            move.save(using=DEFAULT_DB_ALIAS, update_fields=["state", "finished_at"])
+
+    def copy(self, move):
+        tasks = (
+            TaskModel.objects.using(move.source)
+            .filter(user_id=move.user_id)
+            .order_by("id")
+        )
+        while True:
+            batch = list(tasks.filter(id__gt=move.copied_up_to)[: self.batch_size])
+            if not batch:
+                break
+            with transaction.atomic(using=move.target):
+                self.write(batch, move)
+            move.copied_up_to = batch[-1].pk
+            move.save(using=DEFAULT_DB_ALIAS, update_fields=["copied_up_to"])
+
+    def write(self, tasks, move):
+        # bulk_create stamps auto_now(_add) fields, the originals are put back.
+        stamps = [(task.created_at, task.updated_at) for task in tasks]
+        # A batch is copied again when a run stopped before recording it.
+        target = TaskModel.objects.using(move.target)
+        target.bulk_create(tasks, ignore_conflicts=True)
+        for task, (created_at, updated_at) in zip(tasks, stamps):
+            task.created_at, task.updated_at = created_at, updated_at
+        target.bulk_update(tasks, ["created_at", "updated_at"])
+
+        rows = [
+            {
+                "id": task.pk,
+                "user": task.user_id,
+                "title": task.title,
+                "description": task.description,
+            }
+            for task in tasks
+        ]
+        index_tasks(rows, move.target, replace=True)
+        # A full sync replays the log, so it needs a row for every task.
+        record_changes(move.user_id, [task.pk for task in tasks], move.target)
+
+    def delete_source(self, move):
+        tasks = TaskModel.objects.using(move.source).filter(user_id=move.user_id)
+        while True:
+            ids = list(tasks.values_list("id", flat=True)[: self.batch_size])
+            if not ids:
+                break
+            tasks.filter(id__in=ids).delete()
+        TaskChange.objects.using(move.source).filter(user_id=move.user_id).delete()
+        TaskUserStats.objects.using(move.source).filter(user_id=move.user_id).delete()
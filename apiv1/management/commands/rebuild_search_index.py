@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apiv1.search import index_tasks, uses_native_index
+from tasks.models import TaskModel, TaskSearchToken
+from tasks.sharding import get_all_shards
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the task search token table in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--database", help="Defaults to every database holding tasks."
+        )
+
+    def handle(self, *args, **options):
+        databases = [options["database"]] if options["database"] else get_all_shards()
+        for using in databases:
+            self.rebuild(using, options["batch_size"])
+
+    def rebuild(self, using, batch_size):
+        if uses_native_index(using):
+            self.stdout.write(f"{using} searches its FULLTEXT index, nothing to do.")
+            return
+
+        TaskSearchToken.objects.using(using).all().delete()
+        tasks = (
+            TaskModel.objects.using(using)
+            .order_by("id")
+            .values("id", "user", "title", "description")
+        )
+        last_id, indexed = 0, 0
+        while True:
+            batch = list(tasks.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic(using=using):
+                index_tasks(batch, using, replace=False)
+            last_id = batch[-1]["id"]
+            indexed += len(batch)
+        self.stdout.write(f"Indexed {indexed} tasks on {using}.")
@@ -0,0 +1,47 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from apiv1.stats import reconcile_stats
+from tasks.sharding import get_shard
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts the per-user task stats from the task rows and repairs the "
+        "rows that drifted, a batch of users per transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--database", help="Only the users whose tasks live on this database."
+        )
+        parser.add_argument(
+            "--user", type=int, nargs="+", help="Only reconcile these user ids."
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.using(DEFAULT_DB_ALIAS).order_by("pk")
+        if options["user"]:
+            users = users.filter(pk__in=options["user"])
+        user_ids = users.values_list("pk", flat=True)
+
+        batch_size = options["batch_size"]
+        checked, repaired, last_id = 0, 0, 0
+        while True:
+            batch = list(user_ids.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1]
+            by_shard = defaultdict(list)
+            for user_id in batch:
+                by_shard[get_shard(user_id)].append(user_id)
+            for using, shard_user_ids in by_shard.items():
+                if options["database"] and using != options["database"]:
+                    continue
+                repaired += reconcile_stats(shard_user_ids, using)
+                checked += len(shard_user_ids)
+        self.stdout.write(f"Checked {checked} users, repaired {repaired}.")
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from apiv1.startup import run_profile
+
+
+class Command(BaseCommand):
+    help = "Times the startup of a fresh worker: imports, apps, warm up, requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/v1/tasks/")
+        parser.add_argument(
+            "--no-warm-up",
+            action="store_false",
+            dest="warm",
+            help="Skip warm_up(), as a worker without preload_app would.",
+        )
+        parser.add_argument("--limit", type=int, default=15)
+
+    def handle(self, *args, **options):
+        profile = run_profile(options["warm"], options["path"], import_times=True)
+
+        self.stdout.write("Phases (ms)")
+        for name, ms in profile["phases"]:
+            self.stdout.write(f"  {name:<24}{ms:>10.1f}")
+
+        setup = profile["first_request_setup"]
+        self.stdout.write(
+            "First request setup: {url_resolvers} URL resolvers, {relation_trees} "
+            "relation trees, {connections} connections, {imports} imports".format(
+                **dict(setup, imports=len(setup["imports"]))
+            )
+        )
+
+        self.stdout.write("Apps (ms): import, models, ready")
+        apps = sorted(profile["apps"].items(), key=lambda item: -sum(item[1].values()))
+        for label, steps in apps[: options["limit"]]:
+            self.stdout.write(
+                f"  {label:<24}"
+                + "".join(
+                    f"{steps.get(step, 0):>10.1f}"
+                    for step in ("import", "import_models", "ready")
+                )
+            )
+
+        self.stdout.write("Imports (cumulative ms)")
+        imports = sorted(profile["imports"].items(), key=lambda item: -item[1])
+        for package, ms in imports[: options["limit"]]:
+            self.stdout.write(f"  {package:<24}{ms:>10.1f}")
@@ -0,0 +1,283 @@
+import functools
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+METRICS = {
+    "tasks_http_requests_total": (
+        "counter",
+        "Requests served, by route, method and status.",
+    ),
+    "tasks_http_request_duration_seconds": (
+        "histogram",
+        "Request latency in seconds, by route.",
+    ),
+    "tasks_db_queries_total": (
+        "counter",
+        "SQL statements run while serving requests, by route.",
+    ),
+    "tasks_db_duration_seconds_total": (
+        "counter",
+        "Seconds spent in SQL while serving requests, by route.",
+    ),
+    "tasks_auth_cache_lookups_total": (
+        "counter",
+        "Credential cache lookups, by cache and result.",
+    ),
+    "tasks_response_cache_lookups_total": (
+        "counter",
+        "Task response cache lookups, by result.",
+    ),
+}
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_USED = struct.Struct("q")
+_VALUE = struct.Struct("d")
+_INITIAL_SIZE = 64 * 1024
+
+
+class MmapedValues:
+    """Append-only ``key -> float`` store in a memory-mapped file.
+
+    The file starts with the number of bytes in use, followed by entries of
+    a 4 byte key length, the UTF-8 key padded to 8 bytes and a double. Only
+    the thread that owns a store writes to it, so nothing is locked; a new
+    entry is written before the length that makes readers see it.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        if path is None:
+            self._file = None
+            self._map = mmap.mmap(-1, _INITIAL_SIZE)
+            _USED.pack_into(self._map, 0, _USED.size)
+        else:
+            self._file = open(path, "a+b")
+            if os.fstat(self._file.fileno()).st_size == 0:
+                self._file.truncate(_INITIAL_SIZE)
+                self._map = mmap.mmap(self._file.fileno(), _INITIAL_SIZE)
+                _USED.pack_into(self._map, 0, _USED.size)
+            else:
+                self._map = mmap.mmap(self._file.fileno(), 0)
+        self._positions = {key: position for key, _, position in read_entries(self)}
+
+    def buffer(self):
+        return self._map
+
+    def add(self, key, amount):
+        position = self._positions.get(key)
+        if position is None:
+            position = self._append(key)
+        value = _VALUE.unpack_from(self._map, position)[0]
+        _VALUE.pack_into(self._map, position, value + amount)
+
+    def _append(self, key):
+        encoded = key.encode()
+        padded = 4 + len(encoded) + (-(4 + len(encoded)) % 8)
+        used = _USED.unpack_from(self._map, 0)[0]
+        end = used + padded + _VALUE.size
+        if end > len(self._map):
+            self._grow(max(end, len(self._map) * 2))
+        struct.pack_into(f"i{len(encoded)}s", self._map, used, len(encoded), encoded)
+        _VALUE.pack_into(self._map, used + padded, 0.0)
+        _USED.pack_into(self._map, 0, end)
+        self._positions[key] = used + padded
+        return used + padded
+
+    def _grow(self, size):
+        if self._file is None:
+            grown = mmap.mmap(-1, size)
+            grown[: len(self._map)] = self._map[:]
+        else:
+            self._file.truncate(size)
+            grown = mmap.mmap(self._file.fileno(), size)
+        self._map.close()
+        self._map = grown
+
+
+def read_entries(store):
+    """Yield the (key, value, position) entries of a store or file contents"""
+    data = store.buffer() if isinstance(store, MmapedValues) else store
+    if len(data) < _USED.size:
+        return
+    used = _USED.unpack_from(data, 0)[0]
+    position = _USED.size
+    while position < used:
+        length = struct.unpack_from("i", data, position)[0]
+        key = bytes(data[position + 4 : position + 4 + length]).decode()
+        position += 4 + length + (-(4 + length) % 8)
+        yield key, _VALUE.unpack_from(data, position)[0], position
+        position += _VALUE.size
+
+
+_local = threading.local()
+# Stores of this process when METRICS_DIR is not set.
+_private_stores = []
+_private_lock = threading.Lock()
+
+
+def get_metrics_dir():
+    return getattr(settings, "METRICS_DIR", None)
+
+
+def get_store():
+    """This thread's store, opened again after a fork"""
+    store = getattr(_local, "store", None)
+    directory = get_metrics_dir()
+    if store is None or _local.opened != (os.getpid(), directory):
+        if directory:
+            name = f"{os.getpid()}-{threading.get_ident()}.db"
+            store = MmapedValues(os.path.join(directory, name))
+        else:
+            store = MmapedValues()
+            with _private_lock:
+                _private_stores.append(store)
+        _local.store, _local.opened = store, (os.getpid(), directory)
+    return store
+
+
+def metrics_enabled():
+    return getattr(settings, "METRICS_ENABLED", True)
+
+
+@functools.lru_cache(maxsize=4096)
+def series_key(name, labels):
+    """The exposition name of a series; ``labels`` is a tuple of pairs"""
+    if not labels:
+        return name
+    rendered = ",".join(f'{label}="{escape(value)}"' for label, value in labels)
+    return f"{name}{{{rendered}}}"
+
+
+def escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def inc(name, labels=(), amount=1):
+    if metrics_enabled():
+        get_store().add(series_key(name, labels), amount)
+
+
+@functools.lru_cache(maxsize=1024)
+def histogram_keys(name, labels, buckets):
+    bucket_keys = tuple(
+        (bound, series_key(f"{name}_bucket", labels + (("le", format_bound(bound)),)))
+        for bound in buckets + (float("inf"),)
+    )
+    return (
+        bucket_keys,
+        series_key(f"{name}_sum", labels),
+        series_key(f"{name}_count", labels),
+    )
+
+
+def format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+def observe(name, labels, value):
+    """Record ``value`` in a histogram; buckets are stored cumulative"""
+    if not metrics_enabled():
+        return
+    buckets = tuple(getattr(settings, "METRICS_LATENCY_BUCKETS", DEFAULT_BUCKETS))
+    bucket_keys, sum_key, count_key = histogram_keys(name, labels, buckets)
+    store = get_store()
+    for bound, key in bucket_keys:
+        if value <= bound:
+            store.add(key, 1)
+    store.add(sum_key, value)
+    store.add(count_key, 1)
+
+
+def observe_request(request, response, seconds, timings):
+    match = request.resolver_match
+    route = match.view_name if match is not None else "unmatched"
+    inc(
+        "tasks_http_requests_total",
+        (
+            ("route", route),
+            ("method", request.method),
+            ("status", str(response.status_code)),
+        ),
+    )
+    observe("tasks_http_request_duration_seconds", (("route", route),), seconds)
+    if timings is not None:
+        inc("tasks_db_queries_total", (("route", route),), timings.queries)
+        inc(
+            "tasks_db_duration_seconds_total",
+            (("route", route),),
+            timings.durations.get("db", 0.0),
+        )
+
+
+def collect():
+    """Sum every store of the worker pool (or this process)"""
+    totals = defaultdict(float)
+    directory = get_metrics_dir()
+    if directory:
+        for name in os.listdir(directory):
+            if not name.endswith(".db"):
+                continue
+            with open(os.path.join(directory, name), "rb") as file:
+                data = file.read()
+            for key, value, _ in read_entries(data):
+                totals[key] += value
+    else:
+        with _private_lock:
+            stores = list(_private_stores)
+        for store in stores:
+            for key, value, _ in read_entries(store):
+                totals[key] += value
+    return totals
+
+
+_LE = re.compile(r',?le="([^"]*)"')
+
+
+def _order(key):
+    # Buckets of a series sort by bound, not as text.
+    match = _LE.search(key)
+    if match is None:
+        return key, 0.0
+    return _LE.sub("", key), float(match.group(1))
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    families = defaultdict(list)
+    for key, value in collect().items():
+        name = key.split("{", 1)[0]
+        for suffix in ("_bucket", "_sum", "_count"):
+            if name.endswith(suffix) and name[: -len(suffix)] in METRICS:
+                name = name[: -len(suffix)]
+        families[name].append((key, value))
+
+    lines = []
+    for name in sorted(families):
+        kind, help_text = METRICS.get(name, ("untyped", ""))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key, value in sorted(families[name], key=lambda item: _order(item[0])):
+            formatted = str(int(value)) if value.is_integer() else repr(value)
+            lines.append(f"{key} {formatted}")
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode()
+        # Error bodies.
+        return json.dumps(data).encode()
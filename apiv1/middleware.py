@@ -0,0 +1,102 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from .query_budgets import check_budget, count_queries
+from .routers import SAFE_METHODS, current_request, pin_to_primary
+from .timing import current_timings, finish_request, start_request
+
+
+class ReplicaRoutingMiddleware:
+    """Expose the request to ReplicaRouter and pin writers to the primary"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = current_request.set(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        token = current_request.set(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        if request.method not in SAFE_METHODS:
+            # The pin is written to the shared cache, maybe the database.
+            await sync_to_async(pin_to_primary)(request, response)
+        return response
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS:
+            pin_to_primary(request, response)
+        return response
+
+
+class QueryBudgetMiddleware:
+    """Check requests against apiv1.query_budgets.QUERY_BUDGETS.
+
+    Sync only, since the statements are counted on this thread's
+    connections; it is installed when DEBUG is on.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with count_queries() as counter:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match is not None:
+            check_budget(match.url_name, request.method, counter)
+        return response
+
+
+class RequestTimingMiddleware:
+    """Measure requests and report them in Server-Timing and log lines.
+
+    A REQUEST_TIMING_SAMPLE_RATE share of requests gets the SQL count and
+    time, authentication and serializer time recorded; any request slower
+    than REQUEST_TIMING_SLOW_MS is logged, with its slowest statements when
+    sampled. Place it first so the total covers the other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token, start = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                current_timings.reset(token)
+        finish_request(request, response, timings, start)
+        return response
+
+    async def __acall__(self, request):
+        timings, token, start = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                current_timings.reset(token)
+        finish_request(request, response, timings, start)
+        return response
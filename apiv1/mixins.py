@@ -0,0 +1,131 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .search import search_task_ids
+from .serializers import ValuesSerializer
+
+
+class ValuesListModelMixin:
+    """List through ``.values()`` rows and a ValuesSerializer.
+
+    Produces the same payload as ListModelMixin.list without instantiating
+    models or running the serializer field machinery for every row.
+    """
+
+    def get_values_serializer(self):
+        return ValuesSerializer(self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        values_serializer = self.get_values_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        # The paginator reads its cursor position from the rows.
+        ordering = getattr(self.paginator, "ordering", ())
+        columns = tuple(dict.fromkeys(values_serializer.columns + tuple(ordering)))
+        rows = queryset.values(*columns)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.many(page))
+        return Response(values_serializer.many(rows))
+
+
+class SearchListMixin:
+    """Ranked ``?search=`` over the user's tasks on the list endpoint.
+
+    Relevance order cannot be walked with a keyset cursor, so a search
+    returns the best ``page_size`` matches as a single page.
+    """
+
+    search_param = "search"
+
+    def list(self, request, *args, **kwargs):
+        term = request.query_params.get(self.search_param, "").strip()
+        if not term:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        limit = self.paginator.get_page_size(request) if self.paginator else 100
+        ids = search_task_ids(request.user, queryset, term, limit)
+
+        values_serializer = self.get_values_serializer()
+        columns = tuple(dict.fromkeys(values_serializer.columns + ("id",)))
+        rows = {row["id"]: row for row in queryset.filter(id__in=ids).values(*columns)}
+        results = values_serializer.many(rows[pk] for pk in ids if pk in rows)
+        return Response({"next": None, "previous": None, "results": results})
+
+
+class SparseFieldsMixin:
+    """``?fields=`` / ``?exclude=`` on reads, also narrowing the SQL.
+
+    Lists select only the requested columns through the ValuesSerializer,
+    single objects are loaded with ``.only()``. Must come before
+    ValuesListModelMixin. Writes always return the full representation.
+    """
+
+    fields_param = "fields"
+    exclude_param = "exclude"
+    # Columns .only() always loads, whatever the fields: those read by the
+    # object permissions, for instance.
+    required_columns = ()
+
+    def get_field_names(self):
+        """Names of the fields to return, None for all of them"""
+        if not hasattr(self, "_field_names"):
+            self._field_names = self.parse_field_names(self.request)
+        return self._field_names
+
+    def parse_field_names(self, request):
+        if request.method not in SAFE_METHODS:
+            return None
+        fields = split_names(request.query_params.get(self.fields_param, ""))
+        exclude = split_names(request.query_params.get(self.exclude_param, ""))
+        if not fields and not exclude:
+            return None
+
+        available = [
+            name
+            for name, field in self.get_serializer_class()().fields.items()
+            if not field.write_only
+        ]
+        errors = {}
+        for param, names in (
+            (self.fields_param, fields),
+            (self.exclude_param, exclude),
+        ):
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                errors[param] = [f'"{name}" is not a valid field.' for name in unknown]
+        if errors:
+            raise ValidationError(errors)
+
+        return tuple(
+            name
+            for name in available
+            if (not fields or name in fields) and name not in exclude
+        )
+
+    def get_values_serializer(self):
+        return ValuesSerializer(self.get_serializer_class(), self.get_field_names())
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = self.get_field_names()
+        if names is not None:
+            target = getattr(serializer, "child", serializer)
+            for name in set(target.fields) - set(names):
+                target.fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        names = self.get_field_names()
+        if names is None:
+            return queryset
+        fields = self.get_serializer_class()().fields
+        columns = [fields[name].source for name in names]
+        return queryset.only(*columns, *self.required_columns)
+
+
+def split_names(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
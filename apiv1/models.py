@@ -1,3 +1,13 @@
 from django.db import models
 
 # Create your models here.
+
+
+class DeniedToken(models.Model):
+    """Revoked or already rotated signed tokens, kept only until they expire"""
+
+    jti = models.CharField(max_length=32, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,138 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class TaskCursorPagination(CursorPagination):
+    """Keyset pagination over (created_at, id).
+
+    The cursor stores the full position of the boundary row, so every page is
+    a single indexed range scan: no COUNT(*) and no OFFSET, whatever the depth.
+    """
+
+    ordering = ("created_at", "id")
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.start_page(request):
+            return None
+        return self.paginate_rows(list(self.get_page_queryset(queryset)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() reading the page with async iteration"""
+        if not self.start_page(request):
+            return None
+        rows = [row async for row in self.get_page_queryset(queryset)]
+        return self.paginate_rows(rows)
+
+    def start_page(self, request):
+        """Read the page size and cursor of the request; False when unpaginated"""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return False
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        return True
+
+    def get_page_queryset(self, queryset):
+        """Order and filter the queryset to the page after (or before) the cursor"""
+        reverse, position = self.cursor or (False, None)
+        if reverse:
+            queryset = queryset.order_by("-created_at", "-id")
+        else:
+            queryset = queryset.order_by("created_at", "id")
+
+        if position is not None:
+            created_at, pk = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                )
+
+        # One extra row tells us whether there is anything past this page.
+        return queryset[: self.page_size + 1]
+
+    def paginate_rows(self, rows):
+        """Work out the page and the next/previous positions from fetched rows"""
+        reverse, position = self.cursor or (False, None)
+        has_more = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        first = self._get_position(self.page[0]) if self.page else None
+        last = self._get_position(self.page[-1]) if self.page else None
+
+        if reverse:
+            self.has_previous = has_more
+            self.previous_position = first
+            self.has_next = True
+            # An empty page keeps the cursor row itself reachable going forward.
+            self.next_position = last or (position[0], position[1] - 1)
+        else:
+            self.has_next = has_more
+            self.next_position = last
+            self.has_previous = position is not None
+            if self.has_previous:
+                self.previous_position = first or (position[0], position[1] + 1)
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor((False, self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor((True, self.previous_position))
+
+    def decode_cursor(self, request):
+        """Return the (reverse, (created_at, id)) cursor sent by the client"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+            created_at = parse_datetime(tokens["c"][0])
+            pk = int(tokens["i"][0])
+            if created_at is None:
+                raise ValueError()
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return reverse, (created_at, pk)
+
+    def encode_cursor(self, cursor):
+        reverse, (created_at, pk) = cursor
+        tokens = {"c": created_at.isoformat(), "i": str(pk)}
+        if reverse:
+            tokens["r"] = "1"
+
+        querystring = parse.urlencode(tokens)
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position(self, item):
+        if isinstance(item, dict):
+            return item["created_at"], item["id"]
+        return item.created_at, item.id
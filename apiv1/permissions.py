@@ -15,4 +15,11 @@ class IsAuthor(permissions.BasePermission):
         """ if request.user.is_staff:
             return True """
         """ if not check the user owner """
-        return obj.user == request.user
+        # Compare keys: loading obj.user would query the primary for the owner.
+        return obj.user_id == request.user.pk
+
+    async def ahas_permission(self, request, view):
+        return self.has_permission(request, view)
+
+    async def ahas_object_permission(self, request, view, obj):
+        return self.has_object_permission(request, view, obj)
@@ -0,0 +1,69 @@
+import logging
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Most SQL statements (savepoints included) a request may run, by URL name
+# and method, with a cold token cache. Raise a budget only with a reason.
+QUERY_BUDGETS = {
+    # Token, list validators, one page.
+    "tasks-list": {"GET": 3, "POST": 5},
+    # Token, detail validators, the task; writes add the search index, change
+    # log and user stats statements of the post_save/post_delete receivers.
+    "tasks-detail": {"GET": 3, "PUT": 7, "PATCH": 7, "DELETE": 6},
+    # Token, the user's stats row.
+    "tasks-stats": {"GET": 2},
+    # Username check, user, token.
+    "signup": {"POST": 3},
+    # Email address, user, last_login, and a token created on first login.
+    "login": {"POST": 7},
+}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """execute_wrapper that records the statements it sees"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+
+@contextmanager
+def count_queries():
+    """Count the statements run on every database of this thread"""
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield counter
+
+
+def get_budget(url_name, method):
+    return QUERY_BUDGETS.get(url_name, {}).get(method)
+
+
+def check_budget(url_name, method, counter):
+    """Log, or raise with QUERY_BUDGET_STRICT, when ``counter`` went over"""
+    budget = get_budget(url_name, method)
+    if budget is None or len(counter) <= budget:
+        return
+    message = (
+        f"{method} {url_name} ran {len(counter)} queries, over its budget of "
+        f"{budget}:\n" + "\n".join(counter.queries)
+    )
+    if getattr(settings, "QUERY_BUDGET_STRICT", False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
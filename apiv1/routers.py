@@ -0,0 +1,198 @@
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import DatabaseError
+from django.utils.functional import SimpleLazyObject
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from tasks.models import TaskChange, TaskModel, TaskSearchToken, TaskUserStats
+from tasks.sharding import get_route
+
+from .cache import get_cache
+
+PIN_CACHE_PREFIX = "db:pinned:"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# The request being served, set by ReplicaRoutingMiddleware. Unset outside a
+# request (management commands, shells), where everything uses the primary.
+current_request = ContextVar("current_request", default=None)
+
+
+class ShardMoving(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Your tasks are being moved, try again shortly."
+    default_code = "shard_moving"
+
+
+def check_shard_writable(user_id):
+    if get_route(user_id).moving:
+        raise ShardMoving()
+
+
+def get_pin_seconds():
+    return getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5)
+
+
+def resolved_user(request):
+    """The user the API authenticated, or None.
+
+    The lazy session user that AuthenticationMiddleware installs is left
+    alone: resolving it would cost a query (and cannot run on the event loop).
+    A ClaimsUser answers is_authenticated and pk from its token instead.
+    """
+    user = request.__dict__.get("user")
+    if user is None or type(user) is SimpleLazyObject:
+        return None
+    return user if user.is_authenticated else None
+
+
+def pin_user(user_id):
+    """Send a user's reads to the primary for the pin window, on every worker"""
+    get_cache().set(PIN_CACHE_PREFIX + str(user_id), True, get_pin_seconds())
+
+
+def pin_to_primary(request, response):
+    """Keep the author of a write on the primary for the pin window"""
+    response.set_cookie(
+        getattr(settings, "DATABASE_REPLICA_PIN_COOKIE", "db_pinned"),
+        "1",
+        max_age=get_pin_seconds(),
+        httponly=True,
+        samesite="Lax",
+    )
+    # API clients without a cookie jar are recognised by their user id.
+    user = resolved_user(request)
+    if user is not None:
+        pin_user(user.pk)
+
+
+def is_pinned(request):
+    cookie = getattr(settings, "DATABASE_REPLICA_PIN_COOKIE", "db_pinned")
+    if cookie in request.COOKIES:
+        return True
+    user = resolved_user(request)
+    if user is None:
+        return False
+    # Memoised per user: the request's user is swapped in after authentication.
+    pinned = request.__dict__.setdefault("_db_pinned", {})
+    if user.pk not in pinned:
+        pinned[user.pk] = bool(get_cache().get(PIN_CACHE_PREFIX + str(user.pk)))
+    return pinned[user.pk]
+
+
+class ReplicaRouter:
+    """Send reads of safe-method requests to the DATABASE_REPLICAS aliases.
+
+    Replicas are taken round-robin. One whose connection fails is skipped for
+    DATABASE_REPLICA_RETRY_SECONDS, and the primary serves the read when none
+    is available. Writes, unsafe requests, the cache table and users pinned
+    after a write (see pin_to_primary) always use the primary.
+    """
+
+    def __init__(self):
+        self._counter = itertools.count()
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def get_replicas(self):
+        return getattr(settings, "DATABASE_REPLICAS", [])
+
+    def db_for_read(self, model, **hints):
+        request = current_request.get()
+        if request is None or request.method not in SAFE_METHODS:
+            return DEFAULT_DB_ALIAS
+        # The DatabaseCache table: a lagging copy would serve revoked tokens
+        # and stale generations, and is_pinned() reads it.
+        if model._meta.app_label == "django_cache":
+            return DEFAULT_DB_ALIAS
+        replicas = self.get_replicas()
+        if not replicas or is_pinned(request):
+            return DEFAULT_DB_ALIAS
+
+        start = next(self._counter)
+        for offset in range(len(replicas)):
+            alias = replicas[(start + offset) % len(replicas)]
+            if self.is_available(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Rows read from a replica are written to the primary; other aliases
+        # (a shard being migrated, say) keep their own rows.
+        instance = hints.get("instance")
+        alias = instance._state.db if instance is not None else None
+        if alias is None or alias in self.get_replicas():
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        aliases = {DEFAULT_DB_ALIAS, *self.get_replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def is_available(self, alias):
+        if self._down_until.get(alias, 0) > time.monotonic():
+            return False
+        connection = connections[alias]
+        if connection.connection is not None:
+            return True
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            retry = getattr(settings, "DATABASE_REPLICA_RETRY_SECONDS", 30)
+            with self._lock:
+                self._down_until[alias] = time.monotonic() + retry
+            return False
+        return True
+
+
+class TaskShardRouter:
+    """Route task rows to the shard of their user (see tasks.sharding).
+
+    The user comes from the instance being saved or followed, or from the
+    ``user_id`` hint of TaskModel.objects.for_user(). Reads on the primary
+    are left to the next router, so they may still be served by a replica.
+    """
+
+    sharded_models = (TaskModel, TaskSearchToken, TaskChange, TaskUserStats)
+
+    def get_shard(self, model, hints):
+        if not issubclass(model, self.sharded_models):
+            return None
+        user_id = hints.get("user_id")
+        instance = hints.get("instance")
+        if user_id is None and instance is not None:
+            if isinstance(instance, self.sharded_models):
+                # Loading a deferred user_id would route through here again.
+                if "user_id" not in instance.get_deferred_fields():
+                    user_id = instance.user_id
+            elif instance._meta.model is get_user_model():
+                user_id = instance.pk
+        if user_id is None:
+            return None
+        return get_route(user_id).alias
+
+    def db_for_read(self, model, **hints):
+        alias = self.get_shard(model, hints)
+        return None if alias == DEFAULT_DB_ALIAS else alias
+
+    def db_for_write(self, model, **hints):
+        return self.get_shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Sharded rows refer to users on the primary, without a constraint.
+        for obj, other in ((obj1, obj2), (obj2, obj1)):
+            if isinstance(obj, self.sharded_models) and isinstance(
+                other, get_user_model()
+            ):
+                return True
+        return None
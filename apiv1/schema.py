@@ -0,0 +1,121 @@
+import functools
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+import drf_spectacular
+from django.apps import apps
+from django.conf import settings
+from django.utils.http import quote_etag
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+SchemaDocument = namedtuple("SchemaDocument", "content etag")
+
+RENDERERS = {"json": OpenApiJsonRenderer, "yaml": OpenApiYamlRenderer}
+
+_documents = {}
+_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def source_digest():
+    """Digest of the project's own Python sources and of drf-spectacular"""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    roots = {Path(sys.modules[settings.ROOT_URLCONF].__file__).resolve().parent}
+    for app_config in apps.get_app_configs():
+        path = Path(app_config.path).resolve()
+        if base_dir in path.parents:
+            roots.add(path)
+
+    digest = hashlib.sha1(drf_spectacular.__version__.encode())
+    for root in sorted(roots):
+        for path in sorted(root.rglob("*.py")):
+            digest.update(str(path.relative_to(base_dir)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def get_code_version():
+    """SCHEMA_CODE_VERSION, or a digest of the sources when it is unset"""
+    return getattr(settings, "SCHEMA_CODE_VERSION", None) or source_digest()
+
+
+def get_schema_dir():
+    return getattr(settings, "SCHEMA_CACHE_DIR", None)
+
+
+def schema_path(directory, version, schema_format):
+    return os.path.join(directory, f"openapi-{version}.{schema_format}")
+
+
+def render_schema():
+    """Generate the public schema once, rendered in every format"""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        schema_format: renderer().render(schema, renderer_context={})
+        for schema_format, renderer in RENDERERS.items()
+    }
+
+
+def write_schema(directory, version, documents):
+    """Atomically store ``documents`` and drop those of other versions"""
+    os.makedirs(directory, exist_ok=True)
+    paths = set()
+    for schema_format, content in documents.items():
+        path = schema_path(directory, version, schema_format)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+            file.write(content)
+        os.replace(file.name, path)
+        paths.add(path)
+
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith("openapi-") and path not in paths:
+            os.remove(path)
+    return sorted(paths)
+
+
+def read_schema(directory, version):
+    documents = {}
+    for schema_format in RENDERERS:
+        try:
+            with open(schema_path(directory, version, schema_format), "rb") as file:
+                documents[schema_format] = file.read()
+        except FileNotFoundError:
+            return None
+    return documents
+
+
+def get_schema_document(schema_format):
+    """The schema of the running code, from memory, SCHEMA_CACHE_DIR or freshly
+    generated (and then stored there)"""
+    directory = get_schema_dir()
+    key = (get_code_version(), directory)
+    documents = _documents.get(key)
+    if documents is None:
+        with _lock:
+            documents = _documents.get(key)
+            if documents is None:
+                documents = load_schema(*key)
+                _documents[key] = documents
+    return documents[schema_format]
+
+
+def load_schema(version, directory):
+    documents = read_schema(directory, version) if directory else None
+    if documents is None:
+        documents = render_schema()
+        if directory:
+            write_schema(directory, version, documents)
+    return {
+        schema_format: SchemaDocument(
+            content, quote_etag(f"{version}-{hashlib.sha1(content).hexdigest()}")
+        )
+        for schema_format, content in documents.items()
+    }
@@ -0,0 +1,90 @@
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import connections
+from django.db.models import Q, Sum
+from django.db.models.expressions import RawSQL
+
+from tasks.models import TaskSearchToken
+
+TOKEN_RE = re.compile(r"\w+")
+TOKEN_MAX_LENGTH = 32
+TITLE_WEIGHT = 3
+
+
+def tokenize(text):
+    """Lowercased, accent-free words of at least two characters"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return [
+        token[:TOKEN_MAX_LENGTH] for token in TOKEN_RE.findall(text) if len(token) > 1
+    ]
+
+
+def uses_native_index(using):
+    """MySQL has a FULLTEXT index on the task table (tasks migration 0003)"""
+    return connections[using].vendor == "mysql"
+
+
+def build_tokens(task_id, user_id, title, description):
+    weights = Counter()
+    for token in tokenize(title):
+        weights[token] += TITLE_WEIGHT
+    for token in tokenize(description):
+        weights[token] += 1
+    return [
+        TaskSearchToken(task_id=task_id, user_id=user_id, token=token, weight=weight)
+        for token, weight in weights.items()
+    ]
+
+
+def index_tasks(rows, using, replace=True):
+    """(Re)build the token rows of tasks given as dicts of id/user/title/description"""
+    if uses_native_index(using):
+        return
+    rows = list(rows)
+    if replace:
+        TaskSearchToken.objects.using(using).filter(
+            task_id__in=[row["id"] for row in rows]
+        ).delete()
+    tokens = []
+    for row in rows:
+        tokens.extend(
+            build_tokens(row["id"], row["user"], row["title"], row["description"])
+        )
+    TaskSearchToken.objects.using(using).bulk_create(tokens, batch_size=1000)
+
+
+def search_task_ids(user, queryset, term, limit):
+    """Ids of the user's best matching tasks, best first"""
+    terms = tokenize(term)
+    if not terms:
+        return []
+
+    if uses_native_index(queryset.db):
+        against = " ".join(f"{token}*" for token in terms)
+        ranked = (
+            queryset.annotate(
+                rank=RawSQL(
+                    "MATCH (title, description) AGAINST (%s IN BOOLEAN MODE)",
+                    (against,),
+                )
+            )
+            .filter(rank__gt=0)
+            .order_by("-rank", "-id")
+        )
+        return list(ranked.values_list("id", flat=True)[:limit])
+
+    # Earlier words must match whole, the last one may still be being typed.
+    matches = Q(token__startswith=terms[-1])
+    if len(terms) > 1:
+        matches |= Q(token__in=terms[:-1])
+    ranked = (
+        TaskSearchToken.objects.using(queryset.db)
+        .filter(matches, user_id=user.pk)
+        .values("task")
+        .annotate(rank=Sum("weight"))
+        .order_by("-rank", "-task")
+    )
+    return [row["task"] for row in ranked[:limit]]
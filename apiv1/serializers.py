@@ -1,19 +1,40 @@
-from rest_framework import serializers
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from tasks.models import TaskModel
 from django.contrib.auth import get_user_model
 from dj_rest_auth.serializers import LoginSerializer
 
+from .timing import timed
+
 MyUser = get_user_model()
 
 
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """Count producing ``.data`` as serializer time in the request timings"""
+
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
+
+
 class CustomLoginSerializer(LoginSerializer):
     username = None
     email = serializers.EmailField(required=True, allow_blank=False)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = MyUser
+        list_serializer_class = TimedListSerializer
         fields = ("email", "password")
         extra_kwargs = {
             "password": {"write_only": True},
@@ -41,8 +62,13 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class TaskModelSerializer(serializers.ModelSerializer):
+class SignedTokenSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+
+class TaskModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
+        list_serializer_class = TimedListSerializer
         fields = (
             "id",
             "title",
@@ -56,3 +82,70 @@ class TaskModelSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             "user": {"read_only": True},
         }
+
+
+class TaskStatsSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    created_today = serializers.IntegerField()
+    updated_today = serializers.IntegerField()
+    last_activity = serializers.DateTimeField(allow_null=True)
+
+
+class ValuesSerializer:
+    """Read-only fast path of a ModelSerializer over ``.values()`` rows.
+
+    Each field gets a converter compiled once per call, so the output is
+    identical to ``serializer_class(instances, many=True).data`` without
+    building model instances or running the field machinery per row.
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        self.fields = {
+            name: field
+            for name, field in serializer_class().fields.items()
+            if not field.write_only and (fields is None or name in fields)
+        }
+        self.columns = tuple(field.source for field in self.fields.values())
+
+    def get_converter(self, field):
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # .values() already yields the raw key of a foreign key column.
+            return None if field.pk_field is None else field.pk_field.to_representation
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+            tz = field.timezone if hasattr(field, "timezone") else None
+            tz = tz or field.default_timezone()
+            if output_format is None or output_format.lower() != ISO_8601 or not tz:
+                return field.to_representation
+
+            def to_iso(value):
+                if timezone.is_naive(value):
+                    return field.to_representation(value)
+                value = value.astimezone(tz).isoformat()
+                if value.endswith("+00:00"):
+                    value = value[:-6] + "Z"
+                return value
+
+            return to_iso
+        if isinstance(field, (serializers.CharField, serializers.IntegerField)):
+            # The database driver already returns str / int for these columns.
+            return None
+        return field.to_representation
+
+    def iter(self, rows):
+        fields = [
+            (name, field.source, self.get_converter(field))
+            for name, field in self.fields.items()
+        ]
+        for row in rows:
+            item = {}
+            for name, source, convert in fields:
+                value = row[source]
+                if value is not None and convert is not None:
+                    value = convert(value)
+                item[name] = value
+            yield item
+
+    def many(self, rows):
+        with timed("serialize"):
+            return list(self.iter(rows))
@@ -0,0 +1,198 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from tasks.models import TaskChange, TaskModel, TaskUserStats
+from tasks.sharding import get_shard
+from tasks.signals import tasks_bulk_changed
+
+from .authentication import bump_user_generation, invalidate_token
+from .cache import invalidate_user_tasks
+from .changes import record_changes
+from .routers import pin_user
+from .search import index_tasks, uses_native_index
+from .stats import apply_changes, count_updated_today, day_start
+from .timing import record_query
+
+MyUser = get_user_model()
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # A no-op unless RequestTimingMiddleware samples the current request.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _after_write(user_id):
+    invalidate_user_tasks(user_id)
+    if getattr(settings, "DATABASE_REPLICAS", []):
+        # Whichever worker serves the new generation must not read it from
+        # a replica that has not caught up, or the stale rows get cached.
+        pin_user(user_id)
+
+
+def _invalidate(user_id, using):
+    _after_write(user_id)
+    # Again at commit time: a concurrent read may have cached the
+    # pre-transaction rows under the intermediate generation.
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: _after_write(user_id), using=using)
+
+
+@receiver(post_save, sender=TaskModel)
+@receiver(post_delete, sender=TaskModel)
+def invalidate_task_cache(sender, instance, using, **kwargs):
+    _invalidate(instance.user_id, using)
+
+
+@receiver(tasks_bulk_changed, sender=TaskModel)
+def invalidate_task_cache_bulk(sender, user_id, using, **kwargs):
+    _invalidate(user_id, using)
+
+
+@receiver(post_save, sender=TaskModel)
+def index_task(sender, instance, created, using, update_fields, **kwargs):
+    if update_fields is not None and not {"title", "description"} & set(update_fields):
+        return
+    text = (instance.title, instance.description)
+    if not created and getattr(instance, "_indexed_text", None) == text:
+        return
+    row = {
+        "id": instance.pk,
+        "user": instance.user_id,
+        "title": instance.title,
+        "description": instance.description,
+    }
+    index_tasks([row], using, replace=not created)
+    instance._indexed_text = text
+
+
+@receiver(tasks_bulk_changed, sender=TaskModel)
+def index_tasks_bulk(sender, using, created, updated, **kwargs):
+    if uses_native_index(using):
+        return
+    for ids, replace in ((created, False), (updated, True)):
+        if ids:
+            rows = (
+                TaskModel.objects.using(using)
+                .filter(id__in=ids)
+                .values("id", "user", "title", "description")
+            )
+            index_tasks(rows, using, replace=replace)
+
+
+@receiver(post_save, sender=TaskModel)
+def log_task_change(sender, instance, using, **kwargs):
+    record_changes(instance.user_id, [instance.pk], using)
+
+
+@receiver(post_delete, sender=TaskModel)
+def log_task_deletion(sender, instance, using, origin=None, **kwargs):
+    # Deleting the user cascades to the log too, there is nobody to sync.
+    if isinstance(origin, MyUser):
+        return
+    record_changes(instance.user_id, [instance.pk], using, deleted=True)
+
+
+@receiver(tasks_bulk_changed, sender=TaskModel)
+def log_task_changes_bulk(sender, user_id, using, created, updated, **kwargs):
+    # Bulk deletions send post_delete for every row, which logs them.
+    record_changes(user_id, [*created, *updated], using)
+
+
+@receiver(pre_save, sender=TaskModel)
+def remember_task_update(sender, instance, **kwargs):
+    # Read before auto_now stamps the new value.
+    instance._previous_updated_at = instance.__dict__.get("updated_at")
+
+
+@receiver(post_save, sender=TaskModel)
+def count_task_change(sender, instance, created, using, update_fields, **kwargs):
+    if created:
+        apply_changes(instance.user_id, using, total=1, created=1, updated=1)
+        return
+    previous = getattr(instance, "_previous_updated_at", None)
+    if update_fields is not None and "updated_at" not in update_fields:
+        apply_changes(instance.user_id, using)
+    elif previous is None:
+        # Not loaded with the task, so it may or may not be counted already.
+        apply_changes(
+            instance.user_id,
+            using,
+            updated_today=count_updated_today(instance.user_id, using),
+        )
+    else:
+        today = day_start(timezone.localdate())
+        apply_changes(instance.user_id, using, updated=int(previous < today))
+
+
+@receiver(post_delete, sender=TaskModel)
+def count_task_deletion(sender, instance, using, origin=None, **kwargs):
+    # The user's stats row goes too.
+    if isinstance(origin, MyUser):
+        return
+    today = day_start(timezone.localdate())
+    apply_changes(
+        instance.user_id,
+        using,
+        total=-1,
+        created=-int(instance.created_at >= today),
+        updated=-int(instance.updated_at >= today),
+    )
+
+
+@receiver(tasks_bulk_changed, sender=TaskModel)
+def count_task_changes_bulk(sender, user_id, using, created, updated, **kwargs):
+    # Bulk deletions send post_delete for every row, which counts them.
+    if not created and not updated:
+        return
+    apply_changes(
+        user_id,
+        using,
+        total=len(created),
+        created=len(created),
+        updated=len(created),
+        updated_today=count_updated_today(user_id, using) if updated else None,
+    )
+
+
+@receiver(pre_delete, sender=MyUser)
+def delete_sharded_tasks(sender, instance, using, **kwargs):
+    # The deletion collector only cascades on the user's own database.
+    shard = get_shard(instance.pk)
+    if shard == using:
+        return
+    TaskModel.objects.using(shard).filter(user_id=instance.pk).delete()
+    TaskChange.objects.using(shard).filter(user_id=instance.pk).delete()
+    TaskUserStats.objects.using(shard).filter(user_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=MyUser)
+def invalidate_user_tokens(sender, instance, created, update_fields, **kwargs):
+    # Cached credentials carry a copy of the user, so any change other than
+    # the last_login stamp written on login drops them. A new user has none.
+    if created or update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    bump_user_generation(instance.pk)
+    for key in Token.objects.filter(user=instance).values_list("key", flat=True):
+        invalidate_token(key)
+
+
+@receiver(user_logged_out)
+def invalidate_logged_out_tokens(sender, user, **kwargs):
+    if user is None:
+        return
+    for key in Token.objects.filter(user=user).values_list("key", flat=True):
+        invalidate_token(key)
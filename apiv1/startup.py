@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+
+def warm_urls():
+    from django.urls import get_resolver
+
+    # Compiles every pattern, included ones too.
+    get_resolver().reverse_dict
+
+
+def warm_models():
+    from django.apps import apps
+
+    # The first get_fields() walks the relations of every model.
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+
+def warm_serializers():
+    from .serializers import TaskModelSerializer, UserSerializer, ValuesSerializer
+
+    for serializer_class in (TaskModelSerializer, UserSerializer):
+        serializer_class().fields
+    ValuesSerializer(TaskModelSerializer)
+
+
+def warm_schema():
+    from .schema import get_schema_document
+
+    get_schema_document("json")
+
+
+WARM_UP_STEPS = (
+    ("urls", warm_urls),
+    ("models", warm_models),
+    ("serializers", warm_serializers),
+    ("schema", warm_schema),
+)
+
+
+def warm_up():
+    """Do the work a worker's first request would, before workers are forked.
+
+    Returns the (step, seconds) of each step. Database connections are closed
+    afterwards so no socket is shared between workers; connect_databases()
+    opens them again in each worker.
+    """
+    timings = []
+    for name, step in WARM_UP_STEPS:
+        start = time.perf_counter()
+        step()
+        timings.append((name, time.perf_counter() - start))
+    connections.close_all()
+    return timings
+
+
+def connect_databases():
+    """Open this process' connections, kept for CONN_MAX_AGE"""
+    for connection in connections.all():
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            logger.warning("Could not connect to %s", connection.alias, exc_info=True)
+
+
+def profile_startup(warm, path):
+    """Milliseconds spent in each startup phase of this (fresh) interpreter"""
+    import django
+    from django.apps.config import AppConfig
+
+    phases, app_timings = [], defaultdict(dict)
+
+    def timed(name, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        phases.append((name, (time.perf_counter() - start) * 1000))
+        return result
+
+    def time_app_step(app_config, step):
+        method = getattr(app_config, step)
+
+        def timed_step(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                app_timings[app_config.label][step] = elapsed
+
+        setattr(app_config, step, timed_step)
+
+    create = AppConfig.create.__func__
+
+    def timed_create(cls, entry):
+        start = time.perf_counter()
+        app_config = create(cls, entry)
+        app_timings[app_config.label]["import"] = (time.perf_counter() - start) * 1000
+        time_app_step(app_config, "import_models")
+        time_app_step(app_config, "ready")
+        return app_config
+
+    timed("settings", lambda: settings.INSTALLED_APPS)
+    AppConfig.create = classmethod(timed_create)
+    try:
+        timed("apps", django.setup, False)
+    finally:
+        AppConfig.create = classmethod(create)
+
+    if warm:
+        for name, seconds in warm_up():
+            phases.append((f"warm_up.{name}", seconds * 1000))
+
+    from django.test import Client
+
+    hosts = [host for host in settings.ALLOWED_HOSTS if "*" not in host]
+    client = Client(HTTP_HOST=hosts[0].lstrip(".") if hosts else "localhost")
+    # Done by get_wsgi_application() when a worker loads the app.
+    timed("middleware", client.handler.load_middleware)
+    with count_setup() as setup:
+        timed("first request", client.get, path)
+    timed("second request", client.get, path)
+    return {"phases": phases, "apps": app_timings, "first_request_setup": setup}
+
+
+@contextmanager
+def count_setup():
+    """Count the one-off setup done inside the block, that warm_up() covers.
+
+    URL resolvers populated, model relation trees built, database
+    connections opened and modules imported.
+    """
+    from django.db.backends.signals import connection_created
+    from django.db.models.options import Options
+    from django.urls.resolvers import URLResolver
+
+    setup = {"url_resolvers": 0, "relation_trees": 0, "connections": 0}
+    patched = [
+        (URLResolver, "_populate", "url_resolvers"),
+        (Options, "_populate_directed_relation_graph", "relation_trees"),
+    ]
+
+    def counting(method, key):
+        def counted(*args, **kwargs):
+            setup[key] += 1
+            return method(*args, **kwargs)
+
+        return counted
+
+    def count_connection(**kwargs):
+        setup["connections"] += 1
+
+    originals = [getattr(owner, name) for owner, name, _ in patched]
+    for (owner, name, key), method in zip(patched, originals):
+        setattr(owner, name, counting(method, key))
+    connection_created.connect(count_connection)
+    modules = set(sys.modules)
+    try:
+        yield setup
+    finally:
+        for (owner, name, _), method in zip(patched, originals):
+            setattr(owner, name, method)
+        connection_created.disconnect(count_connection)
+        setup["imports"] = sorted(set(sys.modules) - modules)
+
+
+def parse_import_times(output):
+    """Cumulative milliseconds per top-level package from ``-X importtime``"""
+    totals = defaultdict(float)
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|", 2)
+        # Nested imports are indented, and counted in their importer.
+        if name[1:].startswith(" ") or not cumulative.strip().isdigit():
+            continue
+        totals[name.strip().split(".")[0]] += int(cumulative) / 1000
+    return dict(totals)
+
+
+def run_profile(warm=True, path="/api/v1/tasks/", import_times=False):
+    """profile_startup() in a new interpreter, as a freshly started worker"""
+    code = (
+        "import json; from apiv1.startup import profile_startup; "
+        f"print(json.dumps(profile_startup({warm!r}, {path!r})))"
+    )
+    command = [sys.executable, *(["-X", "importtime"] if import_times else [])]
+    result = subprocess.run(
+        [*command, "-c", code],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = json.loads(result.stdout.strip().splitlines()[-1])
+    if import_times:
+        profile["imports"] = parse_import_times(result.stderr)
+    return profile
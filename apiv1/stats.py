@@ -0,0 +1,160 @@
+from datetime import datetime, time
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, F, Max, Q, Value, When
+from django.utils import timezone
+
+from tasks.models import TaskModel, TaskUserStats
+
+COUNTERS = ("total", "created_today", "updated_today")
+EMPTY = {"total": 0, "created_today": 0, "updated_today": 0, "last_activity": None}
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def count_tasks(user_ids, using, day):
+    """Counters of ``user_ids`` counted from their task rows, by user id"""
+    start = day_start(day)
+    rows = (
+        TaskModel.objects.using(using)
+        .filter(user_id__in=user_ids)
+        .order_by()
+        .values("user")
+        .annotate(
+            total=Count("id"),
+            created_today=Count("id", filter=Q(created_at__gte=start)),
+            updated_today=Count("id", filter=Q(updated_at__gte=start)),
+            last_activity=Max("updated_at"),
+        )
+    )
+    return {row.pop("user"): row for row in rows}
+
+
+def stored_counts(stats, day):
+    """The counters a stats row stands for on ``day``"""
+    fresh = stats.day == day
+    return {
+        "total": stats.total,
+        "created_today": stats.created_today if fresh else 0,
+        "updated_today": stats.updated_today if fresh else 0,
+        "last_activity": stats.last_activity,
+    }
+
+
+def shift(field, delta, fresh=None):
+    """UPDATE expression adding ``delta`` to ``field``, never below zero.
+
+    Rows not matching ``fresh`` (counters of an earlier day) start from zero.
+    """
+    condition = Q(**{f"{field}__gte": -delta}) if delta < 0 else Q()
+    if fresh is not None:
+        condition &= fresh
+    if not condition:
+        return F(field) + delta
+    return Case(
+        When(condition, then=F(field) + delta),
+        default=Value(max(delta, 0)),
+        output_field=models.PositiveIntegerField(),
+    )
+
+
+def apply_changes(user_id, using, total=0, created=0, updated=0, updated_today=None):
+    """Add task writes of a user to their stats, in the caller's transaction.
+
+    ``updated_today`` replaces that counter instead of shifting it. A user
+    without a stats row gets one counted from their tasks, which already
+    include the change.
+    """
+    now = timezone.now()
+    day = timezone.localdate(now)
+    fresh = Q(day=day)
+    values = {
+        "created_today": shift("created_today", created, fresh),
+        "updated_today": (
+            shift("updated_today", updated, fresh)
+            if updated_today is None
+            else updated_today
+        ),
+        "day": day,
+        "last_activity": now,
+    }
+    if total:
+        values["total"] = shift("total", total)
+    stats = TaskUserStats.objects.using(using).filter(user_id=user_id)
+    if stats.update(**values):
+        return
+    try:
+        with transaction.atomic(using=using):
+            counts = count_tasks([user_id], using, day).get(user_id, EMPTY)
+            stats.create(user_id=user_id, day=day, **{**counts, "last_activity": now})
+    except IntegrityError:
+        # Created by a concurrent write, which could not see this one.
+        stats.update(**values)
+
+
+def count_updated_today(user_id, using):
+    """Tasks of a user changed today, an index range of task_user_updated_idx"""
+    start = day_start(timezone.localdate())
+    return (
+        TaskModel.objects.using(using)
+        .filter(user_id=user_id, updated_at__gte=start)
+        .count()
+    )
+
+
+def reconcile_stats(user_ids, using):
+    """Recount the stats of ``user_ids`` on ``using``, return how many were off.
+
+    Existing rows are locked while counting: writes of these users wait and
+    apply their change on top of the recount.
+    """
+    day = timezone.localdate()
+    with transaction.atomic(using=using):
+        stored = (
+            TaskUserStats.objects.using(using).select_for_update().in_bulk(user_ids)
+        )
+        counted = count_tasks(user_ids, using, day)
+        repaired, missing = [], []
+        for user_id in user_ids:
+            counts = counted.get(user_id, EMPTY)
+            stats = stored.get(user_id)
+            if stats is None:
+                # Users without tasks are served without a row.
+                if user_id in counted:
+                    missing.append(TaskUserStats(user_id=user_id, day=day, **counts))
+                continue
+            current = stored_counts(stats, day)
+            if all(current[name] == counts[name] for name in COUNTERS):
+                continue
+            for name in COUNTERS:
+                setattr(stats, name, counts[name])
+            stats.day = day
+            if stats.last_activity is None or (
+                counts["last_activity"] is not None
+                and counts["last_activity"] > stats.last_activity
+            ):
+                stats.last_activity = counts["last_activity"]
+            repaired.append(stats)
+
+        TaskUserStats.objects.using(using).bulk_update(
+            repaired, [*COUNTERS, "day", "last_activity"]
+        )
+        # A row written meanwhile by a user's first task is already right.
+        TaskUserStats.objects.using(using).bulk_create(missing, ignore_conflicts=True)
+    return len(repaired) + len(missing)
+
+
+def get_user_stats(user_id):
+    """The stats of a user, counted from their tasks when there is no row yet"""
+    day = timezone.localdate()
+    stats = (
+        TaskUserStats.objects.db_manager(hints={"user_id": user_id})
+        .filter(user_id=user_id)
+        .first()
+    )
+    if stats is not None:
+        return stored_counts(stats, day)
+    using = TaskModel.objects.for_user(user_id).db
+    return count_tasks([user_id], using, day).get(user_id, EMPTY)
@@ -0,0 +1,137 @@
+import heapq
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .metrics import metrics_enabled, observe_request
+
+logger = logging.getLogger(__name__)
+
+# Timings of the request being served, set by RequestTimingMiddleware for
+# sampled requests, and for every request while metrics are enabled.
+# Everything here is a no-op while it is unset.
+current_timings = ContextVar("current_timings", default=None)
+
+
+class RequestTimings:
+    """Seconds spent per phase of one request, and its SQL statements"""
+
+    def __init__(self, sampled, slow_queries):
+        self.sampled = sampled
+        self.durations = defaultdict(float)
+        self.queries = 0
+        self.slow_queries = slow_queries
+        self.slowest = []
+        self.active = set()
+
+    def add(self, name, seconds):
+        self.durations[name] += seconds
+
+    def add_query(self, sql, seconds):
+        self.queries += 1
+        self.durations["db"] += seconds
+        if not self.slow_queries:
+            return
+        # A min-heap of the slowest statements; the id breaks ties.
+        entry = (seconds, self.queries, sql)
+        if len(self.slowest) < self.slow_queries:
+            heapq.heappush(self.slowest, entry)
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def get_slowest(self):
+        return [
+            {"ms": round(seconds * 1000, 2), "sql": sql}
+            for seconds, _, sql in sorted(self.slowest, reverse=True)
+        ]
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the request's ``name`` phase.
+
+    Also a decorator for sync functions. Nested blocks of the same phase
+    (an authenticator calling another) are only counted once.
+    """
+    timings = current_timings.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.active.discard(name)
+        timings.add(name, time.perf_counter() - start)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection by apiv1.signals"""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(sql, time.perf_counter() - start)
+
+
+def start_request():
+    """Return the (timings, context token, start) of a new request"""
+    start = time.perf_counter()
+    sampled = random.random() < getattr(settings, "REQUEST_TIMING_SAMPLE_RATE", 0)
+    if not sampled and not metrics_enabled():
+        return None, None, start
+    slow_queries = getattr(settings, "REQUEST_TIMING_SLOW_QUERIES", 5)
+    timings = RequestTimings(sampled, slow_queries if sampled else 0)
+    return timings, current_timings.set(timings), start
+
+
+def finish_request(request, response, timings, start):
+    """Record the metrics of a request, and its Server-Timing and log lines"""
+    total = time.perf_counter() - start
+    if metrics_enabled():
+        observe_request(request, response, total, timings)
+    if timings is not None and not timings.sampled:
+        timings = None
+    slow = total * 1000 >= getattr(settings, "REQUEST_TIMING_SLOW_MS", 500)
+    if timings is None and not slow:
+        return
+
+    record = {
+        "method": request.method,
+        "path": request.path,
+        "status": response.status_code,
+        "total_ms": round(total * 1000, 2),
+    }
+    if timings is not None:
+        record["db_queries"] = timings.queries
+        for name, seconds in timings.durations.items():
+            record[f"{name}_ms"] = round(seconds * 1000, 2)
+        response["Server-Timing"] = get_server_timing(timings, total)
+
+    if slow:
+        if timings is not None:
+            record["slowest_queries"] = timings.get_slowest()
+        logger.warning(json.dumps(record), extra={"timings": record})
+    else:
+        logger.info(json.dumps(record), extra={"timings": record})
+
+
+def get_server_timing(timings, total):
+    metrics = []
+    for name, seconds in sorted(timings.durations.items()):
+        metric = f"{name};dur={seconds * 1000:.2f}"
+        if name == "db":
+            metric += f';desc="{timings.queries} queries"'
+        metrics.append(metric)
+    metrics.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(metrics)
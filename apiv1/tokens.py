@@ -0,0 +1,147 @@
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import jwt
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.utils import timezone
+
+from .models import DeniedToken
+
+ACCESS = "access"
+REFRESH = "refresh"
+ALGORITHM = "HS256"
+DENIED_CACHE_PREFIX = "auth:denied:"
+
+MyUser = get_user_model()
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _signing_key():
+    return getattr(settings, "JWT_SIGNING_KEY", None) or settings.SECRET_KEY
+
+
+def _lifetime(token_type):
+    if token_type == ACCESS:
+        seconds = getattr(settings, "JWT_ACCESS_TOKEN_LIFETIME", 300)
+    else:
+        seconds = getattr(settings, "JWT_REFRESH_TOKEN_LIFETIME", 7 * 24 * 3600)
+    return timedelta(seconds=seconds)
+
+
+def encode_token(user, token_type):
+    now = datetime.now(tz=dt_timezone.utc)
+    payload = {
+        "token_type": token_type,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + _lifetime(token_type),
+        "user_id": user.pk,
+    }
+    if token_type == ACCESS:
+        # Enough of the user for request.user without a database lookup.
+        payload.update(username=user.username, email=user.email, is_staff=user.is_staff)
+    return jwt.encode(payload, _signing_key(), algorithm=ALGORITHM)
+
+
+def issue_token_pair(user):
+    return {
+        "access": encode_token(user, ACCESS),
+        "refresh": encode_token(user, REFRESH),
+    }
+
+
+def _seconds_left(claims):
+    expires_at = datetime.fromtimestamp(claims["exp"], tz=dt_timezone.utc)
+    return max(int((expires_at - timezone.now()).total_seconds()), 1)
+
+
+def is_denied(claims):
+    """Whether a token is on the denylist.
+
+    The cache answers first. For access tokens that is all: a revocation
+    the cache lost is bounded by their short lifetime, and every request
+    stays free of queries. For refresh tokens a miss (never looked up, or
+    evicted) is decided by the table and cached until the token expires;
+    add() never overwrites the True that deny() sets first.
+    """
+    cache = caches["default"]
+    key = DENIED_CACHE_PREFIX + claims["jti"]
+    denied = cache.get(key)
+    if denied is None and claims["token_type"] == ACCESS:
+        return False
+    if denied is None:
+        denied = (
+            DeniedToken.objects.using(DEFAULT_DB_ALIAS)
+            .filter(jti=claims["jti"])
+            .exists()
+        )
+        cache.add(key, denied, _seconds_left(claims))
+    return denied
+
+
+def decode_token(token, token_type):
+    """Verify signature, expiry, type and the denylist; return the claims"""
+    try:
+        claims = jwt.decode(token, _signing_key(), algorithms=[ALGORITHM])
+    except jwt.InvalidTokenError:
+        raise InvalidToken()
+    if claims.get("token_type") != token_type or "jti" not in claims:
+        raise InvalidToken()
+    if is_denied(claims):
+        raise InvalidToken()
+    return claims
+
+
+def deny(claims):
+    """Add a token to the denylist; False when it was already there"""
+    expires_at = datetime.fromtimestamp(claims["exp"], tz=dt_timezone.utc)
+    caches["default"].set(
+        DENIED_CACHE_PREFIX + claims["jti"], True, _seconds_left(claims)
+    )
+    try:
+        with transaction.atomic():
+            DeniedToken.objects.create(jti=claims["jti"], expires_at=expires_at)
+    except IntegrityError:
+        return False
+    return True
+
+
+def purge_denied_tokens(batch_size=1000):
+    """Delete expired denylist rows, which can never match again.
+
+    Returns the number of rows deleted.
+    """
+    denied = DeniedToken.objects.using(DEFAULT_DB_ALIAS)
+    removed = 0
+    while True:
+        batch = list(
+            denied.filter(expires_at__lt=timezone.now()).values_list("pk", flat=True)[
+                :batch_size
+            ]
+        )
+        if not batch:
+            return removed
+        removed += denied.filter(pk__in=batch).delete()[0]
+
+
+def refresh_token_pair(refresh):
+    """Rotate a refresh token: it is denied and a new pair is issued"""
+    claims = decode_token(refresh, REFRESH)
+    if not deny(claims):
+        raise InvalidToken()
+    try:
+        user = MyUser.objects.get(pk=claims["user_id"], is_active=True)
+    except MyUser.DoesNotExist:
+        raise InvalidToken()
+    return issue_token_pair(user)
+
+
+def revoke_token(token, token_type):
+    claims = decode_token(token, token_type)
+    deny(claims)
@@ -1,9 +1,22 @@
 from django.urls import path, include, re_path
 from rest_framework.routers import SimpleRouter
 
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularSwaggerView
 
-from .views import EmailSenderView, TaskModelViewSet, SignUpUser, CustomLoginView
+from .views import (
+    EmailSenderView,
+    TaskModelViewSet,
+    SignUpUser,
+    CustomLoginView,
+    TaskCacheStatsView,
+    AuthStatsView,
+    MetricsView,
+    SchemaView,
+    SignedTokenRefreshView,
+    SignedTokenRevokeView,
+)
+
+from .async_views import AsyncTaskDetailView, AsyncTaskListView
 
 router = SimpleRouter()
 router.register("tasks", TaskModelViewSet, basename="tasks")
@@ -13,6 +26,14 @@ urlpatterns = [
     path("auth/", include("rest_framework.urls")),
     path("rest-auth/signup/", SignUpUser.as_view(), name="signup"),
     path("rest-auth/login/", CustomLoginView.as_view(), name="login"),
+    path(
+        "rest-auth/token/refresh/",
+        SignedTokenRefreshView.as_view(),
+        name="token_refresh",
+    ),
+    path(
+        "rest-auth/token/revoke/", SignedTokenRevokeView.as_view(), name="token_revoke"
+    ),
     path("rest-auth/", include("dj_rest_auth.urls")),
     # this url is used to generate email content
     re_path(
@@ -20,6 +41,15 @@ urlpatterns = [
         EmailSenderView.as_view(),
         name="password_reset_confirm",
     ),
-    path("schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("async/tasks/", AsyncTaskListView.as_view(), name="async-tasks-list"),
+    path(
+        "async/tasks/<int:pk>/",
+        AsyncTaskDetailView.as_view(),
+        name="async-tasks-detail",
+    ),
+    path("stats/cache/", TaskCacheStatsView.as_view(), name="cache-stats"),
+    path("stats/auth/", AuthStatsView.as_view(), name="auth-stats"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("schema/", SchemaView.as_view(), name="schema"),
     path("swagger/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger"),
 ] + router.urls
@@ -1,17 +1,62 @@
 from django.shortcuts import render
+from django.http import HttpResponse, StreamingHttpResponse
 from django.views.generic import TemplateView
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework import viewsets
-from rest_framework.permissions import AllowAny
-from rest_framework.generics import CreateAPIView
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from drf_spectacular.utils import extend_schema
+from rest_framework import serializers, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.views import APIView
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.generics import CreateAPIView, GenericAPIView
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework import status
 from dj_rest_auth.views import LoginView
 from tasks.models import TaskModel
+from tasks.sharding import get_shard
 
-from .serializers import TaskModelSerializer, UserSerializer, CustomLoginSerializer
+from .serializers import (
+    TaskModelSerializer,
+    TaskStatsSerializer,
+    UserSerializer,
+    CustomLoginSerializer,
+    SignedTokenSerializer,
+)
 from .permissions import IsAuthor
+from .routers import SAFE_METHODS, check_shard_writable
+from .conditional import ConditionalGetMixin
+from .cache import CachedResponseMixin, cache_stats
+from .authentication import auth_stats
+from .metrics import PrometheusRenderer, render as render_metrics
+from .schema import get_schema_document
+from .stats import get_user_stats
+from .mixins import SearchListMixin, SparseFieldsMixin, ValuesListModelMixin
+from .export import (
+    CSVRenderer,
+    NDJSONRenderer,
+    accepts_gzip,
+    export_lines,
+    gzip_stream,
+)
+from .bulk import bulk_insert, send_bulk_changed
+from .changes import decode_cursor, encode_cursor, read_changes
+from .imports import IMPORT_FORMATS, guess_format, import_tasks
+from .tokens import (
+    ACCESS,
+    REFRESH,
+    InvalidToken,
+    issue_token_pair,
+    refresh_token_pair,
+    revoke_token,
+)
 
 # Create your views here.
 
@@ -21,9 +66,18 @@ MyUser = get_user_model()  # CustomUser model to make references
 class CustomLoginView(LoginView):
     serializer_class = CustomLoginSerializer
 
+    def process_login(self):
+        # Clients authenticate with the returned token, the session that
+        # django_login() would start is never read. Only last_login is kept.
+        user_logged_in.send(
+            sender=self.user.__class__, request=self.request, user=self.user
+        )
+
     def get_response(self):
         response = super().get_response()
         response.data = {"token": response.data["key"]}
+        if settings.USE_JWT:
+            response.data.update(issue_token_pair(self.user))
         return response
 
 
@@ -37,10 +91,55 @@ class SignUpUser(CreateAPIView):
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
-        token, created = Token.objects.get_or_create(user=serializer.instance)
-        return Response(
-            {"token": token.key}, status=status.HTTP_201_CREATED, headers=headers
-        )
+        # The user was just created, there is no token to look up.
+        token = Token.objects.create(user=serializer.instance)
+        data = {"token": token.key}
+        if settings.USE_JWT:
+            data.update(issue_token_pair(serializer.instance))
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
+
+
+class SignedTokenRefreshView(GenericAPIView):
+    """Exchange a refresh token for a new access/refresh pair"""
+
+    serializer_class = SignedTokenSerializer
+    permission_classes = (AllowAny,)
+    authentication_classes = ()
+
+    def get_authenticate_header(self, request):
+        return "Bearer"
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            data = refresh_token_pair(serializer.validated_data["refresh"])
+        except InvalidToken:
+            raise AuthenticationFailed("Token is invalid or expired.")
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class SignedTokenRevokeView(GenericAPIView):
+    """Deny a refresh token, and the access token of the request if any"""
+
+    serializer_class = SignedTokenSerializer
+    permission_classes = (AllowAny,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            revoke_token(serializer.validated_data["refresh"], REFRESH)
+        except InvalidToken:
+            raise AuthenticationFailed("Token is invalid or expired.")
+
+        access = request.META.get("HTTP_AUTHORIZATION", "").split()
+        if len(access) == 2 and access[0] == "Bearer":
+            try:
+                revoke_token(access[1], ACCESS)
+            except InvalidToken:
+                pass
+        return Response({"detail": "Token revoked."}, status=status.HTTP_200_OK)
 
 
 # Create your views here.
@@ -48,14 +147,305 @@ class EmailSenderView(TemplateView):
     template_name = "password_reset_confirm.html"
 
 
-class TaskModelViewSet(viewsets.ModelViewSet):
+class TaskModelViewSet(
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    SearchListMixin,
+    SparseFieldsMixin,
+    ValuesListModelMixin,
+    viewsets.ModelViewSet,
+):
     permission_classes = (IsAuthor,)
     serializer_class = TaskModelSerializer
+    required_columns = ("user",)
 
     def get_queryset(self):
-        item = TaskModel.objects.filter(user=self.request.user)
-        return item
+        return TaskModel.objects.for_user(self.request.user.pk)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in SAFE_METHODS:
+            check_shard_writable(request.user.pk)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
-        return super().perform_create(serializer)
+        # By key: a ClaimsUser would be loaded to be assigned to a relation.
+        serializer.save(user_id=self.request.user.pk)
+
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request, *args, **kwargs):
+        """Create, update or delete a list of the user's tasks in one transaction"""
+        handler = {
+            "POST": self.bulk_create,
+            "PATCH": self.bulk_update,
+            "DELETE": self.bulk_destroy,
+        }[request.method]
+        return handler(request)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        renderer_classes=(NDJSONRenderer, CSVRenderer),
+    )
+    def export(self, request, *args, **kwargs):
+        """Stream every task of the user as NDJSON or CSV (?format=ndjson|csv)"""
+        renderer = request.accepted_renderer
+        queryset = self.filter_queryset(self.get_queryset())
+        chunks = export_lines(
+            queryset,
+            self.get_serializer_class(),
+            renderer.format,
+            getattr(settings, "TASKS_EXPORT_CHUNK_SIZE", 2000),
+        )
+
+        gzip = accepts_gzip(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        response = StreamingHttpResponse(
+            gzip_stream(chunks) if gzip else chunks,
+            content_type=f"{renderer.media_type}; charset=utf-8",
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="tasks.{renderer.format}"'
+        response["Vary"] = "Accept-Encoding"
+        if gzip:
+            response["Content-Encoding"] = "gzip"
+        return response
+
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request, *args, **kwargs):
+        """Tasks changed and ids deleted since ``?since=<cursor>``, and a new cursor.
+
+        Without ``since`` the whole log is replayed, a full sync. Keep calling
+        with the returned cursor while ``has_more`` is true.
+        """
+        since = request.query_params.get("since")
+        shard = get_shard(request.user.pk)
+        sequence, synced_at = (
+            decode_cursor(since, shard) if since else (0, timezone.now())
+        )
+        queryset = self.get_queryset()
+        limit = self.paginator.get_page_size(request) if self.paginator else 100
+        changed, deleted, sequence, has_more = read_changes(
+            request.user, sequence, limit, queryset.db
+        )
+
+        values_serializer = self.get_values_serializer()
+        columns = tuple(dict.fromkeys(values_serializer.columns + ("id",)))
+        rows = {
+            row["id"]: row for row in queryset.filter(id__in=changed).values(*columns)
+        }
+        # A task missing here was deleted after this page; its tombstone follows.
+        results = values_serializer.many(rows[pk] for pk in changed if pk in rows)
+        return Response(
+            {
+                "changes": results,
+                "deleted": deleted,
+                "cursor": encode_cursor(
+                    sequence, synced_at if has_more else timezone.now(), shard
+                ),
+                "has_more": has_more,
+            }
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="stats",
+        serializer_class=TaskStatsSerializer,
+    )
+    def stats(self, request, *args, **kwargs):
+        """Task counts and last activity of the user, from a maintained row"""
+        serializer = self.get_serializer(get_user_stats(request.user.pk))
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=(MultiPartParser,),
+    )
+    def import_file(self, request, *args, **kwargs):
+        """Import an NDJSON or CSV upload ("file", optional "file_format")"""
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"file": ["This field is required."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        import_format = request.data.get("file_format") or guess_format(upload.name)
+        if import_format not in IMPORT_FORMATS:
+            return Response(
+                {"file_format": [f'"{import_format}" is not a valid choice.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        summary = import_tasks(
+            request.user,
+            upload,
+            import_format,
+            chunk_size=getattr(settings, "TASKS_IMPORT_CHUNK_SIZE", 1000),
+            max_errors=getattr(settings, "TASKS_IMPORT_MAX_ERRORS", 100),
+        )
+        return Response(summary, status=status.HTTP_200_OK)
+
+    def get_bulk_max_items(self):
+        return getattr(settings, "TASKS_BULK_MAX_ITEMS", 1000)
+
+    def bulk_create(self, request):
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=self.get_bulk_max_items(),
+        )
+        serializer.is_valid(raise_exception=True)
+        tasks = [
+            TaskModel(user_id=request.user.pk, **item)
+            for item in serializer.validated_data
+        ]
+        # On the shard, with the stats and change log writes of the receivers.
+        with transaction.atomic(using=self.get_queryset().db):
+            created = bulk_insert(self.get_queryset(), tasks)
+            self.send_bulk_changed(created=[task.id for task in created])
+
+        data = self.get_serializer(created, many=True).data
+        return Response({"results": data}, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request):
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            partial=True,
+            allow_empty=False,
+            max_length=self.get_bulk_max_items(),
+        )
+        valid = serializer.is_valid()
+        if not valid and not isinstance(serializer.errors, list):
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        errors = list(serializer.errors) if not valid else [{}] * len(request.data)
+        # JSON true/false would pass isinstance(pk, int) as 1/0.
+        ids = [
+            item.get("id") if isinstance(item, dict) else None for item in request.data
+        ]
+        ids = [
+            pk if isinstance(pk, int) and not isinstance(pk, bool) else None
+            for pk in ids
+        ]
+
+        with transaction.atomic(using=self.get_queryset().db):
+            tasks = (
+                self.get_queryset()
+                .select_for_update()
+                .in_bulk([pk for pk in ids if pk is not None])
+            )
+            seen = set()
+            for index, pk in enumerate(ids):
+                if pk is None:
+                    id_error = "A valid integer is required."
+                elif pk not in tasks:
+                    id_error = "Not found."
+                elif pk in seen:
+                    id_error = "Duplicate id."
+                else:
+                    seen.add(pk)
+                    continue
+                errors[index] = {**errors[index], "id": [id_error]}
+
+            if any(errors):
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+            now = timezone.now()
+            fields = {"updated_at"}
+            updated = []
+            for pk, values in zip(ids, serializer.validated_data):
+                task = tasks[pk]
+                for field, value in values.items():
+                    setattr(task, field, value)
+                # bulk_update() skips auto_now, so the timestamp is set by hand.
+                task.updated_at = now
+                fields.update(values)
+                updated.append(task)
+            TaskModel.objects.using(self.get_queryset().db).bulk_update(
+                updated, sorted(fields)
+            )
+            self.send_bulk_changed(updated=[task.id for task in updated])
+
+        data = self.get_serializer(updated, many=True).data
+        return Response({"results": data}, status=status.HTTP_200_OK)
+
+    def send_bulk_changed(self, **changes):
+        send_bulk_changed(self.request.user.pk, self.get_queryset().db, **changes)
+
+    def bulk_destroy(self, request):
+        ids_field = serializers.ListField(
+            child=serializers.IntegerField(min_value=1),
+            allow_empty=False,
+            max_length=self.get_bulk_max_items(),
+        )
+        try:
+            ids = ids_field.run_validation(request.data)
+        except serializers.ValidationError as exc:
+            return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic(using=self.get_queryset().db):
+            tasks = self.get_queryset().filter(id__in=ids)
+            found = set(tasks.values_list("id", flat=True))
+            tasks.delete()
+            self.send_bulk_changed(deleted=sorted(found))
+
+        results = [{"id": pk, "deleted": pk in found} for pk in ids]
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class TaskCacheStatsView(APIView):
+    """Hit and miss counters of the task response cache"""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(cache_stats())
+
+
+class MetricsView(APIView):
+    """Request, SQL and cache metrics of every worker, for Prometheus"""
+
+    permission_classes = (IsAdminUser,)
+    renderer_classes = (PrometheusRenderer,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(render_metrics())
+
+
+class SchemaView(SpectacularAPIView):
+    """The OpenAPI schema, generated once per code version (see apiv1.schema).
+
+    Always the public document, so ``?lang`` and ``?version`` are ignored.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        document = get_schema_document(renderer.format)
+        response = get_conditional_response(request, etag=document.etag)
+        if response is None:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f"; charset={renderer.charset}"
+            response = HttpResponse(document.content, content_type=content_type)
+            response["Content-Disposition"] = 'inline; filename="{}"'.format(
+                self._get_filename(request, None)
+            )
+        response["ETag"] = document.etag
+        max_age = getattr(settings, "SCHEMA_CACHE_MAX_AGE", 86400)
+        response["Cache-Control"] = f"public, max-age={max_age}"
+        return response
+
+
+class AuthStatsView(APIView):
+    """Token cache and Basic credential hashing counters of this process"""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(auth_stats())
@@ -5,5 +5,6 @@ set -o errexit  # exit on error
 pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
+python manage.py generate_schema
 python manage.py migrate
 python manage.py createsu
\ No newline at end of file
@@ -64,10 +64,13 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         # 'rest_framework.authentication.SessionAuthentication',
-        "rest_framework.authentication.BasicAuthentication",  # for development and avoid CSRF Failed
-        "rest_framework.authentication.TokenAuthentication",
+        "apiv1.authentication.CachedBasicAuthentication",  # for development and avoid CSRF Failed
+        "apiv1.authentication.CachedTokenAuthentication",
+        "apiv1.authentication.SignedTokenAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "apiv1.pagination.TaskCursorPagination",
+    "PAGE_SIZE": 100,
 }
 
 
@@ -78,8 +81,16 @@ SPECTACULAR_SETTINGS = {
     # Other Settings
 }
 
+# api/v1/schema/ is generated once per code version (SCHEMA_CODE_VERSION, or
+# a digest of the sources) and kept in SCHEMA_CACHE_DIR, filled by build.sh
+SCHEMA_CODE_VERSION = os.getenv("SCHEMA_CODE_VERSION") or None
+SCHEMA_CACHE_DIR = os.getenv("SCHEMA_CACHE_DIR", str(BASE_DIR / "openapi"))
+SCHEMA_CACHE_MAX_AGE = 86400
+
 MIDDLEWARE = [
+    "apiv1.middleware.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "apiv1.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -90,6 +101,16 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Requests running more SQL than apiv1.query_budgets allows are logged, or
+# fail with QUERY_BUDGET_STRICT
+if DEBUG:
+    MIDDLEWARE.insert(2, "apiv1.middleware.QueryBudgetMiddleware")
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "0").lower() in [
+    "true",
+    "t",
+    "1",
+]
+
 ROOT_URLCONF = "django_backend.urls"
 
 TEMPLATES = [
@@ -122,9 +143,119 @@ DATABASES = {
         "PASSWORD": os.getenv("DATABASE_PASSWORD"),
         "HOST": os.getenv("DATABASE_HOST"),
         "PORT": os.getenv("DATABASE_PORT"),
+        # Workers connect when forked (gunicorn.conf.py) and keep it
+        "CONN_MAX_AGE": int(os.getenv("DATABASE_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Read replicas of the primary, one alias per host listed in
+# DATABASE_REPLICA_HOSTS (comma separated); routed by apiv1.routers
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+    filter(None, os.getenv("DATABASE_REPLICA_HOSTS", "").split(",")), start=1
+):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+# Task shards, one alias per host listed in DATABASE_SHARD_HOSTS
+for number, host in enumerate(
+    filter(None, os.getenv("DATABASE_SHARD_HOSTS", "").split(",")), start=1
+):
+    DATABASES[f"shard_{number}"] = {**DATABASES["default"], "HOST": host.strip()}
+
+# Aliases holding TaskModel rows; each user's tasks live on one of them,
+# picked by hashing the user id. While rebalance_task_shards moves users to
+# a new layout, TASK_SHARDS_PREVIOUS lists the old one
+TASK_SHARDS = os.getenv("TASK_SHARDS", "default").split(",")
+TASK_SHARDS_PREVIOUS = list(
+    filter(None, os.getenv("TASK_SHARDS_PREVIOUS", "").split(","))
+)
+# Seconds a user's shard is cached; rebalance_task_shards waits this long
+# for processes to notice a move unless the cache is shared
+TASK_SHARD_ROUTE_CACHE_TIMEOUT = 60
+
+DATABASE_ROUTERS = ["apiv1.routers.TaskShardRouter", "apiv1.routers.ReplicaRouter"]
+
+# Seconds a user stays on the primary after a write, keep it above the
+# replication lag; a failed replica is retried after RETRY_SECONDS
+DATABASE_REPLICA_PIN_SECONDS = 5
+DATABASE_REPLICA_RETRY_SECONDS = 30
+
+
+# Share of requests measured by apiv1.middleware.RequestTimingMiddleware
+# (Server-Timing header and a log line); slower requests are always logged
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.getenv("REQUEST_TIMING_SAMPLE_RATE", "1" if DEBUG else "0.01")
+)
+REQUEST_TIMING_SLOW_MS = 500
+REQUEST_TIMING_SLOW_QUERIES = 5
+
+# Metrics served at api/v1/metrics/. Under gunicorn, point METRICS_DIR at
+# an empty directory shared by the workers so a scrape sums all of them
+METRICS_ENABLED = True
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Admin changelists (tasks.changelist): unfiltered tables with more rows
+# than this show the estimate of the table statistics instead of a COUNT(*),
+# and pages past ADMIN_MAX_OFFSET_PAGE are only reached by keyset links
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+ADMIN_MAX_OFFSET_PAGE = 50
+
+# Milliseconds a freshly forked, warmed up worker may take to serve its
+# first request (see manage.py startup_profile)
+STARTUP_FIRST_REQUEST_BUDGET_MS = 25
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+# Response generations, token resolutions, Basic credentials and rate
+# limits, shard routes and replica pins, all read on every request. Set
+# REDIS_URL so the workers share them; otherwise each process keeps its own
+# in memory (see apiv1.checks)
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "tasks-api",
+        }
+    }
+
+# Seconds a cached task list/detail response is kept
+TASKS_CACHE_TIMEOUT = 300
+
+# How long delta sync cursors stay valid; tombstones older than this are
+# compacted by the compact_task_changes command
+TASKS_CHANGES_RETENTION = 30 * 86400
+# Cursors stay behind change log rows younger than this many seconds, which
+# are sent again; keep it above the longest task write transaction
+TASKS_CHANGES_SAFETY_WINDOW = 30
+
+# Token -> user resolutions: shared cache TTL, then the in-process LRU in front
+AUTH_TOKEN_CACHE_TIMEOUT = 300
+AUTH_TOKEN_LOCAL_CACHE_SIZE = 1024
+AUTH_TOKEN_LOCAL_CACHE_TIMEOUT = 5
+
+# Verified Basic credentials skip password hashing for this many seconds;
+# hashing itself is limited per account to RATE_LIMIT attempts per RATE_WINDOW
+BASIC_AUTH_CACHE_TIMEOUT = 60
+BASIC_AUTH_RATE_LIMIT = 10
+BASIC_AUTH_RATE_WINDOW = 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -193,12 +324,26 @@ DEFAULT_FROM_EMAIL = "jonhvelasco3@gmail.com"
 PASSWORD_RESET_USE_SITES_DOMAIN = True
 
 USE_JWT = True
+# Signed access/refresh tokens issued next to the legacy token (seconds)
+JWT_ACCESS_TOKEN_LIFETIME = 5 * 60
+JWT_REFRESH_TOKEN_LIFETIME = 7 * 24 * 60 * 60
 
 """ Email Configuration """
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Mail is queued in the accounts outbox and delivered through
+# EMAIL_OUTBOX_BACKEND by the send_queued_email command
+EMAIL_BACKEND = "accounts.mail.OutboxEmailBackend"
+EMAIL_OUTBOX_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Retries wait RETRY_DELAY seconds, doubling up to RETRY_MAX_DELAY; a worker
+# owns the messages it took for EMAIL_OUTBOX_LEASE seconds
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_RETRY_MAX_DELAY = 3600
+EMAIL_OUTBOX_LEASE = 300
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_USE_TLS = True
 EMAIL_PORT = 587
+# A stalled SMTP server fails the attempt instead of holding the worker
+EMAIL_TIMEOUT = 30
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 
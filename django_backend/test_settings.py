@@ -0,0 +1,17 @@
+"""
+Settings for the test suite: python manage.py test --settings=django_backend.test_settings
+
+SQLite in memory instead of MySQL; the cache is the default one of a process
+without REDIS_URL. shard_1 is a second task shard for the
+rebalance_task_shards tests.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+    "shard_1": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+}
+
+# A single process runs the tests (see apiv1.checks)
+SILENCED_SYSTEM_CHECKS = ["apiv1.W001"]
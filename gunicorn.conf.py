@@ -0,0 +1,32 @@
+"""gunicorn settings, read from the working directory by default.
+
+The app is loaded and warmed up once in the master (apiv1.startup.warm_up),
+so forked workers share that memory and serve their first request at once.
+"""
+import glob
+import os
+
+wsgi_app = "django_backend.wsgi:application"
+preload_app = True
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+
+def on_starting(server):
+    # Metrics of a previous run would be summed into this one's.
+    directory = os.getenv("METRICS_DIR")
+    if directory:
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+
+
+def when_ready(server):
+    from apiv1.startup import warm_up
+
+    for name, seconds in warm_up():
+        server.log.info("Warmed up %s in %.1f ms", name, seconds * 1000)
+
+
+def post_fork(server, worker):
+    from apiv1.startup import connect_databases
+
+    connect_databases()
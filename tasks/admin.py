@@ -1,12 +1,77 @@
 from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.utils.html import format_html
 
+from .changelist import ScalableAdminMixin
 from .models import TaskModel
+from .sharding import get_all_shards, get_shards
 
 # Register your models here.
 
 
-class CustomTaskModelAdmin(admin.ModelAdmin):
-    list_display = ("user", "title")
+class ShardListFilter(admin.SimpleListFilter):
+    """Which shard the changelist reads, the first one unless chosen"""
+
+    title = "shard"
+    parameter_name = "shard"
+
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in get_all_shards()]
+
+    def value(self):
+        return super().value() or get_shards()[0]
+
+    def choices(self, changelist):
+        # Shards cannot be listed together, so there is no "All" choice.
+        for lookup, title in self.lookup_choices:
+            yield {
+                "selected": self.value() == lookup,
+                "query_string": changelist.get_query_string(
+                    {self.parameter_name: lookup}
+                ),
+                "display": title,
+            }
+
+    def queryset(self, request, queryset):
+        if self.value() not in get_all_shards():
+            return queryset.none()
+        return queryset.using(self.value())
+
+
+class CustomTaskModelAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ("id", "user_tasks", "title", "created_at")
+    list_select_related = ("user",)
+    list_filter = (ShardListFilter,)
+    # Only what an index serves: the primary key order, title prefixes and
+    # ?user=<id> (the user column links there) on the user indexes.
+    ordering = ("-id",)
+    sortable_by = ("id",)
+    search_fields = ("^title",)
+
+    @admin.display(description="user")
+    def user_tasks(self, obj):
+        return format_html('<a href="?user={}">{}</a>', obj.user_id, obj.user)
+
+    def get_readonly_fields(self, request, obj=None):
+        # Changing the user would leave the task on the old user's shard.
+        if obj is not None:
+            return ("user",)
+        return ()
+
+    def get_object(self, request, object_id, from_field=None):
+        # Task ids are unique across shards, so the first match is the task.
+        opts = self.model._meta
+        field = opts.pk if from_field is None else opts.get_field(from_field)
+        try:
+            object_id = field.to_python(object_id)
+        except (ValidationError, ValueError):
+            return None
+        queryset = self.get_queryset(request).filter(**{field.name: object_id})
+        for alias in get_all_shards():
+            obj = queryset.using(alias).first()
+            if obj is not None:
+                return obj
+        return None
 
 
 admin.site.register(TaskModel, CustomTaskModelAdmin)
@@ -0,0 +1,225 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def estimate_row_count(model, using):
+    """Rows in the model's table according to the database statistics.
+
+    None where the backend keeps no such estimate (SQLite).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+        elif connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(table)],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    # PostgreSQL reports -1 for a table that was never analyzed.
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that counts an unfiltered table from its statistics.
+
+    Below ADMIN_ESTIMATED_COUNT_THRESHOLD rows, or once filtered, the count is
+    exact. Offset pages stop at ADMIN_MAX_OFFSET_PAGE, deeper rows are reached
+    through the keyset links of KeysetChangeList.
+    """
+
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, "query") and not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            threshold = getattr(settings, "ADMIN_ESTIMATED_COUNT_THRESHOLD", 100000)
+            if estimate is not None and estimate >= threshold:
+                self.estimated = True
+                return estimate
+        return super().count
+
+    @property
+    def max_offset_page(self):
+        return getattr(settings, "ADMIN_MAX_OFFSET_PAGE", 50)
+
+    def validate_number(self, number):
+        number = super().validate_number(number)
+        if number > self.max_offset_page:
+            raise InvalidPage("That page is too deep, follow the next page links.")
+        return number
+
+    def get_elided_page_range(self, number=1, **kwargs):
+        previous = None
+        for page in super().get_elided_page_range(number, **kwargs):
+            if page == self.ELLIPSIS or page <= self.max_offset_page:
+                if not (page == previous == self.ELLIPSIS):
+                    yield page
+                previous = page
+
+
+class KeysetChangeList(ChangeList):
+    """ChangeList that also pages with ``?after=<cursor>`` on its ordering.
+
+    The cursor holds the ordering values of the last row shown, so the next
+    page is an index range scan whatever its depth. Only orderings of plain,
+    non-null columns including a unique one can be followed this way.
+    """
+
+    cursor_var = "after"
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(self.cursor_var)
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(self.cursor_var, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Filtering or sorting again starts from the first page.
+        remove = [*(remove or ()), self.cursor_var]
+        return super().get_query_string(new_params, remove)
+
+    def apply_select_related(self, qs):
+        # Relations living in another database cannot be joined: prefetch them.
+        if not isinstance(self.list_select_related, (list, tuple)):
+            return super().apply_select_related(qs)
+        joined, prefetched = [], []
+        for name in self.list_select_related:
+            related = self.model._meta.get_field(name.split("__")[0]).related_model
+            if router.db_for_read(related) == qs.db:
+                joined.append(name)
+            else:
+                prefetched.append(name)
+        if joined:
+            qs = qs.select_related(*joined)
+        return qs.prefetch_related(*prefetched)
+
+    def get_keyset(self):
+        """(field, descending) pairs of the ordering, None if it cannot be used"""
+        keyset = []
+        for name in self.queryset.query.order_by:
+            if not isinstance(name, str):
+                return None
+            descending = name.startswith("-")
+            name = name.lstrip("-")
+            try:
+                field = self.opts.pk if name == "pk" else self.opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if field.is_relation or field.null:
+                return None
+            # The admin may add "-pk" to an ordering already ending on it.
+            if all(field != previous for previous, _ in keyset):
+                keyset.append((field, descending))
+        if not any(field.unique for field, _ in keyset):
+            return None
+        return keyset
+
+    def encode_cursor(self, obj):
+        values = [field.value_to_string(obj) for field, _ in self.keyset]
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self):
+        try:
+            values = json.loads(urlsafe_b64decode(self.cursor.encode()))
+            if len(values) != len(self.keyset):
+                raise ValueError()
+            return [
+                field.to_python(value) for (field, _), value in zip(self.keyset, values)
+            ]
+        except (TypeError, ValueError, ValidationError, UnicodeError):
+            raise IncorrectLookupParameters
+
+    def get_keyset_filter(self, values):
+        """Rows after ``values`` in the ordering of the keyset"""
+        condition = Q()
+        for position, (field, descending) in enumerate(self.keyset):
+            equal = {
+                previous.name: value
+                for (previous, _), value in zip(self.keyset, values[:position])
+            }
+            lookup = f"{field.name}__{'lt' if descending else 'gt'}"
+            condition |= Q(**equal, **{lookup: values[position]})
+        return condition
+
+    def get_results(self, request):
+        self.keyset = None if self.list_editable else self.get_keyset()
+        if self.cursor is None or self.keyset is None:
+            return super().get_results(request)
+
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        page = self.queryset.filter(self.get_keyset_filter(self.decode_cursor()))
+        rows = list(page[: self.list_per_page + 1])
+
+        self.result_count = paginator.count
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.full_result_count = (
+            self.root_queryset.count() if self.show_full_result_count else None
+        )
+        self.show_admin_actions = True
+        self.result_list = rows[: self.list_per_page]
+        self.has_next = len(rows) > self.list_per_page
+        self.can_show_all = False
+        self.multi_page = True
+        self.paginator = paginator
+
+    @cached_property
+    def next_url(self):
+        """Query string of the keyset page after this one, if there is one"""
+        if self.keyset is None:
+            return None
+        if self.cursor is None:
+            if not self.multi_page or self.show_all:
+                return None
+            if self.page_num >= self.paginator.num_pages:
+                return None
+        elif not self.has_next:
+            return None
+        # Evaluates the page the template iterates over, no extra query.
+        rows = list(self.result_list)
+        if not rows:
+            return None
+        return self.get_query_string(
+            {self.cursor_var: self.encode_cursor(rows[-1])}, [PAGE_VAR]
+        )
+
+    @cached_property
+    def first_url(self):
+        return self.get_query_string(remove=[PAGE_VAR])
+
+
+class ScalableAdminMixin:
+    """Changelist settings for tables too large to count or page with OFFSET"""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = "admin/keyset_change_list.html"
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.6 on 2026-10-18 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tasks", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="taskmodel",
+            options={"ordering": ["created_at", "id"]},
+        ),
+        migrations.AddIndex(
+            model_name="taskmodel",
+            index=models.Index(
+                fields=["user", "created_at", "id"], name="task_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="taskmodel",
+            index=models.Index(
+                fields=["user", "updated_at", "id"], name="task_user_updated_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.1.6 on 2026-10-18 15:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def add_fulltext_index(apps, schema_editor):
+    # MySQL searches through its native FULLTEXT index instead of the token table.
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(
+            "CREATE FULLTEXT INDEX task_fulltext_idx "
+            "ON tasks_taskmodel (title, description)"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute("DROP INDEX task_fulltext_idx ON tasks_taskmodel")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tasks", "0002_user_task_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskSearchToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=32)),
+                ("weight", models.PositiveIntegerField()),
+                (
+                    "task",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to="tasks.taskmodel",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="tasksearchtoken",
+            index=models.Index(
+                fields=["user", "token", "task"], name="task_search_user_token_idx"
+            ),
+        ),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
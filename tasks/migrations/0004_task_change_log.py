@@ -0,0 +1,50 @@
+# Generated by Django 4.1.6 on 2026-10-18 15:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tasks", "0003_task_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task_id", models.BigIntegerField()),
+                ("deleted", models.BooleanField(default=False)),
+                ("changed_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="taskchange",
+            index=models.Index(fields=["user", "id"], name="task_change_user_seq_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="taskchange",
+            index=models.Index(
+                fields=["task_id", "id"], name="task_change_task_seq_idx"
+            ),
+        ),
+    ]
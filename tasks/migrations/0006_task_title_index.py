@@ -0,0 +1,16 @@
+# Generated by Django 4.1.6 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tasks", "0005_task_shards"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="taskmodel",
+            index=models.Index(fields=["title"], name="task_title_idx"),
+        ),
+    ]
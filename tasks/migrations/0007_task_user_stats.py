@@ -0,0 +1,36 @@
+# Generated by Django 4.1.6 on 2026-10-18 16:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tasks", "0006_task_title_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskUserStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="task_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("day", models.DateField()),
+                ("created_today", models.PositiveIntegerField(default=0)),
+                ("updated_today", models.PositiveIntegerField(default=0)),
+                ("last_activity", models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
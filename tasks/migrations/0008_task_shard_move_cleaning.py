@@ -0,0 +1,25 @@
+# Generated by Django 4.1.6 on 2026-10-18 16:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tasks", "0007_task_user_stats"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="taskshardmove",
+            name="state",
+            field=models.CharField(
+                choices=[
+                    ("copying", "Copying"),
+                    ("cleaning", "Cleaning"),
+                    ("done", "Done"),
+                ],
+                default="copying",
+                max_length=16,
+            ),
+        ),
+    ]
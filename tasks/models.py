@@ -1,17 +1,190 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, router, transaction
+
+from .sharding import assign_task_ids, is_sharded
 
 MyUser = get_user_model()
 
 
+class TaskQuerySet(models.QuerySet):
+    def create(self, **kwargs):
+        # As QuerySet.create(), but routed on the new task: its user's shard.
+        task = self.model(**kwargs)
+        self._for_write = True
+        task.save(force_insert=True, using=self._db)
+        return task
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        assign_task_ids(objs)
+        queryset = self
+        user_ids = {obj.user_id for obj in objs}
+        if self._db is None and len(user_ids) == 1:
+            alias = router.db_for_write(self.model, user_id=user_ids.pop())
+            queryset = self.using(alias)
+        return super(TaskQuerySet, queryset).bulk_create(objs, *args, **kwargs)
+
+
+class TaskManager(models.Manager.from_queryset(TaskQuerySet)):
+    def for_user(self, user_id):
+        """The user's tasks, on the shard that holds them"""
+        return self.db_manager(hints={"user_id": user_id}).filter(user_id=user_id)
+
+
 # Create your models here.
 class TaskModel(models.Model):
     title = models.CharField(max_length=100)
     description = models.TextField()
-    user = models.ForeignKey(MyUser, on_delete=models.CASCADE)
+    # Users live on the primary, their tasks on any shard: no FK constraint.
+    user = models.ForeignKey(MyUser, on_delete=models.CASCADE, db_constraint=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskManager()
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "id"], name="task_user_created_idx"
+            ),
+            models.Index(
+                fields=["user", "updated_at", "id"], name="task_user_updated_idx"
+            ),
+            # Title prefix search of the admin.
+            models.Index(fields=["title"], name="task_title_idx"),
+        ]
+
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        task = super().from_db(db, field_names, values)
+        # The text as stored, so saves that keep it skip the search index.
+        task._indexed_text = (
+            task.__dict__.get("title"),
+            task.__dict__.get("description"),
+        )
+        return task
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.pk is None and is_sharded():
+            assign_task_ids([self])
+            if not args:
+                # Skip the UPDATE Django tries first for a new row with a pk.
+                kwargs.setdefault("force_insert", True)
+        # The post_save receivers (search index, change log, user stats)
+        # commit together with the row.
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class TaskSearchToken(models.Model):
+    """Inverted index of task words, the portable full-text search backend"""
+
+    task = models.ForeignKey(
+        TaskModel, on_delete=models.CASCADE, related_name="search_tokens"
+    )
+    # Copied from the task so a user's lookups stay inside one index range.
+    user = models.ForeignKey(
+        MyUser, on_delete=models.CASCADE, db_index=False, db_constraint=False
+    )
+    token = models.CharField(max_length=32)
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "token", "task"], name="task_search_user_token_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return self.token
+
+
+class TaskChange(models.Model):
+    """Change log behind delta sync; the id is the sync sequence number.
+
+    Every task write appends a row, a deletion appends a tombstone. Rows a
+    later change of the same task supersedes, and tombstones older than the
+    sync retention, are removed by the compact_task_changes command.
+    """
+
+    user = models.ForeignKey(
+        MyUser, on_delete=models.CASCADE, db_index=False, db_constraint=False
+    )
+    # Not a foreign key: tombstones outlive their task.
+    task_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"], name="task_change_user_seq_idx"),
+            models.Index(fields=["task_id", "id"], name="task_change_task_seq_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id} {'deleted' if self.deleted else 'changed'}"
+
+
+class TaskUserStats(models.Model):
+    """Task counters of a user, stored next to their tasks.
+
+    Task writes update it in their own transaction (see apiv1.stats), and
+    the reconcile_task_stats command repairs any drift. The daily
+    counters are for ``day``: a row from an earlier day counts as zero.
+    """
+
+    user = models.OneToOneField(
+        MyUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_constraint=False,
+        related_name="task_stats",
+    )
+    total = models.PositiveIntegerField(default=0)
+    day = models.DateField()
+    created_today = models.PositiveIntegerField(default=0)
+    # Tasks whose latest change (creation included) happened that day.
+    updated_today = models.PositiveIntegerField(default=0)
+    last_activity = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.total} tasks"
+
+
+class TaskShardMove(models.Model):
+    """Progress of moving a user's tasks to their shard in a new layout.
+
+    Kept on the primary. While copying, the user's tasks are still read from
+    ``source`` and writes are refused. Once cleaning they are served by
+    ``target`` and the source rows are being deleted, see
+    rebalance_task_shards.
+    """
+
+    COPYING = "copying"
+    CLEANING = "cleaning"
+    DONE = "done"
+    STATES = [(COPYING, "Copying"), (CLEANING, "Cleaning"), (DONE, "Done")]
+
+    user_id = models.BigIntegerField(unique=True)
+    source = models.CharField(max_length=64)
+    target = models.CharField(max_length=64)
+    state = models.CharField(max_length=16, choices=STATES, default=COPYING)
+    copied_up_to = models.BigIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.source} -> {self.target} ({self.state})"
+
+
+class TaskIdSequence(models.Model):
+    """Next free task id when tasks are spread over several shards"""
+
+    next_id = models.BigIntegerField()
@@ -0,0 +1,146 @@
+import hashlib
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Max
+
+ROUTE_CACHE_PREFIX = "tasks:shard-route:"
+
+Route = namedtuple("Route", ["alias", "moving"])
+
+_id_block = {"next": 0, "end": 0}
+_id_lock = threading.Lock()
+
+
+def get_shards():
+    return getattr(settings, "TASK_SHARDS", None) or [DEFAULT_DB_ALIAS]
+
+
+def get_previous_shards():
+    return getattr(settings, "TASK_SHARDS_PREVIOUS", None) or []
+
+
+def get_all_shards():
+    """Every alias that may hold task rows, current layout first"""
+    return list(dict.fromkeys(get_shards() + get_previous_shards()))
+
+
+def is_sharded():
+    return len(get_all_shards()) > 1
+
+
+def hash_shard(user_id, shards):
+    """Rendezvous hashing: adding a shard only moves the users it wins"""
+    return max(
+        shards,
+        key=lambda alias: hashlib.md5(f"{alias}:{user_id}".encode()).digest(),
+    )
+
+
+def _get_route_cache():
+    return caches[getattr(settings, "TASK_SHARD_CACHE_ALIAS", "default")]
+
+
+def get_route(user_id):
+    """Where a user's tasks are read and written, and whether they are moving"""
+    target = hash_shard(user_id, get_shards())
+    previous = get_previous_shards()
+    if not previous:
+        return Route(target, False)
+    source = hash_shard(user_id, previous)
+    if source == target:
+        return Route(target, False)
+
+    cache = _get_route_cache()
+    key = ROUTE_CACHE_PREFIX + str(user_id)
+    route = cache.get(key)
+    if route is None:
+        from .models import TaskShardMove
+
+        state = (
+            TaskShardMove.objects.using(DEFAULT_DB_ALIAS)
+            .filter(user_id=user_id, target=target)
+            .values_list("state", flat=True)
+            .first()
+        )
+        if state in (TaskShardMove.CLEANING, TaskShardMove.DONE):
+            route = Route(target, False)
+        else:
+            route = Route(source, state is not None)
+        cache.set(
+            key, tuple(route), getattr(settings, "TASK_SHARD_ROUTE_CACHE_TIMEOUT", 60)
+        )
+    return Route(*route)
+
+
+def get_shard(user_id):
+    return get_route(user_id).alias
+
+
+def forget_route(user_id):
+    _get_route_cache().delete(ROUTE_CACHE_PREFIX + str(user_id))
+
+
+def allocate_task_ids(count):
+    """Reserve ``count`` task ids that are unique across every shard.
+
+    Shards cannot hand out ids themselves, as a user moved to another shard
+    keeps their task ids. Each process takes blocks of TASK_ID_BLOCK_SIZE ids
+    from a counter row on the primary.
+    """
+    ids = []
+    with _id_lock:
+        while len(ids) < count:
+            if _id_block["next"] >= _id_block["end"]:
+                size = max(
+                    count - len(ids), getattr(settings, "TASK_ID_BLOCK_SIZE", 1000)
+                )
+                _id_block["next"] = _reserve_id_block(size)
+                _id_block["end"] = _id_block["next"] + size
+            take = min(count - len(ids), _id_block["end"] - _id_block["next"])
+            ids.extend(range(_id_block["next"], _id_block["next"] + take))
+            _id_block["next"] += take
+    return ids
+
+
+def _reserve_id_block(size):
+    from .models import TaskIdSequence, TaskModel
+
+    while True:
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                sequence = (
+                    TaskIdSequence.objects.using(DEFAULT_DB_ALIAS)
+                    .select_for_update()
+                    .filter(pk=1)
+                    .first()
+                )
+                if sequence is None:
+                    # Start past the ids the shards' own counters handed out.
+                    highest = max(
+                        TaskModel.objects.using(alias).aggregate(last=Max("id"))["last"]
+                        or 0
+                        for alias in get_all_shards()
+                    )
+                    sequence = TaskIdSequence.objects.using(DEFAULT_DB_ALIAS).create(
+                        pk=1, next_id=highest + 1
+                    )
+                start = sequence.next_id
+                sequence.next_id += size
+                sequence.save(using=DEFAULT_DB_ALIAS, update_fields=["next_id"])
+                return start
+        except IntegrityError:
+            # Another process created the counter row first.
+            continue
+
+
+def assign_task_ids(tasks):
+    """Give new tasks allocated ids when tasks are spread over several shards"""
+    if not is_sharded():
+        return
+    missing = [task for task in tasks if task.pk is None]
+    for task, pk in zip(missing, allocate_task_ids(len(missing))):
+        task.pk = pk
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent after TaskModel rows were written through bulk_create, bulk_update or a
+# queryset delete, which skip post_save (and batch post_delete). Receivers get
+# ``user_id``, ``using`` and the ``created``, ``updated`` and ``deleted`` id lists.
+tasks_bulk_changed = Signal()